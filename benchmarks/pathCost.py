@@ -0,0 +1,73 @@
+"""
+Benchmark the 0-1 BFS path cost engine (irrationalAgents.helpers.pathCost)
+against the PriorityQueue Dijkstra in irrationalAgents.helpers.evaluation,
+checking that both give identical distances on every position.
+
+usage: python -m benchmarks.pathCost [-p POSITIONS] [-s SEED]
+"""
+
+import argparse
+import random
+import time
+
+from irrationalAgents.basicBoard import Board
+from irrationalAgents.helpers.evaluation import getDijkstraDistance
+from irrationalAgents.helpers.pathCost import getPathCost, getPathCosts
+
+SIZES = range(3, 16)
+
+
+def random_position(n, rng):
+    """
+    Board after a random number of random placements (captures included).
+    """
+    board = Board(n)
+    player = "red"
+    for _ in range(rng.randint(0, n * n - 1)):
+        empty = board.empty_hexes()
+        if not empty:
+            break
+        board.place(player, rng.choice(empty))
+        player = "blue" if player == "red" else "red"
+    return board
+
+
+def time_per_call(fn, boards):
+    """
+    Mean CPU seconds for fn(board) over boards.
+    """
+    start = time.process_time()
+    for board in boards:
+        fn(board)
+    return (time.process_time() - start) / len(boards)
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="benchmarks.pathCost", description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-p", "--positions", type=int, default=50,
+        help="random positions per board size (default: 50)")
+    parser.add_argument("-s", "--seed", type=int, default=0,
+        help="random seed (default: 0)")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    print(f"{'n':>3} {'dijkstra (ms)':>14} {'0-1 bfs (ms)':>13} {'both (ms)':>10} {'speedup':>8}")
+    for n in SIZES:
+        boards = [random_position(n, rng) for _ in range(args.positions)]
+
+        for board in boards:
+            costs = getPathCosts(board)
+            for color in (1, 2):
+                expected = getDijkstraDistance(color, board)
+                if costs[color] != expected:
+                    raise AssertionError(f"n={n} colour={color}: {costs[color]} != {expected}")
+
+        old = time_per_call(lambda b: (getDijkstraDistance(1, b), getDijkstraDistance(2, b)), boards)
+        new = time_per_call(lambda b: (getPathCost(1, b), getPathCost(2, b)), boards)
+        both = time_per_call(getPathCosts, boards)
+        print(f"{n:>3} {old * 1000:>14.3f} {new * 1000:>13.3f} {both * 1000:>10.3f} {old / new:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+"""
+Benchmark the search hot paths on a fixed corpus of positions and save the
+results as JSON, so runs can be compared across commits.
+
+For every board size, each benchmark is timed in isolation over every
+position of that size in benchmarks/positions/ (input.json format):
+
+  place_undo        Board/BitBoard handle_action + undo_move of every empty hex
+  connected_coords  connected_coords from every occupied hex
+  dijkstra_eval     helpers.evaluation.dijkstraEvalScore
+  evaluate          helpers.minimax.evaluate (distances plus piece features)
+  minimax           fixed-depth minimax from the position (nodes = minimax
+                    calls + leaves scored by the batched evaluation)
+
+Rates are per CPU second. Memory high-water is the tracemalloc peak of one
+extra (untimed) pass of each benchmark, plus the process's peak RSS.
+
+usage: python -m benchmarks.search [-n N [N ...]] [-d DEPTH] [-r REPEAT]
+                                   [-o OUTPUT] [-c BASELINE] [-t THRESHOLD]
+       python -m benchmarks.search --generate [-s SEED]
+"""
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+from glob import glob
+
+from numpy import inf
+
+from benchmarks.pathCost import random_position
+from irrationalAgents.basicBoard import Board, _TOKEN_MAP_OUT
+from irrationalAgents.bitBoard import BitBoard
+from irrationalAgents.helpers import minimax as search
+from irrationalAgents.helpers.evaluation import dijkstraEvalScore
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+SIZES = range(3, 16)
+CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "positions")
+# share of the board filled in the generated positions of each size
+FILLS = (0.2, 0.4, 0.6)
+_TOKENS = {"r": 1, "b": 2}
+
+
+def load_position(path, boardClass=Board):
+    """
+    Board for an input.json style file ({"n": n, "board": [[colour, r, q], ...]}).
+    Positions are set up as is, with one turn taken per token.
+    """
+    with open(path) as file:
+        data = json.load(file)
+    n = data["n"]
+    cells = [0] * (n * n)
+    for colour, r, q in data["board"]:
+        cells[r * n + q] = _TOKENS[colour]
+    board = boardClass(n)
+    board.load_cells(cells, len(data["board"]))
+    return board
+
+
+def load_corpus(n, boardClass=Board):
+    return [load_position(path, boardClass)
+        for path in sorted(glob(os.path.join(CORPUS, f"n{n:02d}_*.json")))]
+
+
+def generate_corpus(seed):
+    """
+    Write FILLS positions for each size, from random play with captures,
+    skipping positions that either colour has already won.
+    """
+    rng = random.Random(seed)
+    for n in SIZES:
+        for k, fill in enumerate(FILLS):
+            while True:
+                board = random_position(n, rng)
+                stones = len(board.occupied_hexes)
+                if abs(stones - fill * n * n) <= max(1, n * n // 10) and \
+                        not board.connectivity.connected(1) and not board.connectivity.connected(2):
+                    break
+            tokens = [[_TOKEN_MAP_OUT[board._data[r][q]][0], r, q]
+                for r in range(n) for q in range(n) if board._data[r][q]]
+            path = os.path.join(CORPUS, f"n{n:02d}_{k}.json")
+            with open(path, "w") as file:
+                json.dump({"n": n, "board": tokens}, file, indent=4)
+                file.write("\n")
+
+
+def bench_place_undo(boards):
+    ops = 0
+    for board in boards:
+        player = "red" if board.turns_taken % 2 == 0 else "blue"
+        for r, q in board.empty_hexes():
+            board.undo_move(board.handle_action(("PLACE", r, q), player))
+            ops += 1
+    return ops
+
+def bench_connected_coords(boards):
+    ops = 0
+    for board in boards:
+        for coord in list(board.occupied_hexes):
+            board.connected_coords(coord)
+            ops += 1
+    return ops
+
+def bench_dijkstra_eval(boards):
+    for board in boards:
+        dijkstraEvalScore(1, board)
+        dijkstraEvalScore(2, board)
+    return 2 * len(boards)
+
+def bench_evaluate(boards):
+    for board in boards:
+        search.evaluate(board, 1)
+        search.evaluate(board, 2)
+    return 2 * len(boards)
+
+def bench_minimax(boards, depth):
+    """
+    Nodes searched by a depth-limited minimax from each board.
+    """
+    nodes = [0]
+    minimax, evaluateChildren = search.minimax, search.evaluateChildren
+
+    def counted(*args, **kwargs):
+        nodes[0] += 1
+        return minimax(*args, **kwargs)
+
+    def countedChildren(*args, **kwargs):
+        scores = evaluateChildren(*args, **kwargs)
+        nodes[0] += sum(score is not None for score in scores)
+        return scores
+
+    # recursive calls look minimax up in the module, so they are counted too
+    search.minimax, search.evaluateChildren = counted, countedChildren
+    try:
+        for board in boards:
+            player = 1 if board.turns_taken % 2 == 0 else 2
+            search.minimax(board, 0, None, -inf, inf, player, player, depth)
+    finally:
+        search.minimax, search.evaluateChildren = minimax, evaluateChildren
+    return nodes[0]
+
+
+def measure(fn, boards, repeat):
+    """
+    {"ops", "seconds", "rate", "peak_kb"} for fn(boards) -> operation count.
+    """
+    ops, start = 0, time.process_time()
+    for _ in range(repeat):
+        ops += fn(boards)
+    seconds = time.process_time() - start
+
+    tracemalloc.start()
+    fn(boards)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"ops": ops, "seconds": seconds, "rate": ops / seconds if seconds else None,
+        "peak_kb": peak / 1024}
+
+
+def default_depth(n):
+    return 3 if n <= 6 else 2
+
+
+def run(args):
+    results = {}
+    for n in args.sizes:
+        boards = load_corpus(n)
+        if not boards:
+            print(f"no positions for n={n} in {CORPUS}", file=sys.stderr)
+            continue
+        bitBoards = load_corpus(n, BitBoard)
+        depth = args.depth or default_depth(n)
+
+        benches = {
+            "place_undo": (bench_place_undo, boards),
+            "place_undo_bitboard": (bench_place_undo, bitBoards),
+            "connected_coords": (bench_connected_coords, boards),
+            "connected_coords_bitboard": (bench_connected_coords, bitBoards),
+            "dijkstra_eval": (bench_dijkstra_eval, boards),
+            "evaluate": (bench_evaluate, boards),
+            f"minimax_d{depth}": (lambda b: bench_minimax(b, depth), boards),
+        }
+        results[str(n)] = row = {}
+        for name, (fn, corpus) in benches.items():
+            repeat = 1 if name.startswith("minimax") else args.repeat
+            row[name] = measure(fn, corpus, repeat)
+            print(f"n={n:>2} {name:<26} {row[name]['rate'] or 0:>12.0f}/s "
+                f"{row[name]['peak_kb']:>10.1f}kB peak")
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+            text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, threshold):
+    """
+    Print rate ratios against a baseline results file; True if any benchmark
+    got slower by more than threshold (e.g. 0.1 for 10%).
+    """
+    regressed = False
+    print(f"\ncompared with {baseline['commit']} ({baseline['time']}):")
+    for n, row in results.items():
+        for name, result in row.items():
+            old = baseline["results"].get(n, {}).get(name)
+            if not old or not old["rate"] or not result["rate"]:
+                continue
+            ratio = result["rate"] / old["rate"]
+            flag = ""
+            if ratio < 1 - threshold:
+                flag, regressed = "  <-- slower", True
+            print(f"n={n:>2} {name:<26} {ratio:>6.2f}x{flag}")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="benchmarks.search", description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-n", "--sizes", type=int, nargs="+", default=list(SIZES),
+        help="board sizes to benchmark (default: 3 to 15)")
+    parser.add_argument("-d", "--depth", type=int, default=None,
+        help="minimax depth (default: 3 up to n=6, then 2)")
+    parser.add_argument("-r", "--repeat", type=int, default=20,
+        help="passes over the corpus for the fast benchmarks (default: 20)")
+    parser.add_argument("-o", "--output", default="benchmark.json",
+        help="where to save the results (default: benchmark.json)")
+    parser.add_argument("-c", "--compare", metavar="BASELINE",
+        help="earlier results file to compare against")
+    parser.add_argument("-t", "--threshold", type=float, default=0.1,
+        help="slowdown that counts as a regression with --compare (default: 0.1)")
+    parser.add_argument("--generate", action="store_true",
+        help="regenerate the position corpus instead of benchmarking")
+    parser.add_argument("-s", "--seed", type=int, default=0,
+        help="random seed for --generate (default: 0)")
+    args = parser.parse_args()
+
+    if args.generate:
+        generate_corpus(args.seed)
+        return
+
+    results = run(args)
+    report = {
+        "commit": git_commit(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": sys.version.split()[0],
+        "results": results,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+            if resource is not None else None,
+    }
+    with open(args.output, "w") as file:
+        json.dump(report, file, indent=2)
+    print(f"results saved to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as file:
+            if compare(results, json.load(file), args.threshold):
+                sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,8 +6,14 @@ Code borrowed from 'referee' package written for COMP30024 Project B at The Univ
 """
 
 from queue import Queue
-from numpy import zeros, array, roll, vectorize
+from numpy import zeros, array, roll
 from collections import defaultdict as dd
+from irrationalAgents.topology import get_topology
+from irrationalAgents.helpers.pathDistances import PathDistances
+from irrationalAgents.connectivity import Connectivity
+from irrationalAgents.virtualConnections import VirtualConnections
+from irrationalAgents.symmetry import image_hashes, image_zobrist
+from irrationalAgents.undoStack import STEAL, UndoStack, pack, unpack
 
 # Utility function to add two coord tuples
 _ADD = lambda a, b: (a[0] + b[0], a[1] + b[1])
@@ -38,6 +44,7 @@ _TOKEN_MAP_IN = {v: k for k, v in _TOKEN_MAP_OUT.items()}
 
 # Map between player token types
 _SWAP_PLAYER = { 0: 0, 1: 2, 2: 1 }
+_SWAP_TOKENS = array([0, 2, 1])
 
 class Board:
     def __init__(self, n, board = None):
@@ -45,6 +52,7 @@ class Board:
         Initialise board of given size n.
         """
         self.n = n
+        self.topology = get_topology(n)
         
         if board is None:
             self._data = zeros((n, n), dtype=int)
@@ -65,11 +73,38 @@ class Board:
 
         #initialise set of occupied hexes
         self.occupied_hexes = set()
-        self.timeLimit = n*n
-        self.greedyLimit = n*n - n/2
-        self.randomLimit = n*n - 1
-        self.totalTime = 0
-        self.moveStart = 0
+
+        # indexed set of empty cells (flat indices r * n + q): empty_cells in
+        # no particular order, and each cell's slot in it in empty_slots
+        self.empty_cells = []
+        self.empty_slots = [0] * (n * n)
+        # running sums of the r and q coordinates of occupied hexes
+        self.centroid_sums = [0, 0]
+        self._index_cells()
+
+        # process_time at which an in-progress search must stop (None = no limit)
+        self.deadline = None
+        # helpers.searchStats.SearchStats filled in by minimax (None = not collected)
+        self.stats = None
+        # helpers.evalCache.EvalCache of leaf scores used by evaluate (None = not cached)
+        self.evalCache = None
+
+        # Zobrist hash of the position, and of its images under the board's
+        # symmetries (see symmetry.py), kept up to date by place/undo_move/swap
+        self.image_keys = image_zobrist(n)
+        self._rehash()
+
+        # shortest path distance maps for both colours, repaired on every change
+        self.paths = PathDistances(self.topology, [int(t) for t in self._data.flat])
+
+        # groups of connected stones, for win checks after every move
+        self.connectivity = Connectivity(self.topology, self.paths.cells)
+
+        # bridges and edge templates of both colours, for distance estimates
+        self.vcs = VirtualConnections(self.topology, self.paths.cells)
+
+        # moves made with handle_action, for undo_move
+        self.undo_stack = UndoStack(n * n)
 
     def __getitem__(self, coord):
         """
@@ -83,6 +118,87 @@ class Board:
         """
         self._data[coord] = _TOKEN_MAP_IN[token]
 
+    def _compute_hash(self):
+        """
+        Zobrist hash of the current position, computed from scratch.
+        """
+        return self.topology.hash_cells(self._occupied_cells(), self.turns_taken)
+
+    def _occupied_cells(self):
+        n = self.n
+        return [(i * n + j, self._data[i][j])
+            for i in range(n) for j in range(n) if self._data[i][j] != 0]
+
+    def _rehash(self):
+        """
+        Compute the hash and the image hashes from scratch.
+        """
+        cells = self._occupied_cells()
+        self.hash = self.topology.hash_cells(cells, self.turns_taken)
+        self.image_hashes = image_hashes(self.topology, cells, self.turns_taken)
+
+    def _toggle_hash(self, token, i, turn = 0):
+        """
+        Toggle a token (internal type) at flat index i in the hash and the
+        image hashes, along with turn (0, or zobrist_turn to pass the move).
+        """
+        self.hash ^= self.topology.zobrist[token][i] ^ turn
+        rotated, swapped, both = self.image_keys[token][i]
+        images = self.image_hashes
+        images[0] ^= rotated ^ turn
+        images[1] ^= swapped ^ turn
+        images[2] ^= both ^ turn
+
+    def _index_cells(self):
+        """
+        Build empty_cells, empty_slots and centroid_sums from _data.
+        """
+        n = self.n
+        self.empty_cells = []
+        self.centroid_sums = [0, 0]
+        for i in range(n * n):
+            r, q = divmod(i, n)
+            if self._data[r][q] == 0:
+                self.empty_slots[i] = len(self.empty_cells)
+                self.empty_cells.append(i)
+            else:
+                self.centroid_sums[0] += r
+                self.centroid_sums[1] += q
+
+    def _fill_cell(self, coord):
+        """
+        Record that the empty cell at coord now holds a token. The last empty
+        cell moves into its slot, which stays in empty_slots for _clear_cell.
+        """
+        i = coord[0] * self.n + coord[1]
+        empty, slots = self.empty_cells, self.empty_slots
+        last = empty.pop()
+        if last != i:
+            slot = slots[i]
+            empty[slot] = last
+            slots[last] = slot
+        self.centroid_sums[0] += coord[0]
+        self.centroid_sums[1] += coord[1]
+
+    def _clear_cell(self, coord):
+        """
+        Record that the cell at coord is empty again. It goes back into the
+        slot it last had if that still exists (moving that slot's cell to the
+        end), so undoing a move normally leaves empty_cells as it was before.
+        """
+        i = coord[0] * self.n + coord[1]
+        empty, slots = self.empty_cells, self.empty_slots
+        slot = slots[i]
+        if slot < len(empty):
+            slots[empty[slot]] = len(empty)
+            empty.append(empty[slot])
+            empty[slot] = i
+        else:
+            slots[i] = len(empty)
+            empty.append(i)
+        self.centroid_sums[0] -= coord[0]
+        self.centroid_sums[1] -= coord[1]
+
     def digest(self):
         """
         Digest of the board state (to help with counting repeated states).
@@ -97,17 +213,62 @@ class Board:
         with a swap between player token types.
         """
         self.turns_taken += 1
-        swap_player_tokens = vectorize(lambda t: _SWAP_PLAYER[t])
-        self._data = swap_player_tokens(self._data.transpose())
-        
-        # update hex degrees and occupied hexes - inefficient but should only happen once :)
-        for i in range(self.n):
-            for j in range(self.n):
-                 if self._data[i][j] != 0:
-                     self.occupied_hexes.add((i,j))
-                     self.occupied_hexes.discard((j, i))
-                     self.change_neighbour_degrees((i,j), 1)
-                     self.change_neighbour_degrees((j,i), -1)
+        self._data = _SWAP_TOKENS[self._data.transpose()]
+
+        # the hex grid is symmetric under the transpose, so degrees just move with their cells
+        self.hex_degrees = self.hex_degrees.transpose().copy()
+        self.occupied_hexes = {(q, r) for r, q in self.occupied_hexes}
+
+        # the swapped position is the old one's SWAP image, and its images the old ones
+        images = self.image_hashes
+        self.hash, self.image_hashes = images[1], [images[2], self.hash, images[0]]
+
+        # transpose the empty cell index too, so a second swap restores it exactly
+        n = self.n
+        transposed = [(i % n) * n + i // n for i in range(n * n)]
+        self.empty_cells = [transposed[i] for i in self.empty_cells]
+        self.empty_slots = [self.empty_slots[i] for i in transposed]
+        self.centroid_sums = self.centroid_sums[::-1]
+
+        # new structures rather than rebuilding the old ones, which _restore may want back
+        self.paths = PathDistances(self.topology, [int(t) for t in self._data.flat])
+        self.connectivity = Connectivity(self.topology, self.paths.cells)
+        self.vcs = VirtualConnections(self.topology, self.paths.cells)
+
+    def _saved(self):
+        """
+        Everything swap replaces, for _restore to put back.
+        """
+        return (self._data, self.hex_degrees, self.occupied_hexes, self.hash, self.image_hashes,
+            self.empty_cells, self.empty_slots, self.centroid_sums,
+            self.paths, self.connectivity, self.vcs)
+
+    def _restore(self, saved):
+        (self._data, self.hex_degrees, self.occupied_hexes, self.hash, self.image_hashes,
+            self.empty_cells, self.empty_slots, self.centroid_sums,
+            self.paths, self.connectivity, self.vcs) = saved
+
+    def load_cells(self, cells, turns_taken):
+        """
+        Set up the position from a flat list of tokens (r * n + q order)
+        and a turn count, as is - no captures are applied.
+        """
+        n = self.n
+        self.turns_taken = turns_taken
+        self._data = array(cells, dtype=int).reshape((n, n))
+        self.hex_degrees = zeros((n, n), dtype=int)
+        self.occupied_hexes = set()
+        for i, token in enumerate(cells):
+            if token:
+                self.occupied_hexes.add((i // n, i % n))
+                self.change_neighbour_degrees((i // n, i % n), 1)
+
+        self._index_cells()
+        self._rehash()
+        self.paths.rebuild([int(t) for t in cells])
+        self.connectivity.rebuild(self.paths.cells)
+        self.vcs.rebuild(self.paths.cells)
+        self.undo_stack.clear()
 
     def change_neighbour_degrees(self, coord: tuple, amount: int):
         for neighbour in self._coord_neighbours(coord):
@@ -121,9 +282,19 @@ class Board:
         """
         self.turns_taken += 1
         self[coord] = token
+        self._toggle_hash(_TOKEN_MAP_IN[token], coord[0] * self.n + coord[1], self.topology.zobrist_turn)
         self.occupied_hexes.add(coord)
+        self._fill_cell(coord)
         self.change_neighbour_degrees((coord), 1)
-        return self._apply_captures(coord)
+        captured = self._apply_captures(coord)
+
+        n = self.n
+        i, token = coord[0] * n + coord[1], _TOKEN_MAP_IN[token]
+        capturedCells = [r * n + q for r, q in captured] if captured else ()
+        self.paths.place(i, token, capturedCells)
+        self.connectivity.place(i, token, capturedCells)
+        self.vcs.place(i, token, capturedCells)
+        return captured
 
     def connected_coords(self, start_coord):
         """
@@ -148,6 +319,22 @@ class Board:
 
         return list(reachable)
 
+    def empty_hexes(self):
+        """
+        Returns the empty coordinates on the board (in no particular order).
+        """
+        coords = self.topology.coords
+        return [coords[i] for i in self.empty_cells]
+
+    def centroid(self):
+        """
+        Mean (r, q) of the occupied hexes, or (0, 0) on an empty board.
+        """
+        count = len(self.occupied_hexes)
+        if count == 0:
+            return (0, 0)
+        return (self.centroid_sums[0] / count, self.centroid_sums[1] / count)
+
     def inside_bounds(self, coord):
         """
         True iff coord inside board bounds.
@@ -170,21 +357,21 @@ class Board:
         mid_type = _SWAP_PLAYER[opp_type]
         captured = set()
 
-        # Check each capture pattern intersecting with coord
-        for pattern in _CAPTURE_PATTERNS:
-            coords = [_ADD(coord, s) for s in pattern]
-            # No point checking if any coord is outside the board!
-            if all(map(self.inside_bounds, coords)):
-                tokens = [self._data[coord] for coord in coords]
-                if tokens == [opp_type, mid_type, mid_type]:
-                    # Capturing has to be deferred in case of overlaps
-                    # Both mid cell tokens should be captured
-                    captured.update(coords[1:])
+        # Check each (in-bounds) capture pattern intersecting with coord
+        for coords in self.topology.coord_captures[coord[0] * self.n + coord[1]]:
+            opp, mid1, mid2 = coords
+            if self._data[mid1] == mid_type and self._data[mid2] == mid_type \
+                    and self._data[opp] == opp_type:
+                # Capturing has to be deferred in case of overlaps
+                # Both mid cell tokens should be captured
+                captured.update(coords[1:])
 
         # Remove any captured tokens
         for coord in captured:
             self[coord] = None
+            self._toggle_hash(mid_type, coord[0] * self.n + coord[1])
             self.occupied_hexes.discard(coord)
+            self._clear_cell(coord)
             self.change_neighbour_degrees(coord, -1)
 
         return list(captured)
@@ -193,44 +380,83 @@ class Board:
         """
         Returns (within-bounds) neighbouring coordinates for given coord.
         """
-        return [_ADD(coord, step) for step in _HEX_STEPS \
-            if self.inside_bounds(_ADD(coord, step))]
+        return self.topology.coord_neighbours[coord[0] * self.n + coord[1]]
 
     def handle_action(self, action, player):
-        captured = None
-
-        actionType, *args = action
+        """
+        Apply an action for player and record it on the undo stack. Returns
+        the move's header (see undoStack), to hand back to undo_move.
+        """
+        actionType = action[0]
+        stack = self.undo_stack
         if actionType == "STEAL":
             # Apply STEAL action
+            saved = self._saved()
             self.swap()
-            return "STEAL"
+            return stack.push_steal(saved)
 
         elif actionType == "PLACE":
+            images = self.image_hashes
+            stack.push(self.hash)
+            stack.push(images[0])
+            stack.push(images[1])
+            stack.push(images[2])
 
-            coord = tuple(args)
+            coord = action[1:]
             captured = self.place(player, coord)
-            return (player, coord, captured)
+            n = self.n
+            for r, q in captured:
+                stack.push(r * n + q)
+            header = pack(coord[0] * n + coord[1], len(captured), _TOKEN_MAP_IN[player])
+            stack.push(header)
+            return header
 
     def undo_move(self, move):
-        
-        if move == None:
+        """
+        Take back the most recent move made with handle_action (move is its
+        header, and ValueError is raised if it isn't that move's; None, for
+        an action that wasn't made, is ignored).
+        """
+        if move is None:
             return
-        elif move == "STEAL":
-            self.swap()
+        stack = self.undo_stack
+        i, count, player = unpack(stack.pop_header(move))
+        if player == STEAL:
+            self._restore(stack.pop_steal())
             # cancel out turn count increase
             self.turns_taken -= 1
-        else:
-            # undo placement
-            self._data[move[1][0], move[1][1]] = 0
-            self.occupied_hexes.discard((move[1][0], move[1][1]))
-            self.change_neighbour_degrees((move[1][0], move[1][1]), -1)
-            
-            # undo captures
-            opponent = _SWAP_PLAYER[_TOKEN_MAP_IN[move[0]]]
-            for captured in move[2]:
-                self._data[captured[0]][captured[1]] = opponent
-                self.occupied_hexes.add((captured[0], captured[1]))
-                self.change_neighbour_degrees((captured[0], captured[1]), 1)
+            return
+
+        n, data, degrees = self.n, self._data, self.hex_degrees
+        neighbours = self.topology.coord_neighbours
+
+        # undo captures (in reverse, so the empty cell slots unwind exactly)
+        opponent = _SWAP_PLAYER[player]
+        captured = [stack.pop() for _ in range(count)] if count else ()
+        for j in captured:
+            coord = divmod(j, n)
+            data[coord] = opponent
+            self.occupied_hexes.add(coord)
+            self._fill_cell(coord)
+            for r, q in neighbours[j]:
+                degrees[r, q] += 1
+
+        # undo placement, and put back the hashes from before the move
+        coord = divmod(i, n)
+        data[coord] = 0
+        self.occupied_hexes.discard(coord)
+        self._clear_cell(coord)
+        for r, q in neighbours[i]:
+            degrees[r, q] -= 1
+        images = self.image_hashes
+        images[2] = stack.pop()
+        images[1] = stack.pop()
+        images[0] = stack.pop()
+        self.hash = stack.pop()
+
+        self.paths.undo(i, captured)
+        self.connectivity.undo(i, captured)
+        self.vcs.undo(i, captured)
 
         # decrement turn count
         self.turns_taken -= 1
@@ -0,0 +1,518 @@
+"""
+Provide an alternative Cachex board engine which stores the red and blue
+tokens as two arbitrary-precision integer bitboards. Bit (r * n + q) of a
+colour's bitboard is set iff that colour occupies cell (r, q).
+
+Neighbour masks and diamond capture masks are pre-computed once per board
+size, so placing a token, applying captures, undoing a move and flood
+filling a connected group are a handful of integer operations rather than
+per-cell NumPy indexing.
+
+The public API mirrors basicBoard.Board (handle_action, undo_move,
+connected_coords, ...) so either engine can be handed to the search helpers.
+"""
+
+from functools import lru_cache
+from irrationalAgents.topology import get_topology
+from irrationalAgents.helpers.pathDistances import PathDistances
+from irrationalAgents.connectivity import Connectivity
+from irrationalAgents.virtualConnections import VirtualConnections
+from irrationalAgents.symmetry import image_hashes, image_zobrist
+from irrationalAgents.undoStack import STEAL, UndoStack, pack, unpack
+from irrationalAgents.basicBoard import _TOKEN_MAP_IN, _TOKEN_MAP_OUT, _SWAP_PLAYER
+
+
+class _BitTables:
+    """
+    Masks and lookup tables for a board of size n, derived from the shared
+    Topology. These only depend on n, so they are built once and shared
+    between every BitBoard of that size.
+    """
+    def __init__(self, n):
+        topology = get_topology(n)
+        self.n = n
+        self.coords = topology.coords
+        self.neighbours = topology.neighbours
+        self.bits = [1 << i for i in range(n * n)]
+        self.full = (1 << (n * n)) - 1
+
+        # Masks used to stop shifted bits wrapping around to the next row
+        first_col = sum(1 << i for i in topology.blue_start)
+        last_col = sum(1 << i for i in topology.blue_end)
+        self.not_first_col = self.full & ~first_col
+        self.not_last_col = self.full & ~last_col
+
+        # Edge masks, following the r (red) and q (blue) axes
+        self.red_start = sum(1 << i for i in topology.red_start)
+        self.red_end = sum(1 << i for i in topology.red_end)
+        self.blue_start = first_col
+        self.blue_end = last_col
+
+        self.neighbour_masks = [sum(1 << i for i in adjacent)
+            for adjacent in topology.neighbours]
+
+        # Each capture is (opposite cell bit, mask of both middle cells,
+        # first middle cell index, second middle cell index)
+        self.captures = [[(1 << opp, (1 << mid1) | (1 << mid2), mid1, mid2)
+            for opp, mid1, mid2 in patterns] for patterns in topology.captures]
+
+    def grow(self, bits):
+        """
+        Returns bits together with every cell adjacent to a set bit.
+        """
+        n = self.n
+        return (bits | (bits << n) | (bits >> n)
+            | ((bits << 1) & self.not_first_col)
+            | ((bits >> 1) & self.not_last_col)
+            | ((bits << (n - 1)) & self.not_last_col)
+            | ((bits >> (n - 1)) & self.not_first_col)) & self.full
+
+
+@lru_cache(maxsize=None)
+def _tables(n):
+    return _BitTables(n)
+
+
+def _iter_bits(bits):
+    """
+    Yield the indices of set bits, lowest first (row-major cell order).
+    """
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
+
+
+class _BitRow:
+    """
+    Read-only view of one board row, so `board._data[r][q]` keeps working.
+    """
+    def __init__(self, board, r):
+        self._board = board
+        self._offset = r * board.n
+
+    def __getitem__(self, q):
+        return self._board._token_at(self._offset + q)
+
+    def __len__(self):
+        return self._board.n
+
+
+class _BitData:
+    """
+    Read-only stand-in for basicBoard.Board._data. Supports `[r][q]`,
+    `[(r, q)]` and `len()`, which is everything the helpers rely on.
+    """
+    def __init__(self, board):
+        self._board = board
+
+    def __getitem__(self, key):
+        if isinstance(key, tuple):
+            return self._board._token_at(key[0] * self._board.n + key[1])
+        return _BitRow(self._board, key)
+
+    def __len__(self):
+        return self._board.n
+
+
+class BitBoard:
+    def __init__(self, n):
+        """
+        Initialise board of given size n.
+        """
+        self.n = n
+        self.topology = get_topology(n)
+        self._tables = _tables(n)
+
+        # bitboards for each token type (index 0 is never set)
+        self._bits = [0, 0, 0]
+        self._data = _BitData(self)
+
+        # set start and end edges for the colours
+        self.blue_start = [(i, 0) for i in range(n)]
+        self.blue_end = [(i, n-1) for i in range(n)]
+        self.red_start = [(j, i) for (i, j) in self.blue_start]
+        self.red_end = [(j, i) for (i, j) in self.blue_end]
+
+        # initialise number of turns taken.
+        self.turns_taken = 0
+
+        # hex degrees as plain lists, indexed [r][q] like the NumPy version
+        self.hex_degrees = [[0] * n for _ in range(n)]
+
+        #initialise set of occupied hexes
+        self.occupied_hexes = set()
+        # running sums of the r and q coordinates of occupied hexes
+        # (the empty cells are just the complement of both bitboards)
+        self.centroid_sums = [0, 0]
+        # process_time at which an in-progress search must stop (None = no limit)
+        self.deadline = None
+        # helpers.searchStats.SearchStats filled in by minimax (None = not collected)
+        self.stats = None
+        # helpers.evalCache.EvalCache of leaf scores used by evaluate (None = not cached)
+        self.evalCache = None
+
+        # Zobrist hash of the position, and of its images under the board's
+        # symmetries (see symmetry.py), kept up to date by place/undo_move/swap
+        self.image_keys = image_zobrist(n)
+        self._rehash()
+
+        # shortest path distance maps for both colours, repaired on every change
+        self.paths = PathDistances(self.topology, self._cells())
+
+        # groups of connected stones, for win checks after every move
+        self.connectivity = Connectivity(self.topology, self.paths.cells)
+
+        # bridges and edge templates of both colours, for distance estimates
+        self.vcs = VirtualConnections(self.topology, self.paths.cells)
+
+        # moves made with handle_action, for undo_move
+        self.undo_stack = UndoStack(n * n)
+
+    def _token_at(self, i):
+        """
+        Internal token type (0, 1 or 2) at flat cell index i.
+        """
+        bit = self._tables.bits[i]
+        if self._bits[1] & bit:
+            return 1
+        if self._bits[2] & bit:
+            return 2
+        return 0
+
+    def __getitem__(self, coord):
+        """
+        Get the token at given board coord (r, q).
+        """
+        return _TOKEN_MAP_OUT[self._token_at(coord[0] * self.n + coord[1])]
+
+    def __setitem__(self, coord, token):
+        """
+        Set the token at given board coord (r, q).
+        """
+        bit = self._tables.bits[coord[0] * self.n + coord[1]]
+        self._bits[1] &= ~bit
+        self._bits[2] &= ~bit
+        if token is not None:
+            self._bits[_TOKEN_MAP_IN[token]] |= bit
+
+    def _compute_hash(self):
+        """
+        Zobrist hash of the current position, computed from scratch.
+        """
+        return self.topology.hash_cells(self._occupied_cells(), self.turns_taken)
+
+    def _occupied_cells(self):
+        return [(i, token) for token in (1, 2) for i in _iter_bits(self._bits[token])]
+
+    def _rehash(self):
+        """
+        Compute the hash and the image hashes from scratch.
+        """
+        cells = self._occupied_cells()
+        self.hash = self.topology.hash_cells(cells, self.turns_taken)
+        self.image_hashes = image_hashes(self.topology, cells, self.turns_taken)
+
+    def _toggle_hash(self, token, i, turn = 0):
+        """
+        Toggle a token (internal type) at flat index i in the hash and the
+        image hashes, along with turn (0, or zobrist_turn to pass the move).
+        """
+        self.hash ^= self.topology.zobrist[token][i] ^ turn
+        rotated, swapped, both = self.image_keys[token][i]
+        images = self.image_hashes
+        images[0] ^= rotated ^ turn
+        images[1] ^= swapped ^ turn
+        images[2] ^= both ^ turn
+
+    def _cells(self):
+        """
+        Flat list of internal token types, one per cell.
+        """
+        return [self._token_at(i) for i in range(self.n * self.n)]
+
+    def digest(self):
+        """
+        Digest of the board state (to help with counting repeated states).
+        """
+        size = (self.n * self.n + 7) // 8
+        return self._bits[1].to_bytes(size, "little") + \
+            self._bits[2].to_bytes(size, "little")
+
+    def swap(self):
+        """
+        Swap player positions by mirroring the state along the major
+        board axis, i.e. transpose every token and swap its colour.
+        """
+        self.turns_taken += 1
+        n = self.n
+        coords = self._tables.coords
+        swapped = [0, 0, 0]
+        for token in (1, 2):
+            for i in _iter_bits(self._bits[token]):
+                r, q = coords[i]
+                swapped[_SWAP_PLAYER[token]] |= 1 << (q * n + r)
+        self._bits = swapped
+
+        # the hex grid is symmetric under the transpose, so degrees just move with their cells
+        self.hex_degrees = [list(column) for column in zip(*self.hex_degrees)]
+        self.occupied_hexes = {(q, r) for r, q in self.occupied_hexes}
+        # transposing swaps the r and q sums
+        self.centroid_sums = self.centroid_sums[::-1]
+
+        # the swapped position is the old one's SWAP image, and its images the old ones
+        images = self.image_hashes
+        self.hash, self.image_hashes = images[1], [images[2], self.hash, images[0]]
+
+        # new structures rather than rebuilding the old ones, which _restore may want back
+        self.paths = PathDistances(self.topology, self._cells())
+        self.connectivity = Connectivity(self.topology, self.paths.cells)
+        self.vcs = VirtualConnections(self.topology, self.paths.cells)
+
+    def _saved(self):
+        """
+        Everything swap replaces, for _restore to put back.
+        """
+        return (self._bits, self.hex_degrees, self.occupied_hexes, self.centroid_sums,
+            self.hash, self.image_hashes, self.paths, self.connectivity, self.vcs)
+
+    def _restore(self, saved):
+        (self._bits, self.hex_degrees, self.occupied_hexes, self.centroid_sums,
+            self.hash, self.image_hashes, self.paths, self.connectivity, self.vcs) = saved
+
+    def load_cells(self, cells, turns_taken):
+        """
+        Set up the position from a flat list of tokens (r * n + q order)
+        and a turn count, as is - no captures are applied.
+        """
+        n, coords = self.n, self._tables.coords
+        self.turns_taken = turns_taken
+        self._bits = [0, 0, 0]
+        for i, token in enumerate(cells):
+            if token:
+                self._bits[token] |= self._tables.bits[i]
+
+        self.hex_degrees = [[0] * n for _ in range(n)]
+        self.occupied_hexes = set()
+        self.centroid_sums = [0, 0]
+        for i in _iter_bits(self._bits[1] | self._bits[2]):
+            self.occupied_hexes.add(coords[i])
+            self._move_centroid(coords[i], 1)
+            self._change_neighbour_degrees(i, 1)
+
+        self._rehash()
+        self.paths.rebuild(self._cells())
+        self.connectivity.rebuild(self.paths.cells)
+        self.vcs.rebuild(self.paths.cells)
+        self.undo_stack.clear()
+
+    def _change_neighbour_degrees(self, i, amount):
+        coords = self._tables.coords
+        for neighbour in self._tables.neighbours[i]:
+            r, q = coords[neighbour]
+            self.hex_degrees[r][q] += amount
+
+    def change_neighbour_degrees(self, coord: tuple, amount: int):
+        self._change_neighbour_degrees(coord[0] * self.n + coord[1], amount)
+
+    def place(self, token, coord):
+        """
+        Place a token on the board and apply captures if they exist.
+        Return coordinates of captured tokens.
+        """
+        self.turns_taken += 1
+        i = coord[0] * self.n + coord[1]
+        token = _TOKEN_MAP_IN[token]
+        self._bits[token] |= self._tables.bits[i]
+        self._toggle_hash(token, i, self.topology.zobrist_turn)
+        self.occupied_hexes.add(coord)
+        self._move_centroid(coord, 1)
+        self._change_neighbour_degrees(i, 1)
+        captured = self._apply_captures(i)
+
+        n = self.n
+        capturedCells = [r * n + q for r, q in captured] if captured else ()
+        self.paths.place(i, token, capturedCells)
+        self.connectivity.place(i, token, capturedCells)
+        self.vcs.place(i, token, capturedCells)
+        return captured
+
+    def _move_centroid(self, coord, amount):
+        self.centroid_sums[0] += amount * coord[0]
+        self.centroid_sums[1] += amount * coord[1]
+
+    def connected_coords(self, start_coord):
+        """
+        Find connected coordinates from start_coord. This uses the token
+        value of the start_coord cell to determine which other cells are
+        connected (e.g., all will be the same value).
+        """
+        tables = self._tables
+        token_type = self._token_at(start_coord[0] * self.n + start_coord[1])
+        if token_type == 0:
+            mask = tables.full & ~(self._bits[1] | self._bits[2])
+        else:
+            mask = self._bits[token_type]
+
+        # flood fill the whole frontier at once until it stops growing
+        reachable = tables.bits[start_coord[0] * self.n + start_coord[1]]
+        while True:
+            grown = tables.grow(reachable) & mask
+            if grown == reachable:
+                break
+            reachable = grown
+
+        return [tables.coords[i] for i in _iter_bits(reachable)]
+
+    def empty_hexes(self):
+        """
+        Returns the empty coordinates on the board in row-major order.
+        """
+        empty = self._tables.full & ~(self._bits[1] | self._bits[2])
+        coords = self._tables.coords
+        return [coords[i] for i in _iter_bits(empty)]
+
+    def centroid(self):
+        """
+        Mean (r, q) of the occupied hexes, or (0, 0) on an empty board.
+        """
+        count = len(self.occupied_hexes)
+        if count == 0:
+            return (0, 0)
+        return (self.centroid_sums[0] / count, self.centroid_sums[1] / count)
+
+    def inside_bounds(self, coord):
+        """
+        True iff coord inside board bounds.
+        """
+        r, q = coord
+        return r >= 0 and r < self.n and q >= 0 and q < self.n
+
+    def is_occupied(self, coord):
+        """
+        True iff coord is occupied by a token (e.g., not None).
+        """
+        return self[coord] != None
+
+    def _apply_captures(self, i):
+        """
+        Check flat cell index i for diamond captures, and apply these to the
+        board if they exist. Returns the captured token coordinates.
+        """
+        tables = self._tables
+        opp_type = self._token_at(i)
+        mid_type = _SWAP_PLAYER[opp_type]
+        ours, theirs = self._bits[opp_type], self._bits[mid_type]
+
+        # Every diamond through i has both middle cells adjacent to i
+        if not theirs & tables.neighbour_masks[i]:
+            return ()
+
+        captured = 0
+        for opp_bit, mid_mask, _, _ in tables.captures[i]:
+            if ours & opp_bit and theirs & mid_mask == mid_mask:
+                # Capturing has to be deferred in case of overlaps
+                captured |= mid_mask
+
+        if not captured:
+            return ()
+
+        # Remove any captured tokens
+        self._bits[mid_type] &= ~captured
+        result = []
+        for j in _iter_bits(captured):
+            coord = tables.coords[j]
+            self._toggle_hash(mid_type, j)
+            self.occupied_hexes.discard(coord)
+            self._move_centroid(coord, -1)
+            self._change_neighbour_degrees(j, -1)
+            result.append(coord)
+
+        return result
+
+    def _coord_neighbours(self, coord):
+        """
+        Returns (within-bounds) neighbouring coordinates for given coord.
+        """
+        return self.topology.coord_neighbours[coord[0] * self.n + coord[1]]
+
+    def handle_action(self, action, player):
+        """
+        Apply an action for player and record it on the undo stack. Returns
+        the move's header (see undoStack), to hand back to undo_move.
+        """
+        actionType = action[0]
+        stack = self.undo_stack
+        if actionType == "STEAL":
+            # Apply STEAL action
+            saved = self._saved()
+            self.swap()
+            return stack.push_steal(saved)
+
+        elif actionType == "PLACE":
+            images = self.image_hashes
+            stack.push(self.hash)
+            stack.push(images[0])
+            stack.push(images[1])
+            stack.push(images[2])
+
+            coord = action[1:]
+            captured = self.place(player, coord)
+            n = self.n
+            for r, q in captured:
+                stack.push(r * n + q)
+            header = pack(coord[0] * n + coord[1], len(captured), _TOKEN_MAP_IN[player])
+            stack.push(header)
+            return header
+
+    def undo_move(self, move):
+        """
+        Take back the most recent move made with handle_action (move is its
+        header, and ValueError is raised if it isn't that move's; None, for
+        an action that wasn't made, is ignored).
+        """
+        if move is None:
+            return
+        stack = self.undo_stack
+        i, count, token = unpack(stack.pop_header(move))
+        if token == STEAL:
+            self._restore(stack.pop_steal())
+            # cancel out turn count increase
+            self.turns_taken -= 1
+            return
+
+        tables, degrees = self._tables, self.hex_degrees
+        coords, neighbours = tables.coords, tables.neighbours
+
+        # undo captures
+        opponent = _SWAP_PLAYER[token]
+        captured = [stack.pop() for _ in range(count)] if count else ()
+        for j in captured:
+            coord = coords[j]
+            self._bits[opponent] |= tables.bits[j]
+            self.occupied_hexes.add(coord)
+            self._move_centroid(coord, 1)
+            for k in neighbours[j]:
+                r, q = coords[k]
+                degrees[r][q] += 1
+
+        # undo placement, and put back the hashes from before the move
+        coord = coords[i]
+        self._bits[token] &= ~tables.bits[i]
+        self.occupied_hexes.discard(coord)
+        self._move_centroid(coord, -1)
+        for k in neighbours[i]:
+            r, q = coords[k]
+            degrees[r][q] -= 1
+        images = self.image_hashes
+        images[2] = stack.pop()
+        images[1] = stack.pop()
+        images[0] = stack.pop()
+        self.hash = stack.pop()
+
+        self.paths.undo(i, captured)
+        self.connectivity.undo(i, captured)
+        self.vcs.undo(i, captured)
+
+        # decrement turn count
+        self.turns_taken -= 1
@@ -0,0 +1,164 @@
+"""
+Provide incremental win detection for a Cachex board: a union-find over
+the cells plus four virtual nodes, one for each edge a colour must connect.
+A stone on one of its colour's edges is joined to that edge's node, so a
+colour has won as soon as its two edge nodes share a root.
+
+Unions are ranked by size but never path-compressed, so a find is
+O(log n) and each union can be rolled back by undo. A capture splits groups,
+which a union-find cannot do, so a move with captures saves the structure and
+rebuilds it instead (rare, and undone by restoring the saved copy).
+"""
+
+from functools import lru_cache
+from irrationalAgents.topology import get_topology
+
+
+@lru_cache(maxsize=None)
+def _edge_nodes(n):
+    """
+    For token 1 (red) and 2 (blue), the virtual edge nodes each cell touches,
+    as edges[token][cell]. Node size + 2 * (token - 1) is the start edge and
+    the node after it the end edge.
+    """
+    topology = get_topology(n)
+    size = topology.size
+    edges = [None, [()] * size, [()] * size]
+    for token, start, end in ((1, topology.red_start, topology.red_end),
+            (2, topology.blue_start, topology.blue_end)):
+        node = size + 2 * (token - 1)
+        for i in start:
+            edges[token][i] += (node,)
+        for i in end:
+            edges[token][i] += (node + 1,)
+    return edges
+
+
+class Connectivity:
+    def __init__(self, topology, cells = None):
+        """
+        Connectivity of the stones in cells (flat list of tokens 0, 1, 2;
+        empty board if None) on a board with the given topology.
+        """
+        self.topology = topology
+        self.neighbours = topology.neighbours
+        self.edges = _edge_nodes(topology.n)
+        self.size = topology.size
+        self.cells = [0] * self.size
+        self.parent = list(range(self.size + 4))
+        self.weight = [1] * (self.size + 4)
+
+        # roots that were attached by each union (undo detaches them in reverse),
+        # the journal length before each move, and the structure from before
+        # each move that captured
+        self.journal = []
+        self.frames = []
+        self.saved = []
+
+        if cells is not None:
+            self.rebuild(cells)
+
+    def find(self, i):
+        """
+        Root of the group containing node i.
+        """
+        parent = self.parent
+        while parent[i] != i:
+            i = parent[i]
+        return i
+
+    def _union(self, a, b):
+        a, b = self.find(a), self.find(b)
+        if a == b:
+            return
+        if self.weight[a] < self.weight[b]:
+            a, b = b, a
+        self.parent[b] = a
+        self.weight[a] += self.weight[b]
+        self.journal.append(b)
+
+    def _join(self, i, token):
+        """
+        Union the stone at i with its edge nodes and same-coloured neighbours.
+        """
+        cells = self.cells
+        for node in self.edges[token][i]:
+            self._union(i, node)
+        for j in self.neighbours[i]:
+            if cells[j] == token:
+                self._union(i, j)
+
+    def place(self, i, token, captured = ()):
+        """
+        Record a stone of `token` placed at flat index i, which captured the
+        stones at the flat indices in captured.
+        """
+        if not captured:
+            self.frames.append(len(self.journal))
+            self.cells[i] = token
+            self._join(i, token)
+            return
+
+        self.frames.append(len(self.journal))
+        self.saved.append((self.parent[:], self.weight[:], self.cells[:]))
+        cells = self.cells[:]
+        cells[i] = token
+        for j in captured:
+            cells[j] = 0
+        self._reset(cells)
+
+    def undo(self, i, captured = ()):
+        """
+        Roll back the most recent place, of a stone at flat index i that
+        captured the stones at the flat indices in captured.
+        """
+        if not self.frames:
+            # the move was made before a rebuild (e.g. undoing past a swap)
+            cells = self.cells[:]
+            for j in captured:
+                cells[j] = 3 - cells[i]
+            cells[i] = 0
+            self.rebuild(cells)
+            return
+
+        mark = self.frames.pop()
+        journal, parent, weight = self.journal, self.parent, self.weight
+        if captured:
+            parent[:], weight[:], self.cells[:] = self.saved.pop()
+            del journal[mark:]
+            return
+
+        while len(journal) > mark:
+            b = journal.pop()
+            a = parent[b]
+            weight[a] -= weight[b]
+            parent[b] = b
+        self.cells[i] = 0
+
+    def _reset(self, cells):
+        """
+        Start the structure again from cells, keeping the journal and frames.
+        """
+        self.cells[:] = cells
+        self.parent[:] = range(self.size + 4)
+        self.weight[:] = [1] * (self.size + 4)
+        for i, token in enumerate(cells):
+            if token:
+                self._join(i, token)
+
+    def rebuild(self, cells):
+        """
+        Start again from a new set of cell tokens (e.g. after a swap),
+        forgetting any moves that could have been undone.
+        """
+        self._reset(cells)
+        self.journal = []
+        self.frames = []
+        self.saved = []
+
+    def connected(self, token):
+        """
+        True iff token (1 red, 2 blue) has a group joining both its edges.
+        """
+        node = self.size + 2 * (token - 1)
+        return self.find(node) == self.find(node + 1)
@@ -1,4 +1,76 @@
-DEPTH1 = 81
-DEPTH2 = 30
-DEPTH3 = 15
-DEPTH4 = 5
\ No newline at end of file
+import numpy
+
+# CPU seconds the referee allows each player for the whole game (its -t), or
+# None for the n * n seconds of the project rules, and the fraction of it
+# helpers.timeManager.TimeManager keeps back and never hands out
+TIME_LIMIT = None
+TIME_RESERVE = 0.05
+
+# Fewest moves the time manager expects us to still have to make (captures can
+# empty cells again), and how far it extends a move's budget (TIME_EXTENSION
+# times) when the score swings by TIME_SWING or more between iterations
+TIME_MIN_MOVES = 4
+TIME_EXTENSION = 3.0
+TIME_SWING = 3.0
+
+# Transposition table slots and replacement policy ("depth" or "always")
+TT_SIZE = 2 ** 16
+TT_REPLACEMENT = "depth"
+
+# Evaluation weights for helpers.features.FEATURES: pieceAdvantage,
+# avgDistanceFromCentre, opponentEdge, triangle_structures, islandCount.
+# Only pieceAdvantage counts, as it always has; the others stay at 0 until a
+# tuning run or match shows what they are worth
+FEATURE_WEIGHTS = numpy.array([1, 0, 0, 0, 0])
+
+# Megabytes of evaluation scores kept by helpers.evalCache.EvalCache (0 = no cache),
+# well inside the referee's space limit (100 MB with a bare -s)
+EVAL_CACHE_MB = 16
+
+# Share transposition table entries between a position and its 180 degree rotation
+SYMMETRIC_TT = True
+
+# Search used by helpers.deepening ("pvs" for helpers.pvs, or "minimax"), and the
+# half-width of the aspiration window pvs starts each iteration with
+SEARCH_ALGORITHM = "pvs"
+ASPIRATION_WINDOW = 4.0
+
+# Score the last ply of minimax with one batched evaluation per node
+BATCH_LEAF_EVAL = True
+
+# Play the first turns from helpers.openingBook when the position is in the book
+OPENING_BOOK = True
+
+# Solve positions exactly (helpers.endgame) once this few cells are empty,
+# spending at most ENDGAME_SHARE of the time left in the game on each try and
+# of the game's time limit on all of them (tries that time out add up),
+# and the megabytes of solved positions kept (the oldest are dropped first)
+ENDGAME_EMPTY = 12
+ENDGAME_SHARE = 0.25
+ENDGAME_CACHE_MB = 4
+
+# Measure the evaluation's path distances over bridges and edge templates (see
+# virtualConnections). Deferred: off until the distance is kept incrementally or
+# a match shows it pays, as it searches the board again at every leaf, for 2-3x
+# fewer nodes a second
+VC_DISTANCE = False
+
+# Don't search moves into the carriers of the mover's own bridges and edge templates
+# below the root, unless they win, capture, shorten its path over them or could
+# block the opponent. Off: the cut is heuristic and can change the search's result
+VC_PRUNING = False
+
+# Collect helpers.searchStats.SearchStats during search and log one record per move
+SEARCH_STATS = False
+
+# Killer moves remembered per ply by helpers.moveOrdering.MoveOrdering
+KILLER_SLOTS = 2
+
+# Worker processes for helpers.parallel.ParallelSearch (None = one per CPU),
+# and how they split the work ("split" root moves, or "lazy" SMP)
+PARALLEL_WORKERS = None
+PARALLEL_MODE = "split"
+
+# UCT exploration constant and random playouts per tree iteration for helpers.mcts
+MCTS_EXPLORATION = 1.4
+MCTS_BATCH = 32
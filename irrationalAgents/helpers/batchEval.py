@@ -0,0 +1,131 @@
+import numpy as np
+from math import inf
+from irrationalAgents.constants import VC_DISTANCE
+from irrationalAgents.helpers.evalCache import child_keys
+from irrationalAgents.helpers.evaluation import combineEvalScores
+from irrationalAgents.helpers.features import get_feature_extractor
+from irrationalAgents.helpers.pathCost import INF, cellsPathCost, fillDistances
+
+
+def evaluateChildren(state, moves: list, curPlayer: int, ourPlayer: int) -> list:
+    '''
+    Scores every position one move (by curPlayer) away from state, for each
+    (x, y) in moves (e.g. from hexes_by_involvement), without playing them.
+    A child's score is what minimax would find for it at its depth limit:
+    +/-10000 w.r.t ourPlayer if the move wins, otherwise its evaluate score.
+    Moves that capture stones change more than one cell and are not scored
+    here - their entry is None, and the caller should play them out.
+
+    Path distances come from the parent's maps. A child changes one cell, so:
+    * curPlayer's best path either ignores the cell or runs through it for one
+      less than before (start cost + end cost - 2, both counting the cell).
+    * the opponent's distance only changes if the cell is on every one of its
+      shortest paths, which is the case iff it is the only shortest-path cell
+      entered at its path cost. Those few children get a fresh 0-1 BFS.
+    With VC_DISTANCE the scores use distances over bridges and edge templates
+    (state.vcs) the same way: curPlayer's path through the new stone can also
+    use the bridges it makes, and the opponent is searched again when the
+    cell is on all its shortest paths or carries a connection one of them uses.
+    Wins are still found with plain distances.
+    Features for all children are extracted in one call on a stack of boards.
+    Children whose score is in the board's evalCache skip all of that, and
+    the others are added to it.
+    '''
+    topology, cells = state.topology, state.paths.cells
+    n, opponent = state.n, 3 - curPlayer
+    indices = [x * n + y for x, y in moves]
+
+    # cost to each cell from both edges for curPlayer, which tells whether a move wins
+    fromStart = {c: state.paths.maps[c].dist for c in (1, 2)}
+    fromEnd = {curPlayer: fillDistances(topology, cells, curPlayer, reverse=True)}
+    ourDistance = state.paths.maps[curPlayer].distance()
+
+    # Moves that capture are left to the caller, and children whose score is
+    # in the evaluation cache only need checking for a win
+    captures = topology.captures
+    cache, stats, win = state.evalCache, state.stats, 10000 if curPlayer == ourPlayer else -10000
+    scored = [i for i in indices if not any(cells[opp] == curPlayer and cells[mid1] == opponent
+        and cells[mid2] == opponent for opp, mid1, mid2 in captures[i])]
+    scores, keys = dict(), []
+    if cache is not None:
+        missed = []
+        for i, key in zip(scored, child_keys(state, scored, curPlayer, ourPlayer)):
+            value = cache.lookup(key)
+            if value is None:
+                missed.append(i)
+                keys.append(key)
+            else:
+                start, end = fromStart[curPlayer][i], fromEnd[curPlayer][i]
+                scores[i] = win if start + end - 2 == 0 or ourDistance == 0 else value
+        if stats is not None:
+            stats.eval_hits += len(scored) - len(missed)
+            stats.eval_misses += len(missed)
+        scored = missed
+    if not scored:
+        return [scores.get(i) for i in indices]
+
+    # the opponent's costs, and curPlayer's virtual ones over bridges and edge templates
+    if VC_DISTANCE:
+        vcs = state.vcs
+        virtualStart, virtualEnd = vcs.fill(curPlayer), vcs.fill(curPlayer, reverse=True)
+        ourVirtual = vcs.distance(curPlayer, virtualStart)
+        fromStart[opponent] = vcs.fill(opponent)
+        fromEnd[opponent] = vcs.fill(opponent, reverse=True)
+        theirDistance = vcs.distance(opponent, fromStart[opponent])
+    else:
+        fromEnd[opponent] = fillDistances(topology, cells, opponent, reverse=True)
+        theirDistance = state.paths.maps[opponent].distance()
+
+    # Cells on some shortest path of the opponent, grouped by the path cost at
+    # which they are entered. Every shortest path enters exactly one of them at
+    # each cost, so a level with a single cell can't be avoided.
+    levels = {}
+    if theirDistance != inf:
+        start, end = fromStart[opponent], fromEnd[opponent]
+        for i in indices:
+            if start[i] + end[i] - 1 == theirDistance:
+                levels[start[i]] = levels.get(start[i], 0) + 1
+
+    ourDistances, ourScoring, theirDistances = [], [], []
+    for i in scored:
+        start, end = fromStart[curPlayer][i], fromEnd[curPlayer][i]
+        through = start + end - 2 if start < INF and end < INF else inf
+        ourDistances.append(min(through, ourDistance))
+        if VC_DISTANCE:
+            through = vcs.through(i, curPlayer, virtualStart, virtualEnd)
+            ourScoring.append(min(through if through < INF else inf, ourVirtual))
+
+        start = fromStart[opponent][i]
+        unavoidable = theirDistance != inf and start + fromEnd[opponent][i] - 1 == theirDistance \
+            and levels[start] == 1
+        if VC_DISTANCE and (unavoidable or theirDistance != inf and
+                vcs.carries_shortest(i, opponent, fromStart[opponent], fromEnd[opponent], theirDistance)):
+            vcs.place(i, curPlayer)
+            theirDistances.append(vcs.distance(opponent))
+            vcs.undo(i)
+        elif unavoidable:
+            cells[i] = curPlayer
+            theirDistances.append(cellsPathCost(topology, cells, opponent))
+            cells[i] = 0
+        else:
+            theirDistances.append(theirDistance)
+
+    ourScores = np.array(ourScoring if VC_DISTANCE else ourDistances, dtype=float)
+    theirDistances = np.array(theirDistances, dtype=float)
+    with np.errstate(invalid="ignore"):
+        dijkstraScores = theirDistances - ourScores if curPlayer == ourPlayer \
+            else ourScores - theirDistances
+
+    children = np.repeat(np.asarray(cells)[None, :], len(scored), axis=0)
+    children[np.arange(len(scored)), scored] = curPlayer
+    features = get_feature_extractor(n).extract(children, ourPlayer)
+    values = combineEvalScores(dijkstraScores, features)
+
+    # a distance of 0 means the move completed a path
+    for i, distance, value in zip(scored, ourDistances, values):
+        scores[i] = win if distance == 0 else float(value)
+    if cache is not None:
+        for key, value in zip(keys, values):
+            cache.store(key, float(value))
+
+    return [scores.get(i) for i in indices]
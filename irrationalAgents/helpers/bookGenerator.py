@@ -0,0 +1,183 @@
+'''
+Generate the opening book (see helpers.openingBook) by searching every
+position it covers:
+
+    python -m irrationalAgents.helpers.bookGenerator [-n N [N ...]] [-t TIME] [-o OUTPUT]
+
+Blue's answer to each first move weighs STEAL against the best placement,
+both searched to the same depth. Red's first move is the one whose best
+answer scores lowest for blue. Sizes not regenerated are kept from the
+existing book.
+
+Each size's entry in the book's "generated" metadata records the command
+that made it, the time per position, the depths the searches reached and
+the evaluation settings they used. The shipped book was made with
+
+    python -m irrationalAgents.helpers.bookGenerator -t 5
+
+which takes one core about two and a half hours: 5 CPU seconds a position is
+a few times what a move gets in play (n * n seconds over about n * n / 2
+moves), and book moves are worth searching further than that.
+'''
+import sys
+import json
+import time
+import argparse
+from datetime import date
+from numpy import Infinity
+from irrationalAgents.basicBoard import Board, _TOKEN_MAP_OUT
+from irrationalAgents.constants import FEATURE_WEIGHTS, VC_DISTANCE, VC_PRUNING
+from irrationalAgents.helpers.minimax import SearchTimeout, minimax
+from irrationalAgents.helpers.moveOrdering import MoveOrdering
+from irrationalAgents.helpers.openingBook import BOOK_PATH, BOOK_VERSION, STEAL_MOVE, _load, book_key
+from irrationalAgents.helpers.transposition import TranspositionTable
+from irrationalAgents.symmetry import image_move
+
+
+def _deepen(searches: list, allotment: float) -> list:
+    '''
+    Iterative deepening over several (state, curPlayer, ourPlayer) searches
+    in lockstep, so their scores come from the same depth and can be
+    compared. Returns the results of the deepest depth all of them finished,
+    and that depth (None and 0 if there is none).
+    '''
+    deadline = time.process_time() + allotment
+    tables = [TranspositionTable() for _ in searches]
+    orderings = [MoveOrdering(state.n) for state, _, _ in searches]
+    empty = min(len(state.empty_hexes()) for state, _, _ in searches)
+    best, depth = None, 0
+    try:
+        for maxDepth in range(1, empty + 1):
+            results = []
+            for (state, curPlayer, ourPlayer), table, ordering in zip(searches, tables, orderings):
+                state.deadline = deadline
+                results.append(minimax(state, 0, None, -Infinity, +Infinity, curPlayer, ourPlayer,
+                    maxDepth, table, None, ordering))
+            best, depth = results, maxDepth
+
+            # forced results won't change with a deeper search
+            if all(abs(result[2]) >= 10000 for result in results):
+                break
+    except SearchTimeout:
+        pass
+    finally:
+        for state, _, _ in searches:
+            state.deadline = None
+    return best, depth
+
+def _board(n: int, actions: list) -> Board:
+    state = Board(n)
+    for k, action in enumerate(actions):
+        state.handle_action(action, _TOKEN_MAP_OUT[1 + k % 2])
+    return state
+
+def _reply(n: int, actions: list, allotment: float) -> tuple:
+    '''
+    Searched (move, score, depth) for the player to move after actions,
+    with the score w.r.t that player. On turn 1 STEAL is weighed against
+    the best placement.
+    '''
+    state = _board(n, actions)
+    player = 1 + len(actions) % 2
+    searches = [(state, player, player)]
+    if len(actions) == 1:
+        stolen = _board(n, actions + [("STEAL", )])
+        searches.append((stolen, 3 - player, player))
+
+    results, depth = _deepen(searches, allotment)
+    if results is None:
+        return None, None, 0
+    move, score = results[0][0] * n + results[0][1], results[0][2]
+    if len(results) > 1 and results[1][2] > score:
+        move, score = STEAL_MOVE, results[1][2]
+    return move, score, depth
+
+def _image_move(move: int, image: int, n: int) -> int:
+    if move == STEAL_MOVE:
+        return move
+    r, q = image_move(divmod(move, n), image, n)
+    return r * n + q
+
+def generate_book(n: int, allotment: float, log = None, depths: list = None) -> dict:
+    '''
+    Book entries for size n, searching every position for `allotment`
+    CPU seconds (shared between STEAL and placing on turn 1). The depth
+    each search reached is appended to depths, if given.
+    '''
+    entries, scores = {}, {}
+
+    def search(actions):
+        '''
+        Book the position after actions, unless an equivalent one already is.
+        Returns the score of its book move.
+        '''
+        key, image = book_key(_board(n, actions))
+        if key not in scores:
+            move, scores[key], depth = _reply(n, actions, allotment)
+            if depths is not None:
+                depths.append(depth)
+            if move is not None:
+                entries[key] = _image_move(move, image, n)
+        return scores[key]
+
+    # turn 1 for every first move, then pick the first move blue does worst against
+    blueScores = {}
+    for first in range(n * n):
+        score = search([("PLACE", *divmod(first, n))])
+        if score is not None:
+            blueScores[first] = score
+    first = min(blueScores, key=blueScores.get) if blueScores else (n * n) // 2
+    key, image = book_key(_board(n, []))
+    entries[key] = _image_move(first, image, n)
+    if log is not None:
+        log(f"n={n}: first move {divmod(first, n)}, blue's best reply scores {blueScores.get(first)}")
+
+    # turn 2 for every answer to it
+    opening = [("PLACE", *divmod(first, n))]
+    for reply in [("STEAL", )] + [("PLACE", *divmod(i, n)) for i in range(n * n) if i != first]:
+        search(opening + [reply])
+    return entries
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="irrationalAgents.helpers.bookGenerator", description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-n", "--sizes", type=int, nargs="+", default=list(range(3, 16)),
+        help="board sizes to (re)generate (default: 3 to 15)")
+    parser.add_argument("-t", "--time", type=float, default=5.0,
+        help="CPU seconds of search per position (default: 5.0)")
+    parser.add_argument("-o", "--output", default=BOOK_PATH,
+        help="book file to update (default: the agent's book)")
+    args = parser.parse_args()
+
+    # other sizes already in the book are kept, with how they were made
+    books, generated = dict(_load(args.output)), {}
+    if books:
+        with open(args.output) as file:
+            generated = json.load(file).get("generated", {})
+    command = " ".join(["python -m irrationalAgents.helpers.bookGenerator"] + sys.argv[1:])
+    for n in args.sizes:
+        start, depths = time.process_time(), []
+        books[str(n)] = generate_book(n, args.time, log=lambda line: print(line, file=sys.stderr),
+            depths=depths)
+        seconds = time.process_time() - start
+        print(f"n={n}: {len(books[str(n)])} positions in {seconds:.0f}s", file=sys.stderr)
+        generated[str(n)] = {
+            "command": command,
+            "date": date.today().isoformat(),
+            "time": args.time,
+            "cpu_seconds": round(seconds),
+            "searches": len(depths),
+            "depths": [min(depths), max(depths)] if depths else None,
+            "settings": {"FEATURE_WEIGHTS": FEATURE_WEIGHTS.tolist(), "VC_DISTANCE": VC_DISTANCE,
+                "VC_PRUNING": VC_PRUNING},
+        }
+
+        with open(args.output, "w") as file:
+            json.dump({"version": BOOK_VERSION,
+                "generated": {k: generated[k] for k in sorted(generated, key=int)},
+                "books": {k: books[k] for k in sorted(books, key=int)}}, file, separators=(",", ":"))
+
+
+if __name__ == "__main__":
+    main()
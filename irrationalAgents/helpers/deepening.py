@@ -0,0 +1,64 @@
+import time
+from numpy import Infinity
+from irrationalAgents.constants import SEARCH_ALGORITHM
+from irrationalAgents.helpers.minimax import SearchTimeout, hexes_by_involvement, minimax
+from irrationalAgents.helpers.pvs import aspiration_search
+from irrationalAgents.helpers.timeManager import TimeManager
+
+
+def iterative_deepening(state, ourPlayer: int, table = None, allotment: float = None, ordering = None,
+        firstDepth: int = 1, clock = None):
+    '''
+    Search to depth firstDepth, firstDepth + 1, ... until the per-move allotment runs out,
+    seeding each iteration with the previous iteration's best move.
+    Returns ([x, y, score, depth], completed depth) for the last iteration
+    that finished. An unfinished iteration is thrown away.
+    With SEARCH_ALGORITHM "pvs", iterations are principal variation searches
+    in an aspiration window, following the last principal variation first
+    (which the board's stats record, if any).
+    allotment is in CPU seconds. Without one, the move is budgeted by clock
+    (a helpers.timeManager.TimeManager, or a new one for the board's size),
+    which extends the budget when the score swings between iterations.
+    '''
+    if allotment is None:
+        if clock is None:
+            clock = TimeManager(state.n)
+        clock.start_move(state)
+        state.deadline = clock.deadline()
+    else:
+        clock = None
+        state.deadline = time.process_time() + allotment
+
+    empty = state.n * state.n - len(state.occupied_hexes)
+    best, bestDepth, firstMove, line, scores = None, 0, None, None, []
+    try:
+        for maxDepth in range(firstDepth, empty + 1):
+            if SEARCH_ALGORITHM == "pvs":
+                # centred on the last score for a depth of the same parity
+                best, line = aspiration_search(state, ourPlayer, maxDepth,
+                    scores[-2] if len(scores) > 1 else None, table, line, ordering)
+            else:
+                best = minimax(state, 0, None, -Infinity, +Infinity, ourPlayer, ourPlayer, maxDepth, table, firstMove, ordering)
+            bestDepth, firstMove = maxDepth, (best[0], best[1])
+            scores.append(best[2])
+            if state.stats is not None and line is not None:
+                state.stats.pv = [list(move) for move in line]
+
+            # a forced win or loss will not change with a deeper search
+            if abs(best[2]) >= 10000:
+                break
+
+            # an unsettled score is worth a longer look
+            if clock is not None and clock.extend(scores):
+                state.deadline = clock.deadline()
+    except SearchTimeout:
+        pass
+    finally:
+        state.deadline = None
+
+    # not even depth 1 finished - fall back to the most involved hex
+    if best is None:
+        x, y = hexes_by_involvement(state)[0]
+        best = [x, y, 0, 0]
+
+    return best, bestDepth
@@ -0,0 +1,145 @@
+import time
+from irrationalAgents.basicBoard import _TOKEN_MAP_OUT
+from irrationalAgents.constants import ENDGAME_CACHE_MB
+from irrationalAgents.helpers.minimax import SearchTimeout
+from irrationalAgents.helpers.pathCost import fillDistances
+from irrationalAgents.symmetry import canonical
+
+# Bytes one cached position is budgeted at: a dict slot, its index and a 64 bit
+# int key come to about 100, and a resize briefly needs more
+ENTRY_BYTES = 128
+
+
+class EndgameSolver:
+    '''
+    Exact solver for positions with few empty cells: finds out whether the
+    player to move can force a win, with no evaluation at all.
+
+    It is an alpha-beta search over won/lost, so a node stops at its first
+    winning move. What makes it fast enough:
+
+    * one-move connections - a player whose path distance is 1 (one empty
+      cell short of joining their edges) wins on the spot, and a move after
+      which the opponent's distance is 1 loses on the spot, so a threatened
+      player only searches the moves that break every threat (including
+      moves that capture part of the threat)
+    * move ordering - cells on a shortest path of either player first
+    * a cache of solved positions, kept between moves. Whether the player to
+      move wins doesn't depend on the colours, so a position shares its entry
+      with every image under the board's symmetries (see symmetry.py). Its
+      size is given in megabytes (see ENTRY_BYTES), as the referee limits the
+      agent's memory as a whole, and the oldest entries go first.
+
+    Bridges are not treated as connected here: a diamond capture can break
+    one, so only connections that are exact under the capture rule prune.
+
+    Captures empty cells again, so a game can run past the point where the
+    board fills up, or even repeat. A line that repeats a position, or runs
+    longer than twice the empty cells it started with, is left unknown
+    (None): nothing that depends on it is cached or reported as solved.
+    Unknown positions are remembered for the rest of a solve, so that a
+    long line of captures is only explored once.
+    '''
+    def __init__(self, megabytes: float = ENDGAME_CACHE_MB):
+        self.capacity = max(1, int(megabytes * 2 ** 20) // ENTRY_BYTES)
+        self.cache = {}
+        self.unknown = {}
+        self.nodes = 0
+
+    def solve(self, state, player: int, allotment: float):
+        '''
+        (r, q, won) for player (to move) on state: a winning move and True,
+        or the best try and False if every move loses, or None if that is
+        unknown. Raises SearchTimeout once allotment CPU seconds have passed.
+        '''
+        state.deadline = time.process_time() + allotment
+        plies = 2 * len(state.empty_hexes())
+        self.unknown = {}
+        self.nodes = 0
+        try:
+            won = False
+            moves = self._moves(state, player)
+            for move in moves:
+                played = state.handle_action(("PLACE", move[0], move[1]), _TOKEN_MAP_OUT[player])
+                try:
+                    result = True if state.connectivity.connected(player) else \
+                        self._after(state, player, set(), plies)
+                finally:
+                    state.undo_move(played)
+                if result:
+                    return move[0], move[1], True
+                if result is None:
+                    won = None
+            return moves[0][0], moves[0][1], won
+        finally:
+            state.deadline = None
+
+    def _after(self, state, player: int, line: set, plies: int):
+        '''
+        Whether the move player just made wins (True), loses (False) or
+        is unknown (None).
+        '''
+        # leaving the opponent one cell short of a connection loses
+        if state.paths.distance(3 - player) <= 1:
+            return False
+        result = self._wins(state, 3 - player, line, plies - 1)
+        return None if result is None else not result
+
+    def _wins(self, state, player: int, line: set, plies: int):
+        '''
+        Whether player, to move, can force a win (neither side has won yet):
+        True, False, or None if that can't be settled within plies moves.
+        '''
+        self.nodes += 1
+        if state.paths.distance(player) <= 1:
+            return True
+
+        key, _ = canonical(state)
+        won = self.cache.get(key)
+        if won is not None:
+            return won
+        if key in line or plies <= self.unknown.get(key, 0):
+            return None
+        if state.deadline is not None and time.process_time() > state.deadline:
+            raise SearchTimeout()
+
+        line.add(key)
+        won = False
+        try:
+            for move in self._moves(state, player):
+                played = state.handle_action(("PLACE", move[0], move[1]), _TOKEN_MAP_OUT[player])
+                try:
+                    result = self._after(state, player, line, plies)
+                finally:
+                    state.undo_move(played)
+                if result:
+                    won = True
+                    break
+                if result is None:
+                    won = None
+        finally:
+            line.discard(key)
+
+        table = self.cache if won is not None else self.unknown
+        table[key] = won if won is not None else plies
+        if len(table) > self.capacity:
+            del table[next(iter(table))]
+        return won
+
+    def _moves(self, state, player: int) -> list:
+        '''
+        Empty cells, those on a shortest path of player and then of the
+        opponent first.
+        '''
+        topology, cells, paths = state.topology, state.paths.cells, state.paths
+        n = state.n
+        empty = [r * n + q for r, q in state.empty_hexes()]
+        onPath = [0] * topology.size
+        for colour, weight in ((player, 2), (3 - player, 1)):
+            distance = paths.distance(colour)
+            fromStart = paths.maps[colour].dist
+            fromEnd = fillDistances(topology, cells, colour, reverse=True)
+            for i in empty:
+                if fromStart[i] + fromEnd[i] - 1 == distance:
+                    onPath[i] += weight
+        return [divmod(i, n) for i in sorted(empty, key=lambda i: -onPath[i])]
@@ -0,0 +1,63 @@
+from collections import OrderedDict
+from irrationalAgents.constants import EVAL_CACHE_MB
+from irrationalAgents.symmetry import COLOUR_IMAGES, ROTATE, canonical
+
+# Bytes one entry is budgeted at: an OrderedDict slot and its link, a 65 bit
+# int key and a float come to about 165, and a resize briefly needs more
+ENTRY_BYTES = 256
+
+
+class EvalCache:
+    '''
+    Bounded cache of evaluate() scores, keyed by position and the player
+    they are for, dropping the least recently used entry once full. Its
+    size is given in megabytes (see ENTRY_BYTES), as the referee limits
+    the agent's memory as a whole.
+
+    Keys are canonical over COLOUR_IMAGES, so a position shares its score
+    with its 180 degree rotation (which evaluates the same). Kept between
+    moves, like the transposition table: leaves of one search come back as
+    leaves of the next. Set a board's `evalCache` to one to use it.
+    '''
+    def __init__(self, megabytes: float = EVAL_CACHE_MB):
+        self.capacity = max(1, int(megabytes * 2 ** 20) // ENTRY_BYTES)
+        self.entries = OrderedDict()
+
+    def lookup(self, key: int):
+        '''
+        Score stored for key, or None.
+        '''
+        entries = self.entries
+        score = entries.get(key)
+        if score is not None:
+            entries.move_to_end(key)
+        return score
+
+    def store(self, key: int, score: float):
+        entries = self.entries
+        entries[key] = score
+        if len(entries) > self.capacity:
+            entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+
+    def __len__(self):
+        return len(self.entries)
+
+
+def position_key(state, player: int) -> int:
+    '''
+    Cache key of the position on state, scored for player.
+    '''
+    return canonical(state, COLOUR_IMAGES)[0] << 1 | (player - 1)
+
+def child_keys(state, indices: list, token: int, player: int) -> list:
+    '''
+    position_key, for each flat index i in indices, of the position after
+    token (internal type) is placed at i by a move that captures nothing.
+    '''
+    turn, rotate = state.topology.zobrist_turn, ROTATE - 1
+    key, rotated = state.hash ^ turn, state.image_hashes[rotate] ^ turn
+    zobrist, imageKeys, colour = state.topology.zobrist[token], state.image_keys[token], player - 1
+    return [min(key ^ zobrist[i], rotated ^ imageKeys[i][rotate]) << 1 | colour for i in indices]
@@ -2,6 +2,7 @@ import numpy as np
 from irrationalAgents.basicBoard import Board
 from queue import PriorityQueue
 from irrationalAgents.helpers.dijkstraTile import dijkstraTile
+from irrationalAgents.constants import FEATURE_WEIGHTS, VC_DISTANCE
 import sys, json
 
 # def main():
@@ -41,8 +42,14 @@ def dijkstraEvalScore(playerColor: int, board: Board) -> int:
     # ourDistance = None
     # opponentDistance = None
 
-    ourDistance = getDijkstraDistance(playerColor, board)
-    opponentDistance = getDijkstraDistance(oppositionColor, board)
+    # distance maps are kept up to date by the board, so this is just a lookup
+    # (or, with bridges and edge templates, a search over the board's connections)
+    if VC_DISTANCE:
+        ourDistance = board.vcs.distance(playerColor)
+        opponentDistance = board.vcs.distance(oppositionColor)
+    else:
+        ourDistance = board.paths.distance(playerColor)
+        opponentDistance = board.paths.distance(oppositionColor)
 
     # if ourDistance == None and opponentDistance == None:
     #     return 0
@@ -64,10 +71,18 @@ def dijkstraEvalScore(playerColor: int, board: Board) -> int:
 
     
 
+def combineEvalScores(dijkstraScore, features):
+    '''
+    Leaf evaluation from its parts: the dijkstraEvalScore and the features.FEATURES
+    vector. Also accepts arrays of scores with a (k, features) matrix, one row per board.
+    '''
+    return 2 * dijkstraScore + features @ FEATURE_WEIGHTS
+
 def getDijkstraDistance(color: int, board: Board) -> int:
     '''
     Returns the number of hexes needed to complete the shortest path from a particular starting tile
-    to an edge, as well as the coords of all tiles on that path
+    to an edge, as well as the coords of all tiles on that path.
+    Searches from scratch; dijkstraEvalScore reads the board's incremental maps instead.
     '''
 
     startEdge = board.blue_start if color == 2 else board.red_start
@@ -77,6 +92,7 @@ def getDijkstraDistance(color: int, board: Board) -> int:
 
     # all tiles on the board whose path lengths (from start tile) have been found by Dijkstra. All start as False.
     size = len(board._data)
+    neighbours = board.topology.coord_neighbours
     lockedIn = np.zeros((size, size), dtype=bool)
 
     # all tile costs are infinite until they are discovered
@@ -124,7 +140,7 @@ def getDijkstraDistance(color: int, board: Board) -> int:
             continue
         
         lockedIn[tile.coords[0]][tile.coords[1]] = True
-        for neighbour in board._coord_neighbours(tile.coords):
+        for neighbour in neighbours[tile.coords[0] * size + tile.coords[1]]:
             (i, j) = neighbour
 
             if board._data[i][j] == color:
@@ -0,0 +1,180 @@
+import time
+import numpy as np
+from math import log, sqrt
+from irrationalAgents.basicBoard import _TOKEN_MAP_OUT
+from irrationalAgents.constants import MCTS_BATCH, MCTS_EXPLORATION
+
+
+class PlayoutEngine:
+    '''
+    Random playouts for one board size, many at once. A playout fills every
+    empty cell with alternating colours in a random order and only then
+    looks for a winner. A full board always has exactly one winner, so only
+    red needs checking: its stones are flood filled from the top row on a
+    whole (k, n, n) stack of boards per step.
+
+    Captures are not played out - a playout is a cheap estimate of who
+    controls the board, not a legal game.
+    '''
+    def __init__(self, n, rng = None):
+        self.n = n
+        self.rng = rng if rng is not None else np.random.default_rng()
+
+    def _grow(self, reach):
+        '''
+        reach plus every cell adjacent to it (steps as in basicBoard._HEX_STEPS).
+        '''
+        grown = reach.copy()
+        grown[:, 1:, :] |= reach[:, :-1, :]      # (1, 0)
+        grown[:, :-1, :] |= reach[:, 1:, :]      # (-1, 0)
+        grown[:, :, 1:] |= reach[:, :, :-1]      # (0, 1)
+        grown[:, :, :-1] |= reach[:, :, 1:]      # (0, -1)
+        grown[:, 1:, :-1] |= reach[:, :-1, 1:]   # (1, -1)
+        grown[:, :-1, 1:] |= reach[:, 1:, :-1]   # (-1, 1)
+        return grown
+
+    def red_wins(self, boards):
+        '''
+        For a (k, n * n) stack of full boards, which ones red has won.
+        '''
+        n = self.n
+        red = boards.reshape((-1, n, n)) == 1
+        reach = np.zeros_like(red)
+        reach[:, 0, :] = red[:, 0, :]
+        while True:
+            grown = self._grow(reach) & red
+            if (grown == reach).all():
+                break
+            reach = grown
+        return reach[:, n - 1, :].any(axis=1)
+
+    def playouts(self, cells, toMove: int, k: int) -> int:
+        '''
+        Number of red wins in k random playouts from cells (flat tokens),
+        with `toMove` (1 red, 2 blue) placing first.
+        '''
+        cells = np.asarray(cells)
+        empty = np.flatnonzero(cells == 0)
+        boards = np.repeat(cells[None, :], k, axis=0)
+        if len(empty):
+            # a random rank for every empty cell; even ranks go to the player to move
+            ranks = self.rng.random((k, len(empty))).argsort(axis=1).argsort(axis=1)
+            boards[:, empty] = np.where(ranks % 2 == 0, toMove, 3 - toMove)
+        return int(self.red_wins(boards).sum())
+
+
+class Node:
+    '''
+    A position in the search tree, reached by `player` placing at `move`.
+    wins counts playouts won by that player, so a parent picks the child
+    that is best for whoever moves there.
+    '''
+    __slots__ = ("move", "player", "parent", "children", "untried", "visits", "wins", "winner")
+
+    def __init__(self, move, player, parent, untried, winner = 0):
+        self.move = move
+        self.player = player
+        self.parent = parent
+        self.children = {}
+        self.untried = untried
+        self.visits = 0
+        self.wins = 0
+        self.winner = winner
+
+
+class MonteCarloTree:
+    '''
+    UCT search over a board, kept between turns. The board is walked down
+    the tree with handle_action and back with undo_move, and advance()
+    re-roots the tree on each move actually played, so the subtree under
+    the opponent's reply is reused.
+    '''
+    def __init__(self, state, rng = None):
+        self.state = state
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.engine = PlayoutEngine(state.n, self.rng)
+        self.root = None
+        self.playouts = 0
+
+    def _new_node(self, move, player, parent):
+        state = self.state
+        winner = player if move is not None and state.connectivity.connected(player) else 0
+        untried = [] if winner else state.empty_hexes()
+        self.rng.shuffle(untried)
+        return Node(move, player, parent, untried, winner)
+
+    def _root(self):
+        if self.root is None:
+            # the root's player is the one who just moved
+            justMoved = 1 if self.state.turns_taken % 2 else 2
+            self.root = self._new_node(None, justMoved, None)
+        return self.root
+
+    def advance(self, action):
+        '''
+        Re-root after `action` was played on the board (call it after handle_action).
+        '''
+        root = self.root
+        if root is None or action[0] != "PLACE":
+            self.root = None
+            return
+        self.root = root.children.get((action[1], action[2]))
+        if self.root is not None:
+            self.root.parent = None
+
+    def _select(self, node):
+        logVisits = log(node.visits)
+        return max(node.children.values(), key=lambda child: child.wins / child.visits +
+            MCTS_EXPLORATION * sqrt(logVisits / child.visits))
+
+    def iterate(self, batch: int = MCTS_BATCH):
+        '''
+        One selection, expansion, playout batch and backup.
+        '''
+        state = self.state
+        node = self._root()
+        moves = []
+        try:
+            # select
+            while not node.untried and node.children and not node.winner:
+                node = self._select(node)
+                moves.append(state.handle_action(("PLACE", *node.move), _TOKEN_MAP_OUT[node.player]))
+
+            # expand
+            if node.untried and not node.winner:
+                move = node.untried.pop()
+                player = 3 - node.player
+                moves.append(state.handle_action(("PLACE", *move), _TOKEN_MAP_OUT[player]))
+                node.children[move] = node = self._new_node(move, player, node)
+
+            # simulate
+            if node.winner:
+                redWins = batch if node.winner == 1 else 0
+            else:
+                redWins = self.engine.playouts(state.paths.cells, 3 - node.player, batch)
+        finally:
+            for move in reversed(moves):
+                state.undo_move(move)
+
+        # back up
+        while node is not None:
+            node.visits += batch
+            node.wins += redWins if node.player == 1 else batch - redWins
+            node = node.parent
+        self.playouts += batch
+
+    def search(self, allotment: float):
+        '''
+        Run iterations for allotment CPU seconds, then return the most
+        visited move at the root and the number of playouts it took.
+        '''
+        deadline = time.process_time() + allotment
+        start = self.playouts
+        root = self._root()
+        while True:
+            self.iterate()
+            if time.process_time() >= deadline:
+                break
+
+        best = max(root.children.values(), key=lambda child: child.visits)
+        return best.move, self.playouts - start
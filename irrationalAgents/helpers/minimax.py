@@ -1,10 +1,21 @@
 import time
 from irrationalAgents.basicBoard import _SWAP_PLAYER, _TOKEN_MAP_OUT
-from irrationalAgents.helpers.pieces import islandCount, manhatten_distance, opponentEdge, pieceAdvantage, avgDistanceFromCentre, triangle_structures
-from irrationalAgents.helpers.evaluation import dijkstraEvalScore
+from irrationalAgents.helpers.pieces import manhatten_distance
+from irrationalAgents.helpers.evaluation import combineEvalScores, dijkstraEvalScore
+from irrationalAgents.helpers.features import boardFeatures
+from irrationalAgents.helpers.batchEval import evaluateChildren
+from irrationalAgents.helpers.evalCache import position_key
+from irrationalAgents.helpers.pathCost import INF, fillDistances
+from irrationalAgents.constants import BATCH_LEAF_EVAL, SYMMETRIC_TT, VC_PRUNING
+from irrationalAgents.symmetry import COLOUR_IMAGES, IDENTITY, canonical, image_move
+from irrationalAgents.helpers.transposition import EXACT, LOWER, UPPER
 
 
-def minimax(state, depth : int, action : tuple, a : float, b : float, curPlayer : int, ourPlayer: int, maxDepth: int) -> float:
+class SearchTimeout(Exception):
+    """Raised inside minimax once the board's search deadline has passed."""
+
+
+def minimax(state, depth : int, action : tuple, a : float, b : float, curPlayer : int, ourPlayer: int, maxDepth: int, table = None, firstMove = None, ordering = None) -> float:
     # Print calls to help me figure out how it was working :)
     # if depth == 1:
     #     print("Depth = " + str(depth))
@@ -16,35 +27,100 @@ def minimax(state, depth : int, action : tuple, a : float, b : float, curPlayer
     # print("Degrees:")
     # print_state(state.hex_degrees)
     
+    # Search statistics are only collected when the board has a collector (see searchStats)
+    stats = state.stats
+    if stats is not None:
+        stats.node(depth)
+
     # Check if victory has been achieved. If so, we don't need to keep making moves on this state.
     victory = 0
     if state.turns_taken >= (2 * state.n - 1) and action is not None:
+        if stats is not None:
+            started = time.perf_counter()
         victory = check_winner(state, action, curPlayer, ourPlayer)
+        if stats is not None:
+            stats.timed("win_check", started)
         if victory == 1 or victory == -1:
 
             return [action[1], action[2], 10000 * victory, depth]
 
-    if ((state.greedyLimit - (state.totalTime + (time.process_time() - state.moveStart))) <= 0 ):
-        maxDepth = 1
+    # Abandon the whole search once out of time; the caller keeps the last
+    # completed result rather than acting on a half-searched ply
+    if state.deadline is not None and time.process_time() > state.deadline:
+        raise SearchTimeout()
 
     # If we have hit max depth for minimax (and there's no victory), it's time to evaluate the board state.
     if depth >= maxDepth:
-        return [-1, -1, evaluate(state, ourPlayer), depth]
+        if stats is None:
+            return [-1, -1, evaluate(state, ourPlayer), depth]
+        started = time.perf_counter()
+        score = evaluate(state, ourPlayer)
+        stats.timed("evaluation", started)
+        stats.leaf_evals += 1
+        return [-1, -1, score, depth]
+
+    # Look the position up in the transposition table. A deep enough result whose
+    # bound is conclusive for this window can be returned without searching.
+    # Entries are shared with the rotated position, moves stored as seen on it.
+    remaining = maxDepth - depth
+    ttMove = None
+    if table is not None:
+        key, image = canonical(state, COLOUR_IMAGES) if SYMMETRIC_TT else (state.hash, IDENTITY)
+        entry = table.lookup(key)
+        if entry is not None:
+            _, entryDepth, entryScore, bound, ttMove = entry
+            if image:
+                ttMove = image_move(ttMove, image, state.n)
+            if depth > 0 and entryDepth >= remaining and (bound == EXACT or
+                    (bound == LOWER and entryScore >= b) or (bound == UPPER and entryScore <= a)):
+                if stats is not None:
+                    stats.tt_hits += 1
+                return [ttMove[0], ttMove[1], entryScore, maxDepth]
+
+    # Try the stored best move first, it is the most likely to cause a cutoff
+    if stats is not None:
+        started = time.perf_counter()
+    if ordering is not None:
+        moves = ordering.order(state, depth, curPlayer, (firstMove, ttMove))
+    else:
+        moves = hexes_by_involvement(state)
+        for preferred in (ttMove, firstMove):
+            if preferred in moves:
+                moves.remove(preferred)
+                moves.insert(0, preferred)
+    # Below the root, optionally skip filling a carrier of one of our own
+    # bridges or edge templates (a heuristic; see prune_moves)
+    if VC_PRUNING and depth > 0:
+        moves = prune_moves(state, moves, curPlayer)
+    if stats is not None:
+        stats.timed("move_generation", started)
+    alpha, beta = a, b
+
+    # Children at the depth limit are all scored together in one batch
+    # (moves that capture come back as None and are played out as usual)
+    if BATCH_LEAF_EVAL and depth + 1 >= maxDepth:
+        if stats is not None:
+            started = time.perf_counter()
+        leafScores = evaluateChildren(state, moves, curPlayer, ourPlayer)
+        if stats is not None:
+            stats.timed("evaluation", started)
+            stats.leaf_evals += len(moves) - leafScores.count(None)
+    else:
+        leafScores = [None] * len(moves)
 
     # If we haven't hit max depth and victory hasn't been achieved, time to explore deeper.
     if curPlayer == ourPlayer:
         # Best outcome starts out at -inf w.r.t our player
         best = [-1, -1, -10000, maxDepth]
-        for hex in hexes_by_involvement(state):
+        for k, hex in enumerate(moves):
             # place piece in hex, then run minimax on the resulting state
             x, y = hex[0], hex[1]
-            action = ("PLACE", x, y)
-            # print(f"depth = {depth}, action = {action}")
-            move = state.handle_action(action, _TOKEN_MAP_OUT[curPlayer])
-            score = minimax(state, depth + 1, action, a, b, _SWAP_PLAYER[curPlayer], ourPlayer, maxDepth)
-
-            # revert the action, so that a new one can be performed for the next hex
-            state.undo_move(move)
+            if leafScores[k] is not None:
+                score = [x, y, leafScores[k], depth + 1]
+            else:
+                action = ("PLACE", x, y)
+                # print(f"depth = {depth}, action = {action}")
+                score = _search_child(state, depth, action, a, b, curPlayer, ourPlayer, maxDepth, table, ordering)
             
             # if eval score surpasses the current best, we have a new best move
             score[0], score[1] = x, y
@@ -55,12 +131,13 @@ def minimax(state, depth : int, action : tuple, a : float, b : float, curPlayer
                 if score[3] < best[3]:
                     best = score
 
-            if ((state.randomLimit - (state.totalTime + (time.process_time() - state.moveStart))) <= 0 ):
-                return best
-
             # if our maximizing player hits a score that is greater than what the minimizing player will consider, break. This board state is now irrelevant and the rest of the possible moves are pruned.
             if best[2] >= (b):
                 #print(f"Pruned! Depth: {depth}")
+                if ordering is not None:
+                    ordering.cutoff((x, y), depth, remaining, curPlayer)
+                if stats is not None:
+                    stats.cutoff(k)
                 break
             
             # update alpha so moves further down the minimax tree can use it as a reference
@@ -68,13 +145,14 @@ def minimax(state, depth : int, action : tuple, a : float, b : float, curPlayer
     else:
         # Best outcome starts at inf w.r.t our player
         best = [-1, -1, 10000, maxDepth]
-        for hex in hexes_by_involvement(state):
+        for k, hex in enumerate(moves):
             x, y = hex[0], hex[1]
-            action = ("PLACE", x, y)
-            # print(f"depth = {depth}, action = {action}")
-            move = state.handle_action(action, _TOKEN_MAP_OUT[curPlayer])
-            score = minimax(state, depth + 1, action, a, b, _SWAP_PLAYER[curPlayer], ourPlayer, maxDepth)
-            state.undo_move(move)
+            if leafScores[k] is not None:
+                score = [x, y, leafScores[k], depth + 1]
+            else:
+                action = ("PLACE", x, y)
+                # print(f"depth = {depth}, action = {action}")
+                score = _search_child(state, depth, action, a, b, curPlayer, ourPlayer, maxDepth, table, ordering)
             score[0], score[1] = x, y
             
             if score[2] < best[2]:
@@ -84,43 +162,70 @@ def minimax(state, depth : int, action : tuple, a : float, b : float, curPlayer
                 if score[3] < best[3]:
                     best = score
 
-            if ((state.randomLimit - (state.totalTime + (time.process_time() - state.moveStart))) <= 0 ):
-                return best
-            
             if best[2] <= (a) :
                 #print(f"Pruned! Depth: {depth}")
+                if ordering is not None:
+                    ordering.cutoff((x, y), depth, remaining, curPlayer)
+                if stats is not None:
+                    stats.cutoff(k)
                 break
             
             b = min(b, best[2])
 
+    if stats is not None:
+        stats.searched(k + 1 if moves else 0)
+
     if best[0] == -1 or best[1] == -1:
         empty_hex = empty_hexes(state)[0]
         best[0], best[1] = empty_hex[0], empty_hex[1]
 
+    if table is not None:
+        if best[2] >= beta:
+            bound = LOWER
+        elif best[2] <= alpha:
+            bound = UPPER
+        else:
+            bound = EXACT
+        table.store(key, remaining, best[2], bound, image_move((best[0], best[1]), image, state.n))
+
     # print("Given state:")
     # print_state(state._data)
     # print(f"The best move for {curPlayer} is {str(best)}")
     return best
 
+def _search_child(state, depth: int, action: tuple, a: float, b: float, curPlayer: int, ourPlayer: int, maxDepth: int, table, ordering):
+    '''
+    Play action for curPlayer, run minimax on the resulting state and take the action back.
+    '''
+    stats = state.stats
+    if stats is not None:
+        started = time.perf_counter()
+    move = state.handle_action(action, _TOKEN_MAP_OUT[curPlayer])
+    if stats is not None:
+        stats.timed("make_unmake", started)
+    try:
+        return minimax(state, depth + 1, action, a, b, _SWAP_PLAYER[curPlayer], ourPlayer, maxDepth, table, None, ordering)
+    finally:
+        # revert the action, so that a new one can be performed for the next hex
+        if stats is not None:
+            started = time.perf_counter()
+        state.undo_move(move)
+        if stats is not None:
+            stats.timed("make_unmake", started)
+
 def check_winner(state, action, curPlayer: int, ourPlayer: int) -> int:
     '''
     Checks if victory has been achieved. 
     Returns -1 if loss, 0 if no victory, 1 if victory, w.r.t ourPlayer.
-    Code borrowed from game.py in referee module provided by COMP30024 tutors.
+    Only the player who just moved can have completed a path (a capture
+    never connects the captured side), and the board's union-find answers
+    that without a search.
     '''
     # We are evaluating victory relative to the player that just played, rather than the player whose turn it is
     prevPlayer = 1 if curPlayer == 2 else 2
-    
-    # axis is 0 for red, 1 for blue
-    axis = 0 if prevPlayer == 1 else 1
-
-    _, r, q = action
-    reachable = state.connected_coords((r, q))
-    axis_vals = [coord[axis] for coord in reachable]
-    # print(f"Checking winner: move = {(r, q)} by player {prevPlayer}")
-    # print(f"Axis values = {axis_vals}")
-    if min(axis_vals) == 0 and max(axis_vals) == state.n - 1:
-        # we have a win for curPlayer! figure out if that's a win for our player or a loss
+
+    if state.connectivity.connected(prevPlayer):
+        # we have a win for prevPlayer! figure out if that's a win for our player or a loss
         return 1 if prevPlayer == ourPlayer else -1
     
     return 0
@@ -128,14 +233,10 @@ def check_winner(state, action, curPlayer: int, ourPlayer: int) -> int:
 def empty_hexes(state):
     '''
     Adds nodes to minimax search queue based upon empty hexes on the board. 
-    Does not attempt to achieve optimal ordering to enhance effectiveness of a-b pruning
+    Does not attempt to achieve optimal ordering to enhance effectiveness of a-b pruning.
+    The board keeps its empty cells indexed, so this does not scan the board.
     '''
-    empty_hexes = []
-    for i in range (0, state.n):
-            for j in range(0, state.n):
-                    if state._data[i][j] == 0:
-                        empty_hexes.append((i, j))
-    return empty_hexes
+    return state.empty_hexes()
 
 def hexes_by_involvement(state):
     '''
@@ -143,23 +244,67 @@ def hexes_by_involvement(state):
     '''
     return sorted(empty_hexes(state), key = lambda x: state.hex_degrees[x[0]][x[1]], reverse=True)
 
+def prune_moves(state, moves: list, curPlayer: int) -> list:
+    '''
+    Forward pruning: returns moves without those into a carrier of
+    curPlayer's own live bridges and edge templates (all of them, if every
+    move is one). A carrier move is still kept if it wins, captures,
+    shortens curPlayer's path over its bridges and edge templates (e.g. by
+    joining a chain to an edge), or lies on one of the opponent's shortest
+    paths (so it can block them).
+
+    This is a heuristic, not a sound cut: filling a carrier can still shorten
+    curPlayer's plain path distance, which the evaluation counts, so a
+    pruned search can score a position differently from a full one.
+    '''
+    n, vcs = state.n, state.vcs
+    carried = {i for i in (x * n + y for x, y in moves) if vcs.carries(i, curPlayer)}
+    if not carried:
+        return moves
+
+    topology, cells = state.topology, state.paths.cells
+    opponent = 3 - curPlayer
+    fromStart = state.paths.maps[curPlayer].dist
+    fromEnd = fillDistances(topology, cells, curPlayer, reverse=True)
+    virtualStart, virtualEnd = vcs.fill(curPlayer), vcs.fill(curPlayer, reverse=True)
+    virtualDistance = vcs.distance(curPlayer, virtualStart)
+    theirStart = state.paths.maps[opponent].dist
+    theirEnd = fillDistances(topology, cells, opponent, reverse=True)
+    theirDistance = state.paths.distance(opponent)
+    for i in list(carried):
+        through = vcs.through(i, curPlayer, virtualStart, virtualEnd)
+        if fromStart[i] + fromEnd[i] - 2 == 0 or through < INF and through < virtualDistance \
+                or any(cells[opp] == curPlayer and cells[mid1] == opponent and cells[mid2] == opponent
+                    for opp, mid1, mid2 in topology.captures[i]) \
+                or theirStart[i] + theirEnd[i] - 1 == theirDistance:
+            carried.discard(i)
+
+    kept = [move for move in moves if move[0] * n + move[1] not in carried]
+    return kept or moves
+
 def evaluate(state, player: int):
     '''
     Evaluation or utility function. 
     Returns a value for the 'desirability' of a board state based upon an evaluation of certain features.
+    Scores are looked up in and added to the board's evalCache, if it has one.
     '''
+    cache = state.evalCache
+    if cache is not None:
+        key = position_key(state, player)
+        score = cache.lookup(key)
+        if state.stats is not None:
+            state.stats.eval_cached(score is not None)
+        if score is not None:
+            return score
 
-    ## UNUSED EVALS
-    # avgDistanceScore = -1 * avgDistanceFromCentre(state, player)
-    # islandScore = islandCount(state, player)
-    # triangeStructureScore = triangle_structures(state, player) / 3
-    # opponentEdgeScore = opponentEdge(state, player)
-
-    # USED EVALs
     dijkstraScore = dijkstraEvalScore(player, state)
-    pieceAdvantageScore = pieceAdvantage(state, player)
+
+    # pieces.py features, all extracted in one vectorised pass (see FEATURES for the order)
+    features = boardFeatures(state, player)
     
-    score = (2 * dijkstraScore + pieceAdvantageScore) 
+    score = float(combineEvalScores(dijkstraScore, features))
+    if cache is not None:
+        cache.store(key, score)
     
     return score
 
@@ -176,24 +321,17 @@ def print_state(data):
     return
 
 def hexes_from_centroid(state):
-    
-    hexList = sorted(empty_hexes(state), key = lambda x: manhatten_distance(x, centroid(state)))
+    '''
+    Empty hexes in ascending order of distance from the centroid of the occupied hexes.
+    '''
+    centre = centroid(state)
+    hexList = sorted(empty_hexes(state), key = lambda x: manhatten_distance(x, centre))
     # print_state(state._data)
     # print(hexList)
     return hexList
 
 def centroid(state): 
-    numCoords = len(state.occupied_hexes)
-    if numCoords == 0:
-        return (0,0)
-    xsum = 0
-    ysum = 0
-    for coord in state.occupied_hexes:
-        xsum += coord[0]
-        ysum += coord[1]
-    
-    
-    return (xsum/numCoords, ysum/numCoords)
-
-
-
+    '''
+    Mean (r, q) of the occupied hexes, from the sums the board keeps up to date.
+    '''
+    return state.centroid()
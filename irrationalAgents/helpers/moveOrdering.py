@@ -0,0 +1,68 @@
+from irrationalAgents.constants import KILLER_SLOTS
+
+
+class MoveOrdering:
+    '''
+    Move ordering for minimax, kept between nodes and between searches:
+
+      killers - per ply, the last few moves that caused a cutoff there.
+                Sibling positions tend to be refuted by the same move.
+      history - per colour, a score for every cell that grows by
+                remaining depth ** 2 each time a move there causes a cutoff.
+
+    Moves are tried as: preferred moves (the transposition table's best move,
+    the previous iteration's best move), then killers for the ply, then the
+    rest by history score, with hex degree only breaking ties.
+    '''
+    def __init__(self, n, killerSlots: int = KILLER_SLOTS):
+        self.n = n
+        self.killerSlots = killerSlots
+        self.killers = []
+        self.history = {1: [0] * (n * n), 2: [0] * (n * n)}
+
+    def new_search(self):
+        '''
+        Mark the start of a new search (e.g. a new call to Player.action).
+        Ply numbers now count from a new root, so killers are dropped, and
+        history is halved so older cutoffs count for less.
+        '''
+        self.killers = []
+        for scores in self.history.values():
+            scores[:] = [score >> 1 for score in scores]
+
+    def order(self, state, depth: int, curPlayer: int, preferred: tuple = ()) -> list:
+        '''
+        Empty hexes of state in the order curPlayer's moves should be tried
+        at ply `depth`. `preferred` moves (None entries are skipped) go first.
+        '''
+        n, degrees, cells = self.n, state.hex_degrees, state.paths.cells
+        history = self.history[curPlayer]
+        empty = state.empty_hexes()
+
+        # a hex has at most 6 neighbours, so the degree only separates equal history
+        keys = [history[x * n + y] * 8 + degrees[x][y] for x, y in empty]
+        moves = [empty[k] for k in sorted(range(len(empty)), key=keys.__getitem__, reverse=True)]
+
+        killers = self.killers[depth] if depth < len(self.killers) else []
+        front = []
+        for move in (*preferred, *killers):
+            if move is not None and move not in front and cells[move[0] * n + move[1]] == 0:
+                front.append(move)
+        if not front:
+            return moves
+        return front + [move for move in moves if move not in front]
+
+    def cutoff(self, move: tuple, depth: int, remaining: int, curPlayer: int):
+        '''
+        Record that curPlayer's move at ply `depth` caused a cutoff with
+        `remaining` plies left to search.
+        '''
+        while len(self.killers) <= depth:
+            self.killers.append([])
+        killers = self.killers[depth]
+        if move in killers:
+            killers.remove(move)
+        killers.insert(0, move)
+        del killers[self.killerSlots:]
+
+        self.history[curPlayer][move[0] * self.n + move[1]] += remaining * remaining
@@ -0,0 +1,95 @@
+'''
+Opening book: the first moves of a game, searched offline so they cost no
+time in play. For each board size the book covers
+
+  turn 0  red's first move on the empty board
+  turn 1  blue's reply to every possible first move - STEAL or a placement
+  turn 2  red's reply to every answer to the book's first move
+
+Positions are keyed by their canonical image with red to move (see
+symmetry.py): a position with blue to move is looked up by its SWAP images,
+and a position and its 180 degree rotation share an entry. Book moves are
+stored as seen on the image and mapped back on lookup. A turn 1 position is
+marked as one where STEAL is still allowed, since after a steal the very
+same stones are on the board with red to move.
+
+The book is one JSON file, {"version", "generated", "books": {n: {key: move}}},
+where key is the Zobrist hash of the canonical image (hex) and move its
+flat cell index, or STEAL_MOVE. "generated" records, per size, the command
+and settings its entries were searched with. Hashes are seeded by n, so they are the
+same in every run. Looking a position up costs two comparisons and a dict
+access, as boards keep the hashes of their images up to date.
+
+Generate it with helpers.bookGenerator.
+'''
+import os
+import json
+from functools import lru_cache
+from irrationalAgents.symmetry import IDENTITY, ROTATE, SWAP, canonical, image_move
+
+BOOK_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "openingBook.json")
+BOOK_VERSION = 2
+# turns covered by the book
+BOOK_PLIES = 3
+# move stored for a STEAL
+STEAL_MOVE = -1
+# mixed into the key of a position where STEAL is allowed
+STEAL_KEY = 0x9E3779B97F4A7C15
+
+# images with red to move, for red to move and for blue to move
+_RED_TO_MOVE = ((IDENTITY, ROTATE), (SWAP, ROTATE | SWAP))
+
+
+def book_key(state) -> tuple:
+    '''
+    Book key of the position on state (a Board or BitBoard), and the
+    image of the position it belongs to.
+    '''
+    key, image = canonical(state, _RED_TO_MOVE[state.turns_taken % 2])
+    if state.turns_taken == 1:
+        key ^= STEAL_KEY
+    return f"{key:016x}", image
+
+def book_action(move: int, image: int, n: int) -> tuple:
+    '''
+    Action for a book move found on the given image of the position.
+    '''
+    if move == STEAL_MOVE:
+        return ("STEAL", )
+    return ("PLACE", *image_move(divmod(move, n), image, n))
+
+@lru_cache(maxsize=None)
+def _load(path: str) -> dict:
+    if not os.path.exists(path):
+        return {}
+    with open(path) as file:
+        data = json.load(file)
+    if data.get("version") != BOOK_VERSION:
+        return {}
+    return data["books"]
+
+
+class OpeningBook:
+    '''
+    Book moves for one board size.
+    '''
+    def __init__(self, n: int, path: str = BOOK_PATH):
+        self.n = n
+        self.entries = _load(path).get(str(n), {})
+
+    def lookup(self, state):
+        '''
+        The book action for the position on state (a Board or BitBoard),
+        or None if it isn't in the book.
+        '''
+        turns = state.turns_taken
+        if turns >= BOOK_PLIES or not self.entries:
+            return None
+        key, image = book_key(state)
+        move = self.entries.get(key)
+        if move is None:
+            return None
+        action = book_action(move, image, self.n)
+        if action[0] == "PLACE" and state.paths.cells[action[1] * self.n + action[2]] != 0:
+            return None
+        return action
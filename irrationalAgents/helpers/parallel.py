@@ -0,0 +1,297 @@
+import os
+import time
+import multiprocessing
+from multiprocessing import resource_tracker
+from multiprocessing.connection import wait
+from numpy import Infinity
+from irrationalAgents.basicBoard import _SWAP_PLAYER, _TOKEN_MAP_OUT
+from irrationalAgents.constants import EVAL_CACHE_MB, PARALLEL_MODE, PARALLEL_WORKERS
+from irrationalAgents.helpers.deepening import iterative_deepening
+from irrationalAgents.helpers.evalCache import EvalCache
+from irrationalAgents.helpers.minimax import SearchTimeout, hexes_by_involvement, minimax
+from irrationalAgents.helpers.moveOrdering import MoveOrdering
+from irrationalAgents.helpers.timeManager import TimeManager
+from irrationalAgents.helpers.transposition import SharedTranspositionTable, TranspositionTable
+from irrationalAgents.snapshot import SharedSnapshot, read_snapshot, write_snapshot
+
+# Per worker process state, set up by _init_worker
+_worker = {}
+
+
+def compact_board(state) -> bytes:
+    '''
+    Everything a worker needs to rebuild state, as a snapshot (see snapshot.py).
+    '''
+    return bytes(write_snapshot(state))
+
+def _worker_board(source):
+    '''
+    Board for a compact_board snapshot, or for the snapshot in the shared
+    memory block with the given name, reusing this worker's board when it
+    has one of the same class and size.
+    '''
+    if isinstance(source, str):
+        shared = _worker.setdefault("snapshots", {})
+        if source not in shared:
+            shared[source] = SharedSnapshot(name=source)
+        source = shared[source].memory.buf
+    _worker["board"] = read_snapshot(source, _worker.get("board"))
+    _worker["board"].evalCache = _worker.get("evalCache")
+    return _worker["board"]
+
+def _init_worker(alpha, sharedTable):
+    _worker["alpha"] = alpha
+    _worker["table"] = sharedTable if sharedTable is not None else TranspositionTable()
+    # each worker keeps its own, like the table in split mode
+    _worker["evalCache"] = EvalCache() if EVAL_CACHE_MB else None
+
+def _serve(connection, alpha, sharedTable):
+    '''
+    Worker process: run the (function, task) requests sent over connection,
+    sending back each function(task), until None arrives.
+    '''
+    _init_worker(alpha, sharedTable)
+    while True:
+        request = connection.recv()
+        if request is None:
+            break
+        function, task = request
+        connection.send(function(task))
+
+def _worker_deadline(deadline: float) -> float:
+    '''
+    The wall clock deadline as a deadline for this process's CPU clock
+    (a busy worker gets about one CPU second per second).
+    '''
+    return time.process_time() + max(0, deadline - time.time())
+
+def _split_task(task):
+    '''
+    Search one root move. Returns (move, score or None on timeout, whether
+    the score is exact rather than an upper bound, CPU seconds).
+    '''
+    compact, move, ourPlayer, maxDepth, deadline, generation = task
+    start = time.process_time()
+    state = _worker_board(compact)
+    table, alpha = _worker["table"], _worker["alpha"]
+    ordering = _worker.get("ordering")
+    if ordering is None or ordering.n != state.n:
+        ordering = _worker["ordering"] = MoveOrdering(state.n)
+    if table.generation != generation:
+        ordering.new_search()
+        table.generation = generation
+
+    action = ("PLACE", move[0], move[1])
+    state.handle_action(action, _TOKEN_MAP_OUT[ourPlayer])
+    state.deadline = _worker_deadline(deadline)
+    # only moves that beat the best finished sibling matter here, anything
+    # else just comes back as some score <= a
+    a = alpha.value
+    try:
+        score = minimax(state, 1, action, a, +Infinity, _SWAP_PLAYER[ourPlayer],
+            ourPlayer, maxDepth, table, None, ordering)[2]
+    except SearchTimeout:
+        score = None
+    finally:
+        state.deadline = None
+
+    if score is not None:
+        with alpha.get_lock():
+            if score > alpha.value:
+                alpha.value = score
+    return move, score, score is not None and score > a, time.process_time() - start
+
+def _lazy_task(task):
+    '''
+    Iterative deepening from the root on a shared table.
+    Returns (best, depth, CPU seconds).
+    '''
+    compact, ourPlayer, deadline, generation, worker = task
+    start = time.process_time()
+    state = _worker_board(compact)
+    table = _worker["table"]
+    table.generation = generation
+
+    # workers start at different depths so they don't all repeat the same search
+    best, depth = iterative_deepening(state, ourPlayer, table,
+        max(0, deadline - time.time()), MoveOrdering(state.n), firstDepth = 1 + worker % 2)
+    return best, depth, time.process_time() - start
+
+
+def _available_cpus() -> int:
+    '''
+    CPUs this process may run on (more workers than that would make each
+    one's CPU clock, which its deadline is checked against, run slow).
+    '''
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+class ParallelSearch:
+    '''
+    Searches a position across a pool of worker processes:
+
+      "split" - root splitting. For each depth, the previous depth's best root
+                move is searched first, then every other root move is handed out
+                to the pool. Each finished move raises a shared alpha, so moves
+                started later only search for a refutation of the best so far.
+      "lazy"  - lazy SMP. Every worker runs its own iterative deepening from the
+                root, and all of them read and write one transposition table in
+                shared memory. The deepest finished result is played.
+
+    Workers run on their own CPU clocks, which the referee does not see. A
+    search's allotment is CPU seconds for all of its workers together, so
+    they search for allotment / workers of wall clock time. CPU used by
+    workers is added up in workerTime, for the caller to charge to its
+    clock (see TimeManager.charge).
+    '''
+    def __init__(self, n: int, workers: int = PARALLEL_WORKERS, mode: str = PARALLEL_MODE):
+        if mode not in ("split", "lazy"):
+            raise ValueError(f"unknown parallel mode {mode!r}")
+
+        self.n = n
+        self.mode = mode
+        self.workers = workers or _available_cpus()
+        self.generation = 0
+        self.workerTime = 0
+        self.alpha = multiprocessing.Value("d", -Infinity)
+        self.table = SharedTranspositionTable(n) if mode == "lazy" else None
+        self.snapshot = None
+        self.processes = []
+        self.connections = []
+
+    def _start(self):
+        '''
+        Start the worker processes, each with a pipe of its own to us. (Not
+        a multiprocessing.Pool: each of its helper threads reserves a malloc
+        arena, which costs over 200MB of the referee's space limit.)
+        '''
+        if self.processes:
+            return
+        # workers attach to our shared memory snapshot, so they must use our
+        # resource tracker rather than start their own (see SharedSnapshot)
+        resource_tracker.ensure_running()
+        for _ in range(self.workers):
+            ours, theirs = multiprocessing.Pipe()
+            process = multiprocessing.Process(target=_serve, args=(theirs, self.alpha, self.table), daemon=True)
+            process.start()
+            theirs.close()
+            self.processes.append(process)
+            self.connections.append(ours)
+
+    def _run(self, function, tasks):
+        '''
+        function(task) for every task, run on the workers and yielded in the
+        order they finish. Consume all of it before running anything else.
+        '''
+        self._start()
+        tasks, idle, busy = iter(tasks), list(self.connections), []
+        while True:
+            for connection in idle[:]:
+                task = next(tasks, None)
+                if task is None:
+                    break
+                connection.send((function, task))
+                idle.remove(connection)
+                busy.append(connection)
+            if not busy:
+                return
+            for connection in wait(busy):
+                busy.remove(connection)
+                idle.append(connection)
+                yield connection.recv()
+
+    def close(self):
+        '''
+        Stop the workers and free the shared memory snapshot.
+        '''
+        for connection in self.connections:
+            try:
+                connection.send(None)
+            except OSError:
+                pass
+            connection.close()
+        for process in self.processes:
+            process.join(1)
+            if process.is_alive():
+                process.terminate()
+        self.processes, self.connections = [], []
+        if self.snapshot is not None:
+            self.snapshot.unlink()
+            self.snapshot = None
+
+    def _board_source(self, state):
+        '''
+        What tasks should rebuild state from: the name of this search's shared
+        memory snapshot, or a compact_board snapshot if there is no shared
+        memory. Workers only read it during a search, so it is rewritten
+        for each one.
+        '''
+        try:
+            if self.snapshot is None:
+                self.snapshot = SharedSnapshot(self.n)
+        except OSError:
+            return compact_board(state)
+        self.snapshot.write(state)
+        return self.snapshot.name
+
+    def search(self, state, ourPlayer: int, allotment: float = None):
+        '''
+        Best move for ourPlayer, as ([x, y, score, depth], completed depth),
+        searching for allotment CPU seconds over all workers (by default, a
+        new TimeManager's budget).
+        '''
+        if allotment is None:
+            allotment = TimeManager(self.n).start_move(state)
+        deadline = time.time() + allotment / self.workers
+        self.generation += 1
+
+        if self.mode == "lazy":
+            return self._lazy(state, ourPlayer, deadline)
+        return self._split(state, ourPlayer, deadline)
+
+    def _lazy(self, state, ourPlayer, deadline):
+        self.table.generation = self.generation
+        compact = self._board_source(state)
+        tasks = [(compact, ourPlayer, deadline, self.generation, k) for k in range(self.workers)]
+
+        best, bestDepth = None, -1
+        for result, depth, cpu in self._run(_lazy_task, tasks):
+            self.workerTime += cpu
+            if depth > bestDepth:
+                best, bestDepth = result, depth
+        return best, bestDepth
+
+    def _split(self, state, ourPlayer, deadline):
+        compact = self._board_source(state)
+        moves = hexes_by_involvement(state)
+        empty = len(moves)
+
+        best, bestDepth = [moves[0][0], moves[0][1], 0, 0], 0
+        for maxDepth in range(1, empty + 1):
+            self.alpha.value = -Infinity
+            task = lambda move: (compact, move, ourPlayer, maxDepth, deadline, self.generation)
+
+            # the best move so far sets alpha for everything else
+            results = list(self._run(_split_task, [task(moves[0])]))
+            if results[0][1] is not None:
+                results += self._run(_split_task, map(task, moves[1:]))
+            self.workerTime += sum(cpu for _, _, _, cpu in results)
+
+            # an unfinished depth is thrown away, like iterative_deepening
+            if any(score is None for _, score, _, _ in results):
+                break
+
+            # the best exact score wins, ties going to the earlier (better ordered) move
+            scores = {move: score for move, score, _, _ in results}
+            exact = {move for move, _, isExact, _ in results if isExact}
+            top = max((move for move in moves if move in exact), key=lambda move: scores[move])
+            best, bestDepth = [top[0], top[1], scores[top], maxDepth], maxDepth
+            moves.sort(key=lambda move: scores[move], reverse=True)
+
+            # a forced win or loss will not change with a deeper search
+            if abs(best[2]) >= 10000 or time.time() >= deadline:
+                break
+
+        return best, bestDepth
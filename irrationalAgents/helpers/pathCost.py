@@ -0,0 +1,116 @@
+from collections import deque
+from math import inf
+
+# Internal "unreachable" cost (kept an int so sums stay cheap)
+INF = 1 << 30
+
+# Cost of entering a cell for each colour, indexed by the token it holds:
+# 0 for our own token, 1 for an empty cell, impossible for the opponent's
+WEIGHTS = {1: (1, 0, INF), 2: (1, INF, 0)}
+
+
+def getPathCost(color: int, board, withPath: bool = False):
+    '''
+    Number of hexes `color` still needs to complete its shortest path between
+    its two edges - the same value as evaluation.getDijkstraDistance, found
+    with a 0-1 BFS over flat cell indices instead of a priority queue.
+    With withPath, returns (cost, [coords along the path]) instead
+    (the path is None if there is no way through).
+    '''
+    cost, path = _search(board.topology, board.paths.cells, color, withPath)
+    return (cost, path) if withPath else cost
+
+def getPathCosts(board, withPath: bool = False) -> dict:
+    '''
+    getPathCost for both colours in one call, as {1: red, 2: blue}.
+    '''
+    topology, cells = board.topology, board.paths.cells
+    costs = {}
+    for color in (1, 2):
+        cost, path = _search(topology, cells, color, withPath)
+        costs[color] = (cost, path) if withPath else cost
+    return costs
+
+def cellsPathCost(topology, cells: list, color: int):
+    '''
+    getPathCost for a flat list of cell tokens rather than a board.
+    '''
+    return _search(topology, cells, color, False)[0]
+
+def fillDistances(topology, cells: list, color: int, reverse: bool = False) -> list:
+    '''
+    Path cost from color's start edge (or its end edge, with reverse) to every
+    cell, including the cost of the cell itself (INF where unreachable).
+    '''
+    weights, neighbours = WEIGHTS[color], topology.neighbours
+    if color == 1:
+        sources = topology.red_end if reverse else topology.red_start
+    else:
+        sources = topology.blue_end if reverse else topology.blue_start
+    dist = [INF] * topology.size
+    queue = deque()
+    for i in sources:
+        cost = weights[cells[i]]
+        if cost < dist[i]:
+            dist[i] = cost
+            queue.appendleft(i) if cost == 0 else queue.append(i)
+
+    while queue:
+        u = queue.popleft()
+        d = dist[u]
+        for v in neighbours[u]:
+            cost = weights[cells[v]]
+            if d + cost < dist[v]:
+                dist[v] = d + cost
+                queue.appendleft(v) if cost == 0 else queue.append(v)
+
+    return dist
+
+def _search(topology, cells: list, color: int, withPath: bool):
+    '''
+    0-1 BFS from color's start edge that stops at the first far-edge cell
+    taken off the deque. Returns (cost, path or None).
+    '''
+    n, weights, neighbours = topology.n, WEIGHTS[color], topology.neighbours
+    if color == 1:
+        sources = topology.red_start
+        isTarget = lambda i: i >= n * (n - 1)
+    else:
+        sources = topology.blue_start
+        isTarget = lambda i: i % n == n - 1
+
+    dist = [INF] * topology.size
+    done = [False] * topology.size
+    parent = [-1] * topology.size if withPath else None
+    queue = deque()
+    for i in sources:
+        cost = weights[cells[i]]
+        if cost < INF:
+            dist[i] = cost
+            queue.appendleft(i) if cost == 0 else queue.append(i)
+
+    while queue:
+        u = queue.popleft()
+        if done[u]:
+            continue
+        done[u] = True
+        d = dist[u]
+
+        if isTarget(u):
+            if not withPath:
+                return d, None
+            path = []
+            while u != -1:
+                path.append(topology.coords[u])
+                u = parent[u]
+            return d, path[::-1]
+
+        for v in neighbours[u]:
+            cost = weights[cells[v]]
+            if d + cost < dist[v]:
+                dist[v] = d + cost
+                if withPath:
+                    parent[v] = u
+                queue.appendleft(v) if cost == 0 else queue.append(v)
+
+    return inf, None
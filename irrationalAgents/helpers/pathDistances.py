@@ -0,0 +1,208 @@
+from heapq import heappush, heappop
+from math import inf
+from irrationalAgents.helpers.pathCost import INF as _INF, WEIGHTS, fillDistances
+
+
+class DistanceMap:
+    '''
+    Shortest path cost from one colour's start edge to every cell, in the same
+    terms as evaluation.getDijkstraDistance: a path pays 0 to enter one of our
+    own cells, 1 to enter an empty cell and cannot enter an opponent's cell.
+
+    The map is repaired in place when cells change (see update), so reading
+    the distance to the far edge does not need a fresh search.
+    '''
+    def __init__(self, topology, colour: int, cells: list):
+        self.colour = colour
+        self.cells = cells
+        self.topology = topology
+        self.neighbours = topology.neighbours
+        if colour == 1:
+            self.sources, self.targets = topology.red_start, topology.red_end
+        else:
+            self.sources, self.targets = topology.blue_start, topology.blue_end
+        self.isSource = [False] * topology.size
+        for i in self.sources:
+            self.isSource[i] = True
+
+        self.weights = WEIGHTS[colour]
+        self.dist = [_INF] * topology.size
+        self.rebuild()
+
+    def distance(self):
+        '''
+        Cost of the cheapest path to the far edge (math.inf if there is none).
+        '''
+        dist = self.dist
+        best = min(dist[i] for i in self.targets)
+        return inf if best >= _INF else best
+
+    def rebuild(self):
+        '''
+        Recompute every distance from scratch with a 0-1 BFS.
+        '''
+        # overwrite in place, journals keep references to this list
+        self.dist[:] = fillDistances(self.topology, self.cells, self.colour)
+
+    def update(self, changed: list, journal: list):
+        '''
+        Repair the map after the tokens in `changed` (flat indices) changed.
+        Every overwritten distance is appended to journal as (dist, index, old)
+        so the change can be rolled back.
+        '''
+        cells, weights, neighbours, dist = self.cells, self.weights, self.neighbours, self.dist
+        isSource = self.isSource
+
+        # Phase 1: find cells whose distance may have gone up. A cell is only
+        # affected if every cell it was reached through is affected. Levels are
+        # visited in order of old distance so that decision is final; cells we
+        # own (0 cost) are invalidated with their parent to keep groups simple.
+        affected = set(changed)
+        heap = [(dist[i], i) for i in changed if dist[i] < _INF]
+        heap.sort()
+        while heap:
+            d, u = heappop(heap)
+            for v in neighbours[u]:
+                dv = dist[v]
+                if v in affected or dv >= _INF:
+                    continue
+                cost = weights[cells[v]]
+                if dv != d + cost:
+                    continue
+                if cost and (isSource[v] and dv == cost or any(
+                        x not in affected and dist[x] + cost == dv for x in neighbours[v])):
+                    continue
+                affected.add(v)
+                heappush(heap, (dv, v))
+
+        for i in affected:
+            journal.append((dist, i, dist[i]))
+            dist[i] = _INF
+
+        # Phase 2: give affected cells their best value from the surviving
+        # cells, then propagate any improvement outwards (Dijkstra).
+        for v in affected:
+            cost = weights[cells[v]]
+            if cost >= _INF:
+                continue
+            best = cost if isSource[v] else _INF
+            for x in neighbours[v]:
+                if dist[x] + cost < best:
+                    best = dist[x] + cost
+            if best < _INF:
+                dist[v] = best
+                heappush(heap, (best, v))
+
+        while heap:
+            d, u = heappop(heap)
+            if d > dist[u]:
+                continue
+            for v in neighbours[u]:
+                nd = d + weights[cells[v]]
+                if nd < dist[v]:
+                    journal.append((dist, v, dist[v]))
+                    dist[v] = nd
+                    heappush(heap, (nd, v))
+
+
+class PathDistances:
+    '''
+    Distance maps for both colours over one board, kept in step with it.
+    The board reports every move through place and reverts the most recent
+    one with undo (undo_move always reverts the latest move).
+
+    cells always follows the board, but the maps are only repaired when they
+    are read (maps or distance), one move at a time in the order they were
+    made. Moves that are undone before anything reads the maps, such as
+    those below a transposition table hit, cost nothing but their cells.
+    '''
+    def __init__(self, topology, cells: list):
+        self.cells = cells
+        self._maps = {colour: DistanceMap(topology, colour, cells) for colour in (1, 2)}
+        # the (flat index, old token, new token) of every cell changed, three
+        # entries each, where each move's changes start in them, and the
+        # journals of the moves the maps have been repaired for
+        self.changes = []
+        self.moves = []
+        self.frames = []
+
+    @property
+    def maps(self):
+        '''
+        The DistanceMap of each colour, repaired up to the latest move.
+        '''
+        if len(self.frames) < len(self.moves):
+            self._repair()
+        return self._maps
+
+    def distance(self, colour: int):
+        return self.maps[colour].distance()
+
+    def place(self, i: int, token: int, captured = ()):
+        '''
+        Record a stone of token placed at flat index i, which captured the
+        stones at the flat indices in captured.
+        '''
+        cells, changes = self.cells, self.changes
+        self.moves.append(len(changes))
+        changes.append(i)
+        changes.append(cells[i])
+        changes.append(token)
+        cells[i] = token
+        for j in captured:
+            changes.append(j)
+            changes.append(cells[j])
+            changes.append(0)
+            cells[j] = 0
+
+    def undo(self, i: int, captured = ()):
+        '''
+        Roll back the most recent place, of a stone at flat index i that
+        captured the stones at the flat indices in captured.
+        '''
+        if not self.moves:
+            # the move was made before a rebuild (e.g. undoing past a swap)
+            cells = self.cells[:]
+            for j in captured:
+                cells[j] = 3 - cells[i]
+            cells[i] = 0
+            self.rebuild(cells)
+            return
+
+        cells, changes, start = self.cells, self.changes, self.moves.pop()
+        if len(self.frames) > len(self.moves):
+            for values, i, old in reversed(self.frames.pop()):
+                values[i] = old
+        while len(changes) > start:
+            del changes[-1]
+            cells[changes[-2]] = changes[-1]
+            del changes[-2:]
+
+    def _repair(self):
+        '''
+        Repair the maps for the moves made since they were last read: take
+        cells back to before the first of them, and replay them one by one.
+        '''
+        cells, changes, moves = self.cells, self.changes, self.moves
+        pending = moves[len(self.frames):]
+        for k in range(len(changes) - 3, pending[0] - 1, -3):
+            cells[changes[k]] = changes[k + 1]
+        for start, end in zip(pending, pending[1:] + [len(changes)]):
+            for k in range(start, end, 3):
+                cells[changes[k]] = changes[k + 2]
+            changed = changes[start:end:3]
+            frame = []
+            for distanceMap in self._maps.values():
+                distanceMap.update(changed, frame)
+            self.frames.append(frame)
+
+    def rebuild(self, cells: list):
+        '''
+        Start again from a new set of cell tokens (e.g. after a swap).
+        '''
+        self.cells[:] = cells
+        self.changes = []
+        self.moves = []
+        self.frames = []
+        for distanceMap in self._maps.values():
+            distanceMap.rebuild()
@@ -0,0 +1,224 @@
+import time
+from math import inf
+from irrationalAgents.basicBoard import _SWAP_PLAYER, _TOKEN_MAP_OUT
+from irrationalAgents.helpers.batchEval import evaluateChildren
+from irrationalAgents.helpers.minimax import SearchTimeout, evaluate, hexes_by_involvement, prune_moves
+from irrationalAgents.helpers.transposition import EXACT, LOWER, UPPER
+from irrationalAgents.constants import ASPIRATION_WINDOW, BATCH_LEAF_EVAL, SYMMETRIC_TT, VC_PRUNING
+from irrationalAgents.symmetry import COLOUR_IMAGES, IDENTITY, canonical, image_move
+
+# Score of a win, as minimax reports it. Inside the search a win at ply d
+# scores WIN - d for the winner, so that quicker wins (and slower losses) are
+# preferred, and anything within MAX_PLY of WIN is a win.
+WIN = 10000
+MAX_PLY = 1000
+
+# Width of the null window: scores are floats, so "better than alpha" is
+# "at least alpha + NULL_WINDOW"
+NULL_WINDOW = 1e-6
+
+
+def pvs(state, ourPlayer: int, maxDepth: int, a: float = -inf, b: float = inf, table = None,
+        pv: list = None, ordering = None):
+    '''
+    Principal variation search of state to maxDepth plies, for ourPlayer to move.
+    A drop-in for minimax from the root: returns ([x, y, score, depth], line),
+    where score is w.r.t ourPlayer (+/-10000 for a forced win/loss, depth then
+    being the ply it happens at) and line is the principal variation, the
+    moves both sides are expected to play from here.
+
+    The search is negamax: every node scores the position for the player to
+    move, as the evaluation w.r.t ourPlayer or its negation. After a node's
+    first move, the others are only tested with a null window around alpha
+    (is this move any better?), and searched again with the full window when
+    one is. pv (a line from an earlier search, e.g. the last iteration) is
+    tried first along its own path.
+    '''
+    score, line = _negamax(state, 0, None, a, b, ourPlayer, ourPlayer, maxDepth, table, pv, ordering)
+    if not line:
+        line = [hexes_by_involvement(state)[0]]
+    depth = maxDepth
+    if abs(score) >= WIN - MAX_PLY:
+        depth = WIN - abs(score)
+        score = WIN if score > 0 else -WIN
+    return [line[0][0], line[0][1], score, depth], line
+
+def aspiration_search(state, ourPlayer: int, maxDepth: int, previous: float = None, table = None,
+        pv: list = None, ordering = None, window: float = ASPIRATION_WINDOW):
+    '''
+    pvs with a window of +/- window around previous (e.g. the score two
+    iterations back: this evaluation swings between odd and even depths). A result outside the window only bounds the true score, so the
+    side that failed is widened (doubling each time) and the depth searched
+    again. Without a previous score (or after a forced win/loss), the window
+    is the full one.
+    '''
+    if previous is None or abs(previous) >= WIN:
+        return pvs(state, ourPlayer, maxDepth, table=table, pv=pv, ordering=ordering)
+
+    low, high = window, window
+    while True:
+        a, b = previous - low, previous + high
+        best, line = pvs(state, ourPlayer, maxDepth, a, b, table, pv, ordering)
+        if best[2] <= a and a > -inf:
+            low = inf if low > WIN else low * 2
+        elif best[2] >= b and b < inf:
+            high = inf if high > WIN else high * 2
+        else:
+            return best, line
+        pv = line
+
+def _negamax(state, depth: int, action: tuple, alpha: float, beta: float, curPlayer: int, ourPlayer: int,
+        maxDepth: int, table, pv: list, ordering) -> tuple:
+    '''
+    (score, line) of the position for curPlayer, who is to move: the score
+    (exact inside (alpha, beta), otherwise a bound on the side it failed)
+    and the principal variation from here.
+    '''
+    stats = state.stats
+    if stats is not None:
+        stats.node(depth)
+    sign = 1 if curPlayer == ourPlayer else -1
+
+    # Only the player who just moved can have completed a path
+    if state.turns_taken >= (2 * state.n - 1) and action is not None:
+        if stats is not None:
+            started = time.perf_counter()
+        lost = state.connectivity.connected(_SWAP_PLAYER[curPlayer])
+        if stats is not None:
+            stats.timed("win_check", started)
+        if lost:
+            return -(WIN - depth), []
+
+    if state.deadline is not None and time.process_time() > state.deadline:
+        raise SearchTimeout()
+
+    if depth >= maxDepth:
+        if stats is None:
+            return sign * evaluate(state, ourPlayer), []
+        started = time.perf_counter()
+        score = evaluate(state, ourPlayer)
+        stats.timed("evaluation", started)
+        stats.leaf_evals += 1
+        return sign * score, []
+
+    # Table entries are shared with minimax: scores w.r.t ourPlayer, with
+    # any win as +/-10000 (read back as a win at this ply)
+    remaining = maxDepth - depth
+    ttMove = None
+    if table is not None:
+        key, image = canonical(state, COLOUR_IMAGES) if SYMMETRIC_TT else (state.hash, IDENTITY)
+        entry = table.lookup(key)
+        if entry is not None:
+            _, entryDepth, entryScore, bound, ttMove = entry
+            if image:
+                ttMove = image_move(ttMove, image, state.n)
+            if depth > 0 and entryDepth >= remaining:
+                score = sign * entryScore
+                if abs(score) >= WIN:
+                    score = WIN - depth if score > 0 else -(WIN - depth)
+                if sign < 0 and bound != EXACT:
+                    bound = LOWER if bound == UPPER else UPPER
+                if bound == EXACT or (bound == LOWER and score >= beta) or (bound == UPPER and score <= alpha):
+                    if stats is not None:
+                        stats.tt_hits += 1
+                    return score, [ttMove]
+
+    if stats is not None:
+        started = time.perf_counter()
+    pvMove = pv[0] if pv else None
+    if ordering is not None:
+        moves = ordering.order(state, depth, curPlayer, (pvMove, ttMove))
+    else:
+        moves = hexes_by_involvement(state)
+        for preferred in (ttMove, pvMove):
+            if preferred in moves:
+                moves.remove(preferred)
+                moves.insert(0, preferred)
+    if VC_PRUNING and depth > 0:
+        moves = prune_moves(state, moves, curPlayer)
+    if stats is not None:
+        stats.timed("move_generation", started)
+    if not moves:
+        return sign * evaluate(state, ourPlayer), []
+
+    # Children at the depth limit are all scored together in one batch
+    # (moves that capture come back as None and are played out as usual)
+    if BATCH_LEAF_EVAL and depth + 1 >= maxDepth:
+        if stats is not None:
+            started = time.perf_counter()
+        leafScores = evaluateChildren(state, moves, curPlayer, ourPlayer)
+        if stats is not None:
+            stats.timed("evaluation", started)
+            stats.leaf_evals += len(moves) - leafScores.count(None)
+    else:
+        leafScores = [None] * len(moves)
+
+    a = alpha
+    best, line = -inf, [moves[0]]
+    for k, move in enumerate(moves):
+        childPv = pv[1:] if pv and move == pvMove else None
+        if leafScores[k] is not None:
+            score, childLine = sign * leafScores[k], []
+            if abs(score) >= WIN:
+                score = WIN - depth - 1 if score > 0 else -(WIN - depth - 1)
+        elif best == -inf:
+            score, childLine = _child(state, depth, move, -beta, -a, curPlayer, ourPlayer, maxDepth, table, childPv, ordering)
+        else:
+            # is this move any better than the best so far? only then find out by how much
+            score, childLine = _child(state, depth, move, -a - NULL_WINDOW, -a, curPlayer, ourPlayer, maxDepth, table, childPv, ordering)
+            if a < score < beta:
+                score, childLine = _child(state, depth, move, -beta, -score, curPlayer, ourPlayer, maxDepth, table, childPv, ordering)
+
+        if score > best:
+            best, line = score, [move] + childLine
+        if best > a:
+            a = best
+        if a >= beta:
+            if ordering is not None:
+                ordering.cutoff(move, depth, remaining, curPlayer)
+            if stats is not None:
+                stats.cutoff(k)
+            break
+
+    if stats is not None:
+        stats.searched(k + 1)
+
+    if table is not None:
+        if best >= beta:
+            bound = LOWER
+        elif best <= alpha:
+            bound = UPPER
+        else:
+            bound = EXACT
+        stored = sign * best
+        if abs(stored) >= WIN - MAX_PLY:
+            stored = WIN if stored > 0 else -WIN
+        if sign < 0 and bound != EXACT:
+            bound = LOWER if bound == UPPER else UPPER
+        table.store(key, remaining, stored, bound, image_move(line[0], image, state.n))
+
+    return best, line
+
+def _child(state, depth: int, move: tuple, alpha: float, beta: float, curPlayer: int, ourPlayer: int,
+        maxDepth: int, table, pv: list, ordering) -> tuple:
+    '''
+    Play move for curPlayer, search the resulting position for the opponent
+    in (alpha, beta) and take the move back. Returns (score, line) for curPlayer.
+    '''
+    stats = state.stats
+    if stats is not None:
+        started = time.perf_counter()
+    action = ("PLACE", move[0], move[1])
+    played = state.handle_action(action, _TOKEN_MAP_OUT[curPlayer])
+    if stats is not None:
+        stats.timed("make_unmake", started)
+    try:
+        score, line = _negamax(state, depth + 1, action, alpha, beta, _SWAP_PLAYER[curPlayer], ourPlayer,
+            maxDepth, table, pv, ordering)
+        return -score, line
+    finally:
+        if stats is not None:
+            started = time.perf_counter()
+        state.undo_move(played)
+        if stats is not None:
+            stats.timed("make_unmake", started)
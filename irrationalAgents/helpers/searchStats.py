@@ -0,0 +1,120 @@
+import sys
+import json
+import time
+
+# Phases of the search that are timed separately
+PHASES = ("move_generation", "evaluation", "win_check", "make_unmake")
+
+
+class SearchStats:
+    '''
+    Counters for one move's search, filled in by minimax when a board's
+    `stats` attribute is set (it is None by default, which costs minimax
+    one attribute check per node):
+
+      nodes           positions visited, per depth from the root
+      leaf_evals      positions scored by the evaluation, one by one or batched
+      cutoffs         alpha-beta cutoffs, and at which move of the ordered list
+                      each one happened (0 = the first move tried)
+      tt_hits         transposition table results used without searching
+      eval_cache      evaluation scores found in (hits) and missing from
+                      (misses) the board's evalCache, if it has one
+      phase times     seconds spent in each of PHASES
+      branching       children searched per interior (expanded) node
+      pv              principal variation of the last completed iteration
+                      (set by helpers.deepening when searching with pvs)
+      worker seconds  CPU time used by worker processes, which the referee
+                      doesn't see (set by minimaxAgent.ParallelPlayer)
+      endgame         nodes the endgame solver searched, and whether it found
+                      the position won (None if unknown or out of time; set
+                      by minimaxAgent.Player.solve)
+
+    record() turns them into one flat dict per move, and emit() logs it.
+    '''
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.nodes = []
+        self.leaf_evals = 0
+        self.cutoffs = 0
+        self.cutoff_positions = []
+        self.tt_hits = 0
+        self.eval_hits = 0
+        self.eval_misses = 0
+        self.expanded = 0
+        self.children = 0
+        self.times = dict.fromkeys(PHASES, 0.0)
+        self.pv = None
+        self.worker_seconds = 0.0
+        self.endgame_nodes = 0
+        self.solved = None
+        self.started = time.process_time()
+
+    def node(self, depth: int):
+        nodes = self.nodes
+        while len(nodes) <= depth:
+            nodes.append(0)
+        nodes[depth] += 1
+
+    def timed(self, phase: str, started: float):
+        '''
+        Add the time since `started` (a time.perf_counter() reading) to phase.
+        '''
+        self.times[phase] += time.perf_counter() - started
+
+    def cutoff(self, index: int):
+        self.cutoffs += 1
+        positions = self.cutoff_positions
+        while len(positions) <= index:
+            positions.append(0)
+        positions[index] += 1
+
+    def eval_cached(self, hit: bool):
+        if hit:
+            self.eval_hits += 1
+        else:
+            self.eval_misses += 1
+
+    def searched(self, children: int):
+        '''
+        An interior node searched `children` of its moves.
+        '''
+        self.expanded += 1
+        self.children += children
+
+    def record(self, **extra) -> dict:
+        '''
+        Everything collected since the last reset as one dict, plus extra
+        fields (e.g. the move played and the depth reached).
+        '''
+        record = dict(extra)
+        record.update({
+            "cpu_seconds": time.process_time() - self.started,
+            "nodes": sum(self.nodes),
+            "nodes_per_depth": list(self.nodes),
+            "leaf_evals": self.leaf_evals,
+            "cutoffs": self.cutoffs,
+            "cutoff_positions": list(self.cutoff_positions),
+            "first_move_cutoff_rate": self.cutoff_positions[0] / self.cutoffs if self.cutoffs else None,
+            "tt_hits": self.tt_hits,
+            "eval_cache_hits": self.eval_hits,
+            "eval_cache_misses": self.eval_misses,
+            "branching_factor": self.children / self.expanded if self.expanded else None,
+            "pv": self.pv,
+            "worker_seconds": self.worker_seconds,
+            "endgame_nodes": self.endgame_nodes,
+            "solved": self.solved,
+        })
+        record.update({f"{phase}_seconds": seconds for phase, seconds in self.times.items()})
+        return record
+
+    def emit(self, **extra):
+        '''
+        Log record(**extra) as one JSON line through the referee's StarLog.
+        '''
+        # imported here so agents don't depend on the referee unless stats are on
+        from referee.log import StarLog
+        # StarLog's default file is sys.stdout as it was at import, which misses
+        # any redirection since (e.g. the tournament's, per game)
+        StarLog(file=sys.stdout, star="* stats").print(json.dumps(self.record(**extra)))
@@ -0,0 +1,95 @@
+import time
+from irrationalAgents.constants import TIME_EXTENSION, TIME_LIMIT, TIME_MIN_MOVES, TIME_RESERVE, TIME_SWING
+
+
+class TimeManager:
+    '''
+    CPU time used by one player over a game, and the budget each move gets.
+
+    The referee's clock counts every call it makes into the player
+    (__init__, action and turn), so the player runs each of them inside
+    `with manager:` and the time is added to `used`. The limit is
+    TIME_LIMIT, or n * n seconds if that is None, less a reserve of
+    TIME_RESERVE of it that is never handed out (it covers turn updates
+    and searches overrunning their deadline by a node). CPU time used on
+    the player's behalf by other processes is added with charge, so budgets
+    come out of the same total.
+
+    A move's budget is an even share of the time left over the moves we
+    can still expect to make: one for every two empty cells, but never
+    fewer than TIME_MIN_MOVES. A search that finds the position critical
+    can extend it (see extend) to TIME_EXTENSION times that, but never past
+    half of the time left, so the game as a whole can't run out.
+    '''
+    def __init__(self, n: int, limit: float = TIME_LIMIT):
+        self.limit = (limit if limit is not None else n * n) * (1 - TIME_RESERVE)
+        self.used = 0.0
+        self.started = None
+        self.moveStarted = 0.0
+        self.budget = 0.0
+        self.maximum = 0.0
+
+    def __enter__(self):
+        self.started = time.process_time()
+        return self
+
+    def __exit__(self, *exc):
+        self.used += time.process_time() - self.started
+        self.started = None
+
+    def spent(self) -> float:
+        '''
+        CPU seconds used so far, including the call in progress.
+        '''
+        if self.started is None:
+            return self.used
+        return self.used + time.process_time() - self.started
+
+    def charge(self, seconds: float):
+        '''
+        Count CPU seconds used elsewhere on our behalf (e.g. by worker
+        processes, which the referee doesn't time) as used.
+        '''
+        self.used += seconds
+
+    def remaining(self) -> float:
+        '''
+        CPU seconds that can still be handed out.
+        '''
+        return max(0.0, self.limit - self.spent())
+
+    def moves_left(self, state) -> int:
+        empty = state.n * state.n - len(state.occupied_hexes)
+        return max(TIME_MIN_MOVES, (empty + 1) // 2)
+
+    def start_move(self, state) -> float:
+        '''
+        Budget the move about to be searched on state, from now on.
+        Returns the budget in CPU seconds (see deadline).
+        '''
+        remaining = self.remaining()
+        self.moveStarted = time.process_time()
+        self.budget = remaining / self.moves_left(state)
+        self.maximum = min(TIME_EXTENSION * self.budget, remaining / 2)
+        return self.budget
+
+    def deadline(self) -> float:
+        '''
+        The process_time at which the move's budget runs out, for a search
+        to compare the clock against (e.g. as a board's deadline).
+        '''
+        return self.moveStarted + self.budget
+
+    def extend(self, scores: list) -> bool:
+        '''
+        Give the move its maximum budget if the last of scores (one per
+        completed iteration of a search) is TIME_SWING or more away from
+        the one two iterations before it, the last at the same parity.
+        Returns whether the budget was extended.
+        '''
+        if len(scores) < 3 or self.budget >= self.maximum:
+            return False
+        if abs(scores[-1] - scores[-3]) < TIME_SWING:
+            return False
+        self.budget = self.maximum
+        return True
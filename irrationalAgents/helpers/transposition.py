@@ -0,0 +1,122 @@
+import multiprocessing
+import struct
+from irrationalAgents.constants import TT_SIZE, TT_REPLACEMENT
+
+# Bound types for stored scores
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+class TranspositionTable:
+    '''
+    Fixed-size table of minimax results keyed by a board's Zobrist hash.
+    Each slot holds (hash, depth, score, bound, move), where depth is the number
+    of plies searched below the position and move the best (x, y) found.
+
+    Replacement policies:
+      "always" - a new result always overwrites the slot.
+      "depth"  - keep the deeper result, unless the stored one is from an
+                 earlier search (see new_search), so stale entries age out.
+    '''
+    def __init__(self, size: int = TT_SIZE, replacement: str = TT_REPLACEMENT):
+        if replacement not in ("always", "depth"):
+            raise ValueError(f"unknown replacement policy {replacement!r}")
+
+        # round size up to a power of two so slots can be found with a mask
+        self.size = 1 << max(0, size - 1).bit_length()
+        self.mask = self.size - 1
+        self.replacement = replacement
+        self.generation = 0
+        self.slots = [None] * self.size
+        self.ages = [0] * self.size
+
+    def new_search(self):
+        '''
+        Mark the start of a new search (e.g. a new call to Player.action).
+        '''
+        self.generation += 1
+
+    def lookup(self, key: int):
+        '''
+        Returns the (hash, depth, score, bound, move) entry for key, or None.
+        '''
+        entry = self.slots[key & self.mask]
+        if entry is not None and entry[0] == key:
+            return entry
+        return None
+
+    def store(self, key: int, depth: int, score: float, bound: int, move: tuple):
+        slot = key & self.mask
+        entry = self.slots[slot]
+        if self.replacement == "depth" and entry is not None and entry[0] != key \
+                and self.ages[slot] == self.generation and entry[1] > depth:
+            return
+        self.slots[slot] = (key, depth, score, bound, move)
+        self.ages[slot] = self.generation
+
+    def clear(self):
+        self.slots = [None] * self.size
+        self.ages = [0] * self.size
+
+
+class SharedTranspositionTable:
+    '''
+    TranspositionTable with its slots in shared memory, for several worker
+    processes searching the same position at once (lazy SMP). Same lookup/
+    store interface; moves are stored as flat cell indices, so the table
+    is tied to a board size n.
+
+    Slots are read and written without locks. Each slot keeps its data
+    word and score next to hash ^ data ^ score, so a slot torn by two
+    writers no longer matches its key and simply reads as a miss.
+    '''
+    def __init__(self, n: int, size: int = TT_SIZE, replacement: str = TT_REPLACEMENT):
+        if replacement not in ("always", "depth"):
+            raise ValueError(f"unknown replacement policy {replacement!r}")
+
+        self.n = n
+        self.size = 1 << max(0, size - 1).bit_length()
+        self.mask = self.size - 1
+        self.replacement = replacement
+        self.generation = 0
+
+        # created in the parent; pass the table to pool workers (e.g. through
+        # an initializer) rather than with each task
+        self.checks = multiprocessing.Array("Q", self.size, lock=False)
+        self.data = multiprocessing.Array("Q", self.size, lock=False)
+        self.scores = multiprocessing.Array("Q", self.size, lock=False)
+
+    def new_search(self):
+        self.generation += 1
+
+    def lookup(self, key: int):
+        '''
+        Returns the (hash, depth, score, bound, move) entry for key, or None.
+        '''
+        slot = key & self.mask
+        data, scoreBits = self.data[slot], self.scores[slot]
+        if data == 0 or self.checks[slot] != key ^ data ^ scoreBits:
+            return None
+        move = (data >> 16) & 0xFFFF
+        score = struct.unpack("<d", struct.pack("<Q", scoreBits))[0]
+        return (key, data & 0xFF, score, (data >> 8) & 0xFF, divmod(move, self.n))
+
+    def store(self, key: int, depth: int, score: float, bound: int, move: tuple):
+        slot = key & self.mask
+        if self.replacement == "depth":
+            old = self.data[slot]
+            if old and self.checks[slot] != key ^ old ^ self.scores[slot] \
+                    and (old >> 32) & 0xFFFF == self.generation & 0xFFFF and (old & 0xFF) > depth:
+                return
+
+        # depth | bound | move | generation, and never 0 so empty slots miss
+        data = min(depth, 0xFF) | bound << 8 | (move[0] * self.n + move[1]) << 16 | \
+            (self.generation & 0xFFFF) << 32 | 1 << 48
+        scoreBits = struct.unpack("<Q", struct.pack("<d", score))[0]
+        self.data[slot] = data
+        self.scores[slot] = scoreBits
+        self.checks[slot] = key ^ data ^ scoreBits
+
+    def clear(self):
+        for array in (self.checks, self.data, self.scores):
+            array[:] = [0] * self.size
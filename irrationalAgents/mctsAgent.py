@@ -0,0 +1,72 @@
+from irrationalAgents.helpers.mcts import MonteCarloTree
+from irrationalAgents.helpers.minimax import hexes_by_involvement
+from irrationalAgents.helpers.openingBook import OpeningBook
+from irrationalAgents.helpers.timeManager import TimeManager
+from irrationalAgents.basicBoard import Board
+from irrationalAgents.constants import OPENING_BOOK
+import time
+
+class Player:
+    # board engine used for the internal game state
+    boardClass = Board
+
+    def __init__(self, player, n):
+        """
+        Called once at the beginning of a game to initialise this player.
+        Set up an internal representation of the game state.
+
+        The parameter player is the string "red" if your player will
+        play as Red, or the string "blue" if your player will play
+        as Blue.
+
+        Select this player with `irrationalAgents.mctsAgent`.
+        """
+        # the referee's clock runs during every call into the player, so ours does too
+        self.clock = TimeManager(n)
+        with self.clock:
+            self.playerColour = player
+            self.board = self.boardClass(n)
+
+            # kept between turns, re-rooted on every move played
+            self.tree = MonteCarloTree(self.board)
+            self.book = OpeningBook(n) if OPENING_BOOK else None
+
+
+    def action(self):
+        """
+        Called at the beginning of your turn. Based on the current state
+        of the game, select an action to play.
+        """
+        with self.clock:
+            bookAction = self.book.lookup(self.board) if self.book is not None else None
+            if self.clock.remaining() <= 0:
+                position = hexes_by_involvement(self.board)[0]
+            elif bookAction == ("STEAL", ):
+                return bookAction
+            elif bookAction is not None:
+                position = bookAction[1:]
+            else:
+                start = time.process_time()
+                position, playouts = self.tree.search(self.clock.start_move(self.board))
+                elapsed = time.process_time() - start
+
+                print(f"Playouts = {playouts} ({playouts / max(elapsed, 1e-9):.0f}/s)")
+
+        return ("PLACE", position[0], position[1]) 
+
+
+    
+    def turn(self, player, action):
+        """
+        Called at the end of each player's turn to inform this player of 
+        their chosen action. Update your internal representation of the 
+        game state based on this. The parameter action is the chosen 
+        action itself. 
+        
+        Note: At the end of your player's turn, the action parameter is
+        the same as what your player returned from the action method
+        above. However, the referee has validated it at this point.
+        """
+        with self.clock:
+            self.board.handle_action(action, player)
+            self.tree.advance(action)
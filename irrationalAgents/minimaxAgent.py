@@ -1,11 +1,22 @@
-from numpy import Infinity
-from irrationalAgents.constants import DEPTH1, DEPTH2, DEPTH3, DEPTH4
-from irrationalAgents.helpers.minimax import empty_hexes, hexes_by_involvement, minimax
-from irrationalAgents.helpers.pieces import opponentEdge
+from irrationalAgents.helpers.deepening import iterative_deepening
+from irrationalAgents.helpers.minimax import SearchTimeout, empty_hexes, hexes_by_involvement
 from irrationalAgents.basicBoard import _TOKEN_MAP_IN, Board
-import time
+from irrationalAgents.bitBoard import BitBoard
+from irrationalAgents.helpers.transposition import TranspositionTable
+from irrationalAgents.helpers.moveOrdering import MoveOrdering
+from irrationalAgents.helpers.parallel import ParallelSearch
+from irrationalAgents.helpers.searchStats import SearchStats
+from irrationalAgents.helpers.openingBook import OpeningBook
+from irrationalAgents.helpers.endgame import EndgameSolver
+from irrationalAgents.helpers.evalCache import EvalCache
+from irrationalAgents.helpers.timeManager import TimeManager
+from irrationalAgents.constants import ENDGAME_EMPTY, ENDGAME_SHARE, EVAL_CACHE_MB, OPENING_BOOK, SEARCH_STATS
+import weakref
 
 class Player:
+    # board engine used for the internal game state
+    boardClass = Board
+
     def __init__(self, player, n):
         """
         Called once at the beginning of a game to initialise this player.
@@ -15,9 +26,23 @@ class Player:
         play as Red, or the string "blue" if your player will play
         as Blue.
         """
-        self.playerColour = player
-        self.player = _TOKEN_MAP_IN[self.playerColour]
-        self.board = Board(n)
+        # the referee's clock runs during every call into the player, so ours does too
+        self.clock = TimeManager(n)
+        with self.clock:
+            self.playerColour = player
+            self.player = _TOKEN_MAP_IN[self.playerColour]
+            self.board = self.boardClass(n)
+
+            # kept between turns so earlier searches keep paying off
+            self.table = TranspositionTable()
+            self.ordering = MoveOrdering(n)
+            self.book = OpeningBook(n) if OPENING_BOOK else None
+            self.endgame = EndgameSolver()
+            self.endgameSpent = 0.0
+            if EVAL_CACHE_MB:
+                self.board.evalCache = EvalCache()
+            if SEARCH_STATS:
+                self.board.stats = SearchStats()
 
 
     def action(self):
@@ -25,34 +50,71 @@ class Player:
         Called at the beginning of your turn. Based on the current state
         of the game, select an action to play.
         """
-        self.board.moveStart = time.process_time()
-        if ((self.board.randomLimit - (self.board.totalTime)) <= 0 ):
-            position = hexes_by_involvement(self.board)[0]
-        elif self.board.turns_taken == 0:
-            position = (0,0)
-        elif self.board.turns_taken == 1:
-            return ("STEAL", )
-        else:
-            numHexes = self.board.n * self.board.n - len(self.board.occupied_hexes)
-
-            maxDepth = 5
-            if numHexes > DEPTH4:
-                maxDepth = 4
-            if numHexes > DEPTH3:
-                maxDepth = 3
-            if numHexes > DEPTH2:
-                maxDepth = 2
-            if numHexes > DEPTH1:
-                maxDepth = 1
-
-            print(f"Maxdepth = {maxDepth}")
-
-            position = minimax(self.board, 0, None, -Infinity, +Infinity, self.player, self.player, maxDepth)
-
-        self.board.totalTime = self.board.totalTime + (time.process_time() - self.board.moveStart)
+        with self.clock:
+            stats = self.board.stats
+            if stats is not None:
+                stats.reset()
+            maxDepth = score = None
+            bookAction = self.book.lookup(self.board) if self.book is not None else None
+            if self.clock.remaining() <= 0:
+                position = hexes_by_involvement(self.board)[0]
+                mode = "fallback"
+            elif bookAction == ("STEAL", ):
+                if stats is not None:
+                    stats.emit(turn=self.board.turns_taken, move="STEAL", mode="book")
+                return bookAction
+            elif bookAction is not None:
+                position = bookAction[1:]
+                mode = "book"
+            else:
+                position = None
+                if len(empty_hexes(self.board)) <= ENDGAME_EMPTY:
+                    position, mode = self.solve(), "solved"
+                if position is None:
+                    position, maxDepth = self.search()
+                    score, mode = position[2], "search"
+
+                    print(f"Maxdepth = {maxDepth}")
+
+            if stats is not None:
+                stats.emit(turn=self.board.turns_taken, move=[position[0], position[1]], mode=mode,
+                    depth=maxDepth, score=score, total_time=self.clock.spent())
 
         return ("PLACE", position[0], position[1]) 
 
+    def solve(self):
+        """
+        Try to solve the current position exactly, within ENDGAME_SHARE of the
+        time left in the game, and of the game's time limit over all tries.
+        Returns a winning (r, q), or None if there is none or it couldn't be
+        found in time (the search that follows is then budgeted from what is
+        left).
+        """
+        clock = self.clock
+        allotment = min(ENDGAME_SHARE * clock.remaining(), ENDGAME_SHARE * clock.limit - self.endgameSpent)
+        if allotment <= 0:
+            return None
+        started = clock.spent()
+        try:
+            r, q, won = self.endgame.solve(self.board, self.player, allotment)
+        except SearchTimeout:
+            won = None
+        self.endgameSpent += clock.spent() - started
+        stats = self.board.stats
+        if stats is not None:
+            stats.endgame_nodes, stats.solved = self.endgame.nodes, won
+        if won:
+            return (r, q)
+        return None
+
+    def search(self):
+        """
+        Search the current position, returning ([x, y, score, depth], depth reached).
+        """
+        self.table.new_search()
+        self.ordering.new_search()
+        return iterative_deepening(self.board, self.player, self.table, ordering=self.ordering, clock=self.clock)
+
 
     
     def turn(self, player, action):
@@ -66,6 +128,39 @@ class Player:
         the same as what your player returned from the action method
         above. However, the referee has validated it at this point.
         """
-        self.board.handle_action(action, player)
+        with self.clock:
+            self.board.handle_action(action, player)
+
 
+class BitboardPlayer(Player):
+    '''
+    Same agent, searching on the integer bitboard engine instead of the NumPy
+    board. Select it with `irrationalAgents.minimaxAgent:BitboardPlayer`.
+    '''
+    boardClass = BitBoard
+
+
+class ParallelPlayer(Player):
+    '''
+    Same agent, searching on a pool of worker processes (see
+    helpers.parallel.ParallelSearch, PARALLEL_WORKERS and PARALLEL_MODE).
+    Select it with `irrationalAgents.minimaxAgent:ParallelPlayer`.
+    '''
+    def __init__(self, player, n):
+        super().__init__(player, n)
+        with self.clock:
+            self.parallel = ParallelSearch(n)
+            # the referee never says the game is over: stop the workers and free
+            # the shared memory once this player is collected, or at exit
+            weakref.finalize(self, self.parallel.close)
 
+    def search(self):
+        workerTime = self.parallel.workerTime
+        result = self.parallel.search(self.board, self.player, self.clock.start_move(self.board))
+        # the referee only times this process, but the workers' CPU time comes
+        # out of the same game budget
+        workerTime = self.parallel.workerTime - workerTime
+        self.clock.charge(workerTime)
+        if self.board.stats is not None:
+            self.board.stats.worker_seconds = workerTime
+        return result
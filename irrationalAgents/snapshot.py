@@ -0,0 +1,140 @@
+"""
+Provide a compact, fixed-layout snapshot of a board position, for handing
+positions to other processes without pickling a board. A snapshot is a
+little-endian byte buffer:
+
+  offset  size    field
+  0       4       magic, b"CXSB"
+  4       1       layout version (SNAPSHOT_VERSION)
+  5       1       board engine (0 = basicBoard.Board, 1 = bitBoard.BitBoard)
+  6       2       board size n
+  8       4       turns taken
+  12      8 * 4   Zobrist hash, then the three image hashes (see symmetry.py)
+  44      n * n   one byte per cell in r * n + q order: 0 empty, 1 red, 2 blue
+
+Anything that supports the buffer protocol can hold one: bytes, a
+bytearray, or a SharedSnapshot's block of multiprocessing.shared_memory,
+which workers attach to by name so that nothing is copied between
+processes. SnapshotView reads a snapshot in place, and read_snapshot sets
+up a board from one (checking the stored hash against the position).
+
+The layout version is bumped whenever a field changes, and snapshots of
+any other version are refused.
+"""
+
+import struct
+from multiprocessing import shared_memory
+from irrationalAgents.basicBoard import Board, _TOKEN_MAP_OUT
+from irrationalAgents.bitBoard import BitBoard
+
+SNAPSHOT_MAGIC = b"CXSB"
+SNAPSHOT_VERSION = 1
+
+# magic, version, engine, n, turns taken, hash, image hashes
+_HEADER = struct.Struct("<4sBBHI4Q")
+
+# board engines, by their number in the header
+ENGINES = (Board, BitBoard)
+
+
+def snapshot_size(n):
+    """
+    Bytes taken by the snapshot of a board of size n.
+    """
+    return _HEADER.size + n * n
+
+def write_snapshot(state, buffer = None):
+    """
+    Snapshot of state (a Board or BitBoard), written into buffer (a writable
+    buffer of at least snapshot_size(state.n) bytes) or a new bytearray.
+    Returns the buffer.
+    """
+    n = state.n
+    if buffer is None:
+        buffer = bytearray(snapshot_size(n))
+    _HEADER.pack_into(buffer, 0, SNAPSHOT_MAGIC, SNAPSHOT_VERSION, ENGINES.index(type(state)), n,
+        state.turns_taken, state.hash, *state.image_hashes)
+    buffer[_HEADER.size:_HEADER.size + n * n] = bytes(state.paths.cells)
+    return buffer
+
+def read_snapshot(buffer, state = None):
+    """
+    Board for the snapshot in buffer. state is reused (see load_cells) if
+    it is a board of the same engine and size, otherwise a new one is made.
+    Raises ValueError for something that isn't a snapshot of this version,
+    or whose hash doesn't match its cells.
+    """
+    view = SnapshotView(buffer)
+    boardClass = ENGINES[view.engine]
+    if type(state) is not boardClass or state.n != view.n:
+        state = boardClass(view.n)
+    state.load_cells(view.cells, view.turns_taken)
+    if state.hash != view.hash:
+        raise ValueError("snapshot hash does not match its cells")
+    return state
+
+
+class SnapshotView:
+    """
+    Read-only view of a snapshot in a buffer. Nothing is copied: cells is a
+    memoryview of the buffer's cell bytes, and tokens are read from it.
+    """
+    def __init__(self, buffer):
+        magic, version, engine, n, turns, *hashes = _HEADER.unpack_from(buffer, 0)
+        if magic != SNAPSHOT_MAGIC:
+            raise ValueError("not a board snapshot")
+        if version != SNAPSHOT_VERSION:
+            raise ValueError(f"snapshot version {version} (expected {SNAPSHOT_VERSION})")
+        if engine >= len(ENGINES):
+            raise ValueError(f"unknown board engine {engine}")
+
+        self.engine = engine
+        self.n = n
+        self.turns_taken = turns
+        self.hash = hashes[0]
+        self.image_hashes = hashes[1:]
+        self.cells = memoryview(buffer)[_HEADER.size:_HEADER.size + n * n].toreadonly()
+
+    def __getitem__(self, coord):
+        """
+        Get the token at given board coord (r, q), as Board does.
+        """
+        return _TOKEN_MAP_OUT[self.cells[coord[0] * self.n + coord[1]]]
+
+    def release(self):
+        """
+        Let go of the buffer (a shared memory block can't close while viewed).
+        """
+        self.cells.release()
+
+
+class SharedSnapshot:
+    """
+    A snapshot in a block of shared memory. The process that creates it
+    (with n) writes positions into it; others attach with the block's name.
+    The creator should unlink it once every process has closed it.
+
+    Attaching registers the block with the process's resource tracker (before
+    Python 3.13), which unlinks whatever is left registered when it stops. So
+    processes that attach should share their creator's tracker, e.g. by
+    being started after resource_tracker.ensure_running() in the creator.
+    """
+    def __init__(self, n = None, name = None):
+        if name is None:
+            self.memory = shared_memory.SharedMemory(create=True, size=snapshot_size(n))
+        else:
+            self.memory = shared_memory.SharedMemory(name=name)
+        self.name = self.memory.name
+
+    def write(self, state):
+        write_snapshot(state, self.memory.buf)
+
+    def read(self, state = None):
+        return read_snapshot(self.memory.buf, state)
+
+    def close(self):
+        self.memory.close()
+
+    def unlink(self):
+        self.memory.close()
+        self.memory.unlink()
@@ -0,0 +1,113 @@
+"""
+Provide the symmetries of a Cachex board, so that equivalent positions can
+share cache entries. A board of size n maps onto itself by
+
+  ROTATE        a 180 degree rotation, (r, q) -> (n - 1 - r, n - 1 - q);
+                every stone keeps its colour and the same player is to move
+  SWAP          the transpose with colours swapped, (r, q) -> (q, r) and
+                red <-> blue (what Board.swap does); the other player is to move
+  ROTATE | SWAP both
+
+Each of these is its own inverse, so the same image maps a position to
+its image and a move in the image back to the original board.
+
+Boards keep the Zobrist hash of all three images next to their own hash
+(image_hashes, indexed by image - 1), updated with the same XORs, so the
+canonical key of a position (the smallest of the hashes allowed) costs a
+few comparisons.
+
+Scores only carry over unchanged between images that keep the colours.
+A SWAP image is the same position for the *other* player, and this
+agent's evaluation is not zero-sum (some features count only our own
+stones), so a score for one colour can't be turned into the score for
+the other by negating it. Caches of scores should only use ROTATE.
+"""
+
+from functools import lru_cache
+from irrationalAgents.topology import get_topology
+
+IDENTITY = 0
+ROTATE = 1
+SWAP = 2
+
+# Images a cache may use: all of them, or only those keeping the colours
+ALL_IMAGES = (IDENTITY, ROTATE, SWAP, ROTATE | SWAP)
+COLOUR_IMAGES = (IDENTITY, ROTATE)
+
+
+@lru_cache(maxsize=None)
+def image_cells(n):
+    """
+    image_cells(n)[image][i]: flat index of the image of cell i.
+    """
+    cells = []
+    for image in ALL_IMAGES:
+        cells.append(tuple(image_index(i, image, n) for i in range(n * n)))
+    return cells
+
+def image_index(i, image, n):
+    """
+    Flat index of the image of the cell with flat index i.
+    """
+    r, q = divmod(i, n)
+    if image & ROTATE:
+        r, q = n - 1 - r, n - 1 - q
+    if image & SWAP:
+        r, q = q, r
+    return r * n + q
+
+def image_move(move, image, n):
+    """
+    Image of the cell move = (r, q), or a move in the image back onto the board.
+    """
+    r, q = move
+    if image & ROTATE:
+        r, q = n - 1 - r, n - 1 - q
+    if image & SWAP:
+        r, q = q, r
+    return (r, q)
+
+@lru_cache(maxsize=None)
+def image_zobrist(n):
+    """
+    image_zobrist(n)[token][i]: the Zobrist keys of a token at flat index i
+    in each image's hash, as a tuple (ROTATE, SWAP, ROTATE | SWAP).
+    """
+    topology = get_topology(n)
+    cells = image_cells(n)
+    keys = [[()] * topology.size]
+    for token in (1, 2):
+        keys.append([tuple(topology.zobrist[3 - token if image & SWAP else token][cells[image][i]]
+            for image in ALL_IMAGES[1:]) for i in range(topology.size)])
+    return keys
+
+def image_hashes(topology, cells, turns_taken):
+    """
+    Hashes of the three images of a position, given an iterable of
+    (flat index, token) pairs for the occupied cells (as Topology.hash_cells).
+    """
+    keys = image_zobrist(topology.n)
+    hashes = [0, 0, 0]
+    for i, token in cells:
+        for k, key in enumerate(keys[token][i]):
+            hashes[k] ^= key
+    for image in ALL_IMAGES[1:]:
+        # a SWAP image has the other player to move
+        if (turns_taken + (image & SWAP) // SWAP) % 2:
+            hashes[image - 1] ^= topology.zobrist_turn
+    return hashes
+
+def canonical(state, images = ALL_IMAGES):
+    """
+    Canonical key of the position on state (a Board or BitBoard), as
+    (key, image): the smallest hash among the allowed images, and which
+    image it belongs to. Moves found for the key map back with
+    image_move(move, image, n).
+    """
+    hashes = state.image_hashes
+    key = best = None
+    for image in images:
+        imageKey = hashes[image - 1] if image else state.hash
+        if key is None or imageKey < key:
+            key, best = imageKey, image
+    return key, best
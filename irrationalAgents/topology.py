@@ -0,0 +1,117 @@
+"""
+Provide the fixed geometry of a Cachex board of size n: which cells
+neighbour each other and which diamond capture patterns fit on the board.
+
+None of this depends on where tokens are, so it is computed once per board
+size and shared (via get_topology) by every board, the evaluation helpers
+and the referee. Cells are addressed by flat index r * n + q; coordinate
+versions of each table are kept alongside for code that works in (r, q).
+"""
+
+from functools import lru_cache
+from random import Random
+
+# Neighbour hex steps in clockwise order (same order as basicBoard._HEX_STEPS)
+_HEX_STEPS = [(1, -1), (1, 0), (0, 1), (-1, 1), (-1, 0), (0, -1)]
+
+# Diamond capture patterns as [opposite offset, neighbour 1, neighbour 2],
+# "longways" (adjacent neighbours) then "sideways" (spaced neighbours), built
+# the same way as basicBoard._CAPTURE_PATTERNS
+_CAPTURE_PATTERNS = [[(n1[0] + n2[0], n1[1] + n2[1]), n1, n2]
+    for n1, n2 in
+        list(zip(_HEX_STEPS, _HEX_STEPS[-1:] + _HEX_STEPS[:-1])) +
+        list(zip(_HEX_STEPS, _HEX_STEPS[-2:] + _HEX_STEPS[:-2]))]
+
+
+class Topology:
+    def __init__(self, n):
+        """
+        Build neighbour and capture tables for a board of size n.
+        """
+        self.n = n
+        self.size = n * n
+        self.coords = [(r, q) for r in range(n) for q in range(n)]
+
+        inside = lambda c: 0 <= c[0] < n and 0 <= c[1] < n
+        index = lambda c: c[0] * n + c[1]
+        offset = lambda coord, step: (coord[0] + step[0], coord[1] + step[1])
+
+        # Within-bounds neighbours of each cell, in _HEX_STEPS (clockwise) order
+        self.coord_neighbours = []
+        self.neighbours = []
+        for coord in self.coords:
+            adjacent = tuple(c for c in (offset(coord, step) for step in _HEX_STEPS)
+                if inside(c))
+            self.coord_neighbours.append(adjacent)
+            self.neighbours.append(tuple(index(c) for c in adjacent))
+
+        # Capture patterns that fit entirely on the board, as
+        # (opposite cell, neighbour 1, neighbour 2) for each cell
+        self.coord_captures = []
+        self.captures = []
+        for coord in self.coords:
+            patterns = tuple(cells for cells in
+                (tuple(offset(coord, s) for s in pattern) for pattern in _CAPTURE_PATTERNS)
+                if all(map(inside, cells)))
+            self.coord_captures.append(patterns)
+            self.captures.append(tuple(tuple(map(index, cells)) for cells in patterns))
+
+        # Bridges: for each cell, (other end, carrier 1, carrier 2) for every
+        # "longways" capture pattern that fits, i.e. two cells that share two
+        # adjacent empty neighbours (the pattern's middle cells)
+        self.bridges = tuple(tuple((opp, mid1, mid2) for opp, mid1, mid2 in patterns
+            if mid2 in self.neighbours[mid1]) for patterns in self.captures)
+
+        # Start and end edges for each colour
+        self.red_start = tuple(index((0, i)) for i in range(n))
+        self.red_end = tuple(index((n - 1, i)) for i in range(n))
+        self.blue_start = tuple(index((i, 0)) for i in range(n))
+        self.blue_end = tuple(index((i, n - 1)) for i in range(n))
+
+        # Edge templates: edge_templates[token][cell] lists (side, carrier 1,
+        # carrier 2) for each of token's edges (side 0 start, 1 end) that the
+        # cell is one row away from, where the carriers are its two
+        # neighbours on that edge
+        self.edge_templates = [None]
+        for edges in ((self.red_start, self.red_end), (self.blue_start, self.blue_end)):
+            templates = []
+            for i in range(self.size):
+                cellTemplates = []
+                for side, edge in enumerate(edges):
+                    carriers = [j for j in self.neighbours[i] if j in edge]
+                    if i not in edge and len(carriers) == 2:
+                        cellTemplates.append((side, *carriers))
+                templates.append(tuple(cellTemplates))
+            self.edge_templates.append(templates)
+
+        # Zobrist keys: zobrist[token][cell] for tokens 1 (red) and 2 (blue),
+        # plus a key toggled every turn so the side to move is part of the hash.
+        # Seeded by n so that hashes agree between runs and processes.
+        rng = Random(n)
+        self.zobrist = [[0] * self.size] + \
+            [[rng.getrandbits(64) for _ in range(self.size)] for _ in range(2)]
+        self.zobrist_turn = rng.getrandbits(64)
+
+    def hash_cells(self, cells, turns_taken):
+        """
+        Zobrist hash from scratch, given an iterable of (flat index, token)
+        pairs for the occupied cells.
+        """
+        key = self.zobrist_turn if turns_taken % 2 else 0
+        for i, token in cells:
+            key ^= self.zobrist[token][i]
+        return key
+
+    def index(self, coord):
+        """
+        Flat index of coord (r, q).
+        """
+        return coord[0] * self.n + coord[1]
+
+
+@lru_cache(maxsize=None)
+def get_topology(n):
+    """
+    Shared Topology for board size n (built on first use).
+    """
+    return Topology(n)
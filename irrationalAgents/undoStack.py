@@ -0,0 +1,93 @@
+"""
+Provide the undo stack shared by both board engines: every move made with
+handle_action is recorded as a few packed integers in one preallocated
+array, and undo_move pops them again. A placement pushes
+
+  the hash and the three image hashes from before the move
+  the flat index of every stone it captured, in the order they were taken
+  a header, (cell << HEADER_SHIFT) | (captures << TOKEN_BITS) | token
+
+so undoing it needs no lookups of the player's colour, restores the hashes
+without any XORs, and gets the neighbour degree changes back from the
+cells (+1 around the placed stone and -1 around each captured one).
+
+A STEAL transposes every structure the board keeps, which would cost as
+much again to undo. Instead the board hands its current structures to
+push_steal(), builds fresh ones for the swapped position, and pushes a
+STEAL header holding the slot they were saved in; undoing it is
+reassigning them, in constant time.
+
+handle_action returns the header of the move it recorded, and undo_move
+takes it back, which has to be the most recent move still on the stack.
+"""
+
+from array import array
+
+# Header layout: the low TOKEN_BITS hold the token placed (STEAL for a swap),
+# the next bits the number of stones captured, and the cell from HEADER_SHIFT up
+TOKEN_BITS = 2
+HEADER_SHIFT = 8
+STEAL = 3
+
+
+class UndoStack:
+    def __init__(self, size):
+        """
+        Stack for a board of `size` cells. Room for a full board of moves
+        is allocated up front; it only grows if captures keep refilling it.
+        """
+        self.values = array("Q", bytes(8 * 8 * size))
+        self.top = 0
+        self.saved = []
+
+    def push(self, value):
+        if self.top == len(self.values):
+            self.values.extend(self.values)
+        self.values[self.top] = value
+        self.top += 1
+
+    def pop(self):
+        self.top -= 1
+        return self.values[self.top]
+
+    def push_steal(self, state):
+        """
+        Record a STEAL, saving the board structures from before it (any
+        object; the board gets it back from pop_steal). Returns its header.
+        """
+        self.saved.append(state)
+        header = ((len(self.saved) - 1) << HEADER_SHIFT) | STEAL
+        self.push(header)
+        return header
+
+    def pop_steal(self):
+        """
+        Structures saved by the STEAL whose header was just popped.
+        """
+        return self.saved.pop()
+
+    def pop_header(self, header):
+        """
+        Pop the header of the most recent move, checking that it is header.
+        """
+        if self.top == 0 or self.values[self.top - 1] != header:
+            raise ValueError(f"move {header} is not the most recent one")
+        self.top -= 1
+        return header
+
+    def clear(self):
+        self.top = 0
+        self.saved = []
+
+
+def pack(i, captures, token):
+    """
+    Header of a placement of token at flat index i that captured `captures` stones.
+    """
+    return (i << HEADER_SHIFT) | (captures << TOKEN_BITS) | token
+
+def unpack(header):
+    """
+    (cell or saved slot, number of captures, token or STEAL) of a header.
+    """
+    return header >> HEADER_SHIFT, (header >> TOKEN_BITS) & 0x3F, header & 0x3
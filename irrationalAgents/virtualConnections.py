@@ -0,0 +1,314 @@
+"""
+Provide virtual connections for a Cachex board: pairs of cells that a
+player can join whatever the opponent does, because there are two ways to
+do it. Two kinds are tracked for each colour:
+
+  bridge         two stones that share two adjacent empty neighbours (a
+                 "longways" capture pattern with empty middle cells)
+  edge template  a stone one row away from one of its colour's edges, with
+                 both of its neighbours on that edge empty
+
+An intrusion into one of the two empty cells (the carriers) is answered in
+the other, so for estimating distances a bridge counts as adjacency and a
+template stone as being on its edge. This is a heuristic: a diamond capture
+can still break a bridge, and connections that share a carrier are not
+independent. Exact code (win checks, the endgame solver) keeps using
+plain adjacency.
+
+The set of live connections is updated as stones are placed and undone,
+with the same journal/frame scheme as connectivity.Connectivity. Moves
+with captures save the set and rebuild it.
+"""
+
+from math import inf
+from collections import deque
+from irrationalAgents.helpers.pathCost import INF, WEIGHTS
+
+# kinds of connection, first in their keys: (BRIDGE, stone, stone) and (TEMPLATE, stone, side)
+BRIDGE = 0
+TEMPLATE = 1
+
+
+class VirtualConnections:
+    def __init__(self, topology, cells = None):
+        """
+        Virtual connections of the stones in cells (flat list of tokens 0,
+        1, 2; empty board if None) on a board with the given topology.
+        """
+        self.topology = topology
+        self.size = topology.size
+        self.cells = [0] * self.size
+
+        # live connections as key -> (token, carrier 1, carrier 2), the keys
+        # of those using each empty cell, and for each token the bridge
+        # partners of every stone and the template stones of each edge
+        self.connections = {}
+        self.by_carrier = [set() for _ in range(self.size)]
+        self.partners = [None] + [[set() for _ in range(self.size)] for _ in (1, 2)]
+        self.templates = [None] + [(set(), set()) for _ in (1, 2)]
+
+        # (key, data, whether it was added) for each change, the journal
+        # length before each move, and the connections from before each
+        # move that captured
+        self.journal = []
+        self.frames = []
+        self.saved = []
+
+        if cells is not None:
+            self.rebuild(cells)
+
+    def _add(self, key, data):
+        self.connections[key] = data
+        token, first, second = data
+        self.by_carrier[first].add(key)
+        self.by_carrier[second].add(key)
+        if key[0] == BRIDGE:
+            self.partners[token][key[1]].add(key[2])
+            self.partners[token][key[2]].add(key[1])
+        else:
+            self.templates[token][key[2]].add(key[1])
+
+    def _remove(self, key):
+        token, first, second = data = self.connections.pop(key)
+        self.by_carrier[first].discard(key)
+        self.by_carrier[second].discard(key)
+        if key[0] == BRIDGE:
+            self.partners[token][key[1]].discard(key[2])
+            self.partners[token][key[2]].discard(key[1])
+        else:
+            self.templates[token][key[2]].discard(key[1])
+        return data
+
+    def _connect(self, i, token):
+        """
+        Add the connections a stone of token at i makes, journaling them.
+        """
+        cells = self.cells
+        for j, first, second in self.topology.bridges[i]:
+            if cells[j] == token and cells[first] == 0 and cells[second] == 0:
+                key = (BRIDGE, min(i, j), max(i, j))
+                if key not in self.connections:
+                    self._add(key, (token, first, second))
+                    self.journal.append((key, None, True))
+        for side, first, second in self.topology.edge_templates[token][i]:
+            if cells[first] == 0 and cells[second] == 0:
+                key = (TEMPLATE, i, side)
+                self._add(key, (token, first, second))
+                self.journal.append((key, None, True))
+
+    def place(self, i, token, captured = ()):
+        """
+        Record a stone of `token` placed at flat index i, which captured the
+        stones at the flat indices in captured.
+        """
+        if not captured:
+            self.frames.append(len(self.journal))
+            self.cells[i] = token
+            # the cell is no longer empty, so nothing can be carried through it
+            carried = self.by_carrier[i]
+            while carried:
+                key = carried.pop()
+                self.journal.append((key, self._remove(key), False))
+            self._connect(i, token)
+            return
+
+        self.frames.append(len(self.journal))
+        self.saved.append((dict(self.connections), self.cells[:]))
+        cells = self.cells[:]
+        cells[i] = token
+        for j in captured:
+            cells[j] = 0
+        self._reset(cells)
+
+    def undo(self, i, captured = ()):
+        """
+        Roll back the most recent place, of a stone at flat index i that
+        captured the stones at the flat indices in captured.
+        """
+        if not self.frames:
+            # the move was made before a rebuild (e.g. undoing past a swap)
+            cells = self.cells[:]
+            for j in captured:
+                cells[j] = 3 - cells[i]
+            cells[i] = 0
+            self.rebuild(cells)
+            return
+
+        mark = self.frames.pop()
+        journal = self.journal
+        if captured:
+            connections, self.cells[:] = self.saved.pop()
+            self._restore(connections)
+            del journal[mark:]
+            return
+
+        while len(journal) > mark:
+            key, data, added = journal.pop()
+            if added:
+                self._remove(key)
+            else:
+                self._add(key, data)
+        self.cells[i] = 0
+
+    def _restore(self, connections):
+        for carriers in self.by_carrier:
+            carriers.clear()
+        for token in (1, 2):
+            for partners in self.partners[token]:
+                partners.clear()
+            for stones in self.templates[token]:
+                stones.clear()
+        self.connections = {}
+        for key, data in connections.items():
+            self._add(key, data)
+
+    def _reset(self, cells):
+        """
+        Start the connections again from cells, keeping the journal and frames.
+        """
+        self.cells[:] = cells
+        self._restore({})
+        mark = len(self.journal)
+        for i, token in enumerate(cells):
+            if token:
+                self._connect(i, token)
+        del self.journal[mark:]
+
+    def rebuild(self, cells):
+        """
+        Start again from a new set of cell tokens (e.g. after a swap),
+        forgetting any moves that could have been undone.
+        """
+        self._reset(cells)
+        self.journal = []
+        self.frames = []
+        self.saved = []
+
+    def count(self, token):
+        """
+        Number of live (bridges, edge templates) of token.
+        """
+        bridges = sum(len(partners) for partners in self.partners[token]) // 2
+        return bridges, sum(len(stones) for stones in self.templates[token])
+
+    def carries(self, i, token):
+        """
+        True iff the empty cell i is a carrier of one of token's connections.
+        """
+        return any(self.connections[key][0] == token for key in self.by_carrier[i])
+
+    def carries_shortest(self, i, token, fromStart, fromEnd, distance):
+        """
+        True iff the empty cell i is a carrier of one of token's connections
+        that some shortest path uses, given token's fill maps (both
+        directions) and distance. Losing any other connection leaves it as is.
+        """
+        connections = self.connections
+        for key in self.by_carrier[i]:
+            if connections[key][0] != token:
+                continue
+            kind, a, b = key
+            if kind == BRIDGE:
+                if fromStart[a] + fromEnd[b] == distance or fromStart[b] + fromEnd[a] == distance:
+                    return True
+            elif (fromEnd if b == 0 else fromStart)[a] == distance:
+                return True
+        return False
+
+    def fill(self, token, reverse = False):
+        """
+        Cost of a path from token's start edge (or its end edge, with
+        reverse) to every cell, counting each cell itself, as
+        pathCost.fillDistances but with bridges as adjacency and template
+        stones on their edge.
+        """
+        return fillVirtualDistances(self.topology, self.cells, token, self.partners[token],
+            self.templates[token][1 if reverse else 0], reverse)
+
+    def distance(self, token, fromStart = None):
+        """
+        Cost of token's cheapest path between its edges (math.inf if none),
+        from fromStart = self.fill(token) if it has already been found.
+        """
+        dist = self.fill(token) if fromStart is None else fromStart
+        best = min(min(dist[i] for i in _targets(self.topology, token)),
+            min((dist[i] for i in self.templates[token][1]), default=INF))
+        return inf if best >= INF else best
+
+    def through(self, i, token, fromStart, fromEnd):
+        """
+        Cost of token's cheapest path through the empty cell i once token
+        has a stone there, from this position's fill maps for token (both
+        directions). Any other path costs no less than before the move.
+        """
+        cells, topology, n = self.cells, self.topology, self.topology.n
+        # a stone on (or in a template with) an edge is joined to it for free
+        line = i // n if token == 1 else i % n
+        start = 0 if line == 0 else INF
+        end = 0 if line == n - 1 else INF
+        for side, first, second in topology.edge_templates[token][i]:
+            if cells[first] == 0 and cells[second] == 0:
+                if side == 0:
+                    start = 0
+                else:
+                    end = 0
+
+        # otherwise through a neighbour, or a stone the new one bridges to
+        for j in topology.neighbours[i]:
+            if fromStart[j] < start:
+                start = fromStart[j]
+            if fromEnd[j] < end:
+                end = fromEnd[j]
+        for j, first, second in topology.bridges[i]:
+            if cells[j] == token and cells[first] == 0 and cells[second] == 0:
+                if fromStart[j] < start:
+                    start = fromStart[j]
+                if fromEnd[j] < end:
+                    end = fromEnd[j]
+        return start + end if start < INF and end < INF else INF
+
+
+def _targets(topology, token, reverse = False):
+    if token == 1:
+        return topology.red_start if reverse else topology.red_end
+    return topology.blue_start if reverse else topology.blue_end
+
+def fillVirtualDistances(topology, cells, token, partners, templateStones, reverse = False):
+    """
+    0-1 BFS from token's start edge (end edge with reverse) over cells,
+    where partners[i] are the cells bridged to the stone at i and the
+    templateStones sit on the edge searched from.
+    """
+    weights, neighbours = WEIGHTS[token], topology.neighbours
+    dist = [INF] * topology.size
+    queue = deque()
+    for i in _targets(topology, token, not reverse):
+        cost = weights[cells[i]]
+        if cost < dist[i]:
+            dist[i] = cost
+            queue.appendleft(i) if cost == 0 else queue.append(i)
+    for i in templateStones:
+        dist[i] = 0
+        queue.appendleft(i)
+
+    while queue:
+        u = queue.popleft()
+        d = dist[u]
+        for v in neighbours[u]:
+            cost = weights[cells[v]]
+            if d + cost < dist[v]:
+                dist[v] = d + cost
+                queue.appendleft(v) if cost == 0 else queue.append(v)
+        for v in partners[u]:
+            if d < dist[v]:
+                dist[v] = d
+                queue.appendleft(v)
+
+    return dist
+
+def cellsVirtualDistance(topology, cells, token):
+    """
+    Virtual connection distance for token on a flat list of cell tokens,
+    finding the connections from scratch.
+    """
+    return VirtualConnections(topology, cells).distance(token)
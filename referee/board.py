@@ -14,6 +14,8 @@ representing the state of a game, with respect to your chosen strategy.
 
 from queue import Queue
 from numpy import zeros, array, roll, vectorize
+from irrationalAgents.topology import get_topology
+from irrationalAgents.connectivity import Connectivity
 
 # Utility function to add two coord tuples
 _ADD = lambda a, b: (a[0] + b[0], a[1] + b[1])
@@ -51,8 +53,12 @@ class Board:
         Initialise board of given size n.
         """
         self.n = n
+        self.topology = get_topology(n)
         self._data = zeros((n, n), dtype=int)
 
+        # Groups of connected tokens, so a win is detected without a search
+        self.connectivity = Connectivity(self.topology)
+
     def __getitem__(self, coord):
         """
         Get the token at given board coord (r, q).
@@ -80,6 +86,7 @@ class Board:
         """
         swap_player_tokens = vectorize(lambda t: _SWAP_PLAYER[t])
         self._data = swap_player_tokens(self._data.transpose())
+        self.connectivity.rebuild([int(t) for t in self._data.flat])
 
     def place(self, token, coord):
         """
@@ -87,7 +94,17 @@ class Board:
         Return coordinates of captured tokens.
         """
         self[coord] = token
-        return self._apply_captures(coord)
+        captured = self._apply_captures(coord)
+        self.connectivity.place(coord[0] * self.n + coord[1], _TOKEN_MAP_IN[token],
+            [r * self.n + q for r, q in captured])
+        return captured
+
+    def has_won(self, token):
+        """
+        True iff the player of the given token has a path joining their
+        two board edges.
+        """
+        return self.connectivity.connected(_TOKEN_MAP_IN[token])
 
     def connected_coords(self, start_coord):
         """
@@ -134,16 +151,14 @@ class Board:
         mid_type = _SWAP_PLAYER[opp_type]
         captured = set()
 
-        # Check each capture pattern intersecting with coord
-        for pattern in _CAPTURE_PATTERNS:
-            coords = [_ADD(coord, s) for s in pattern]
-            # No point checking if any coord is outside the board!
-            if all(map(self.inside_bounds, coords)):
-                tokens = [self._data[coord] for coord in coords]
-                if tokens == [opp_type, mid_type, mid_type]:
-                    # Capturing has to be deferred in case of overlaps
-                    # Both mid cell tokens should be captured
-                    captured.update(coords[1:])
+        # Check each (in-bounds) capture pattern intersecting with coord
+        for coords in self.topology.coord_captures[coord[0] * self.n + coord[1]]:
+            opp, mid1, mid2 = coords
+            if self._data[mid1] == mid_type and self._data[mid2] == mid_type \
+                    and self._data[opp] == opp_type:
+                # Capturing has to be deferred in case of overlaps
+                # Both mid cell tokens should be captured
+                captured.update(coords[1:])
 
         # Remove any captured tokens
         for coord in captured:
@@ -155,5 +170,4 @@ class Board:
         """
         Returns (within-bounds) neighbouring coordinates for given coord.
         """
-        return [_ADD(coord, step) for step in _HEX_STEPS \
-            if self.inside_bounds(_ADD(coord, step))]
+        return self.topology.coord_neighbours[coord[0] * self.n + coord[1]]
@@ -138,11 +138,6 @@ def play(
 # Game rules implementation
 #
 
-_PLAYER_AXIS = {
-    "red": 0, # Red aims to form path in r/0 axis
-    "blue": 1 # Blue aims to form path in q/1 axis
-}
-
 _PLAYER_TURN_ORDER = ["red", "blue"] # Red always goes first
 
 # Actions
@@ -321,14 +316,14 @@ class Game:
         # Condition 1: player forms a continuous path spanning board (win).
         # check reachable coords from just-placed token to detect winning path
         # NOTE: No point checking this while total turns is less than 2n - 1
-        if self.nturns >= (self.board.n * 2) - 1:
+        # (the board's union-find answers this; the path itself is only
+        # searched for once there is a winner, to display it)
+        if self.nturns >= (self.board.n * 2) - 1 and self.board.has_won(player):
             _, r, q = action
             reachable = self.board.connected_coords((r, q))
-            axis_vals = [coord[_PLAYER_AXIS[player]] for coord in reachable]
-            if min(axis_vals) == 0 and max(axis_vals) == self.board.n - 1:
-                self.result = "winner: " + player
-                self.result_cluster = set(reachable)
-                return
+            self.result = "winner: " + player
+            self.result_cluster = set(reachable)
+            return
 
         # Condition 2: the same state has occurred too many times (draw)
         if self.history[self.board.digest()] >= _MAX_REPEAT_STATES:
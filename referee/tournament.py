@@ -0,0 +1,384 @@
+"""
+Run many headless games between Player classes and summarise the results.
+
+usage: python -m referee.tournament [-h] [-n N [N ...]] [-g GAMES] [-S SEED]
+                                    [-j JOBS] [-t time_limit] [-s space_limit]
+                                    [-m] [-o OUTPUT]
+                                    agent [agent ...]
+
+Every pair of agents (or an agent against itself, if only one is given)
+plays GAMES games on each board size, swapping colours every game. Games
+run in parallel, one fresh process per game, using the referee's `play`
+with board rendering and commentary off (player output is discarded too).
+Game processes are not daemonic, so players may start processes of their
+own. Time and space limits are enforced as by the referee.
+
+One JSON record per game is written to OUTPUT (JSON lines): the agents,
+board size, seed, result, winner, turn count, list of moves, and each
+player's CPU time. With -m, each player's peak traced memory is recorded
+as well (this slows players down, so don't compare times across the two
+modes). Peak RSS of the game's process (shared by both players and the
+referee) is always recorded.
+
+Agents are package specifications, as for the referee
+(e.g. 'irrationalAgents' or 'irrationalAgents.minimaxAgent:BitboardPlayer').
+"""
+
+import io
+import os
+import sys
+import json
+import math
+import random
+import argparse
+import itertools
+import contextlib
+import multiprocessing
+import tracemalloc
+from multiprocessing.connection import wait
+
+from referee.log import config, comment
+from referee.game import play, COLOURS, IllegalActionException
+from referee.player import PlayerWrapper, ResourceLimitException, set_space_line
+from referee.options import parse_package_spec
+
+try:
+    import resource
+except ImportError:  # not available on windows
+    resource = None
+
+# z score for the confidence intervals in the summary (95%)
+_Z = 1.96
+
+
+class _RecordingPlayer(PlayerWrapper):
+    """
+    PlayerWrapper that also keeps the game's moves and, if asked, the
+    player's peak traced memory.
+    """
+
+    def __init__(self, name, player_loc, trace_memory=False, **limits):
+        super().__init__(name, player_loc, **limits)
+        self.trace_memory = trace_memory
+        self.peak_memory = 0
+        self.moves = []
+
+    def _traced(self, method, *args):
+        if not self.trace_memory:
+            return method(*args)
+        tracemalloc.reset_peak()
+        try:
+            return method(*args)
+        finally:
+            _, peak = tracemalloc.get_traced_memory()
+            self.peak_memory = max(self.peak_memory, peak)
+
+    def init(self, colour, n):
+        self._traced(super().init, colour, n)
+
+    def action(self):
+        return self._traced(super().action)
+
+    def turn(self, player, action):
+        self.moves.append((player, *action))
+        self._traced(super().turn, player, action)
+
+
+def play_game(game):
+    """
+    Play one game described by a dict (see _schedule) and return its record.
+    """
+    random.seed(game["seed"])
+    try:
+        import numpy
+
+        numpy.random.seed(game["seed"] % 2**32)
+    except ImportError:
+        pass
+
+    # no commentary, and no output from the players either
+    config(level=0)
+    if game["trace_memory"]:
+        tracemalloc.start()
+
+    record = dict(game)
+    del record["trace_memory"], record["time"], record["space"]
+    players = []
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            for colour in COLOURS:
+                players.append(
+                    _RecordingPlayer(
+                        colour,
+                        parse_package_spec(game[colour]),
+                        trace_memory=game["trace_memory"],
+                        time_limit=game["time"],
+                        space_limit=game["space"],
+                    )
+                )
+            # measure space usage from here, after the players' imports
+            set_space_line()
+            result = play(players, n=game["n"], print_state=False)
+        record["result"] = result
+        record["winner"] = (
+            result.split(": ")[1] if result.startswith("winner") else None
+        )
+    except (IllegalActionException, ResourceLimitException) as e:
+        record["result"] = f"error: {e}"
+        record["winner"] = None
+    except Exception as e:
+        # a crashing player shouldn't stop the rest of the tournament
+        record["result"] = f"error: {type(e).__name__}: {e}"
+        record["winner"] = None
+
+    record["moves"] = players[0].moves if players else []
+    record["turns"] = len(record["moves"])
+    record["cpu"] = {p.colour: p.timer.clock for p in players if hasattr(p, "colour")}
+    if game["trace_memory"]:
+        record["memory_mb"] = {
+            p.colour: p.peak_memory / 2**20 for p in players if hasattr(p, "colour")
+        }
+    if resource is not None:
+        # ru_maxrss is in kB on linux
+        record["peak_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return record
+
+
+def _play_game_into(game, connection):
+    connection.send(play_game(game))
+    connection.close()
+
+
+def run_games(games, jobs=None):
+    """
+    Play games (see _schedule), up to jobs at once (default: one per CPU),
+    each in a fresh process. Yields each game's record as it finishes.
+    """
+    jobs = jobs or os.cpu_count() or 1
+    pending, running = iter(games), {}
+    while True:
+        while len(running) < jobs:
+            game = next(pending, None)
+            if game is None:
+                break
+            ours, theirs = multiprocessing.Pipe(duplex=False)
+            process = multiprocessing.Process(
+                target=_play_game_into, args=(game, theirs)
+            )
+            process.start()
+            theirs.close()
+            running[ours] = (process, game)
+        if not running:
+            return
+
+        for connection in wait(list(running)):
+            process, game = running.pop(connection)
+            try:
+                record = connection.recv()
+            except EOFError:
+                # the game's process died before it could send a record
+                process.join()
+                record = {
+                    key: value
+                    for key, value in game.items()
+                    if key not in ("trace_memory", "time", "space")
+                }
+                record.update(
+                    result=f"error: game process exited with code {process.exitcode}",
+                    winner=None,
+                    moves=[],
+                    turns=0,
+                    cpu={},
+                )
+            connection.close()
+            process.join()
+            yield record
+
+
+def _schedule(args):
+    """
+    Game descriptions for every pairing, size and game number.
+    """
+    agents = args.agents
+    pairs = list(itertools.combinations(agents, 2)) or [(agents[0], agents[0])]
+    games = []
+    for n in args.sizes:
+        for a, b in pairs:
+            for i in range(args.games):
+                # alternate colours so neither agent always moves first
+                red, blue = (a, b) if i % 2 == 0 else (b, a)
+                games.append(
+                    {
+                        "game": len(games),
+                        "n": n,
+                        "red": red,
+                        "blue": blue,
+                        "seed": args.seed + len(games),
+                        "trace_memory": args.trace_memory,
+                        "time": args.time,
+                        "space": args.space,
+                    }
+                )
+    return games
+
+
+def wilson_interval(wins, games, z=_Z):
+    """
+    Wilson score interval for a win rate of wins / games.
+    """
+    if games == 0:
+        return 0.0, 1.0
+    p = wins / games
+    centre = p + z * z / (2 * games)
+    spread = z * math.sqrt(p * (1 - p) / games + z * z / (4 * games * games))
+    denominator = 1 + z * z / games
+    return (centre - spread) / denominator, (centre + spread) / denominator
+
+
+def summarise(records):
+    """
+    Lines of a table with, for each board size and pairing, the first
+    agent's wins, losses, draws and errors, its win rate with a Wilson
+    interval, and each agent's mean CPU time per game.
+    """
+    table = {}
+    for record in records:
+        a, b = sorted((record["red"], record["blue"]))
+        row = table.setdefault(
+            (record["n"], a, b),
+            {"wins": 0, "losses": 0, "draws": 0, "errors": 0, "cpu": {a: [], b: []}},
+        )
+        if record["result"].startswith("error"):
+            row["errors"] += 1
+        elif record["winner"] is None:
+            row["draws"] += 1
+        elif record[record["winner"]] == a and (a != b or record["winner"] == "red"):
+            # (in self-play, "wins" are red's wins)
+            row["wins"] += 1
+        else:
+            row["losses"] += 1
+        for colour, cpu in record["cpu"].items():
+            row["cpu"][record[colour]].append(cpu)
+
+    width = max([len(agent) for _, a, b in table for agent in (a, b)] + [5])
+    lines = [
+        f"{'n':>3}  {'agent':<{width}}  {'opponent':<{width}}  "
+        f"{'W':>4} {'L':>4} {'D':>4} {'E':>4}  {'win rate':>8}  "
+        f"{'95% CI':>15}  {'cpu/game':>17}"
+    ]
+    for (n, a, b), row in sorted(table.items()):
+        games = row["wins"] + row["losses"] + row["draws"]
+        low, high = wilson_interval(row["wins"], games)
+        rate = row["wins"] / games if games else 0.0
+        mean = lambda times: sum(times) / len(times) if times else 0.0
+        lines.append(
+            f"{n:>3}  {a:<{width}}  {b:<{width}}  "
+            f"{row['wins']:>4} {row['losses']:>4} {row['draws']:>4} {row['errors']:>4}  "
+            f"{rate:>8.3f}  [{low:.3f}, {high:.3f}]  "
+            f"{mean(row['cpu'][a]):>7.2f}s {mean(row['cpu'][b]):>7.2f}s"
+        )
+    return lines
+
+
+def get_options(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="referee.tournament",
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument(
+        "agents",
+        nargs="+",
+        metavar="agent",
+        help="Player class package specification",
+    )
+    parser.add_argument(
+        "-n",
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[5],
+        choices=range(3, 16),
+        metavar="N",
+        help="board sizes to play on (default: 5)",
+    )
+    parser.add_argument(
+        "-g",
+        "--games",
+        type=int,
+        default=10,
+        help="games per pairing and board size (default: 10)",
+    )
+    parser.add_argument(
+        "-S",
+        "--seed",
+        type=int,
+        default=0,
+        help="seed for the first game, each later game adds one (default: 0)",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=None,
+        help="games to run at once (default: one per CPU)",
+    )
+    parser.add_argument(
+        "-t",
+        "--time",
+        metavar="time_limit",
+        type=float,
+        default=0,
+        help="limit on CPU time (float, seconds) for each player "
+        "(default: 0, no limit)",
+    )
+    parser.add_argument(
+        "-s",
+        "--space",
+        metavar="space_limit",
+        type=float,
+        default=0,
+        help="limit on memory space (float, MB) for each player "
+        "(default: 0, no limit)",
+    )
+    parser.add_argument(
+        "-m",
+        "--trace-memory",
+        action="store_true",
+        help="record each player's peak memory with tracemalloc",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        default="tournament.jsonl",
+        help="where to write one JSON record per game "
+        "(default: tournament.jsonl)",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = get_options(argv)
+    config(level=1)
+    games = _schedule(args)
+    comment(f"playing {len(games)} games with {args.jobs or 'all'} processes")
+
+    records = []
+    with open(args.output, "w") as output:
+        for record in run_games(games, args.jobs):
+            records.append(record)
+            output.write(json.dumps(record) + "\n")
+            output.flush()
+            comment(
+                f"game {record['game']:>4} (n={record['n']}): "
+                f"{record['red']} vs {record['blue']}: {record['result']}",
+                depth=1,
+            )
+
+    comment(f"results written to {args.output}")
+    for line in summarise(records):
+        sys.stdout.write(line + "\n")
+
+
+if __name__ == "__main__":
+    main()
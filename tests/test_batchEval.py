@@ -0,0 +1,69 @@
+import math
+import random
+from irrationalAgents.basicBoard import Board, _TOKEN_MAP_OUT
+from irrationalAgents.bitBoard import BitBoard
+from irrationalAgents.helpers.batchEval import evaluateChildren
+from irrationalAgents.helpers.evalCache import EvalCache
+from irrationalAgents.helpers.minimax import evaluate
+from irrationalAgents.undoStack import unpack
+
+
+def _random_position(boardClass, seed):
+    '''
+    A board after random moves (captures included), with nobody connected.
+    '''
+    rng = random.Random(seed)
+    board = boardClass(rng.randint(3, 8))
+    for turn in range(rng.randint(0, board.n * board.n - 1)):
+        move = tuple(rng.choice(board.empty_hexes()))
+        played = board.handle_action(("PLACE",) + move, _TOKEN_MAP_OUT[1 + turn % 2])
+        if board.connectivity.connected(1) or board.connectivity.connected(2):
+            board.undo_move(played)
+            break
+    return board
+
+def _child_score(board, move, curPlayer, ourPlayer):
+    '''
+    What minimax scores the child at its depth limit, by playing the move:
+    its score, or None if the move captures.
+    '''
+    played = board.handle_action(("PLACE",) + move, _TOKEN_MAP_OUT[curPlayer])
+    try:
+        if unpack(played)[1]:
+            return None
+        if board.connectivity.connected(curPlayer):
+            return 10000 if curPlayer == ourPlayer else -10000
+        cache, board.evalCache = board.evalCache, None
+        score = evaluate(board, ourPlayer)
+        board.evalCache = cache
+        return score
+    finally:
+        board.undo_move(played)
+
+def _same(a, b):
+    if a is None or b is None:
+        return a is b
+    return a == b or math.isnan(a) and math.isnan(b) or abs(a - b) < 1e-9
+
+def test_batched_scores_match_evaluate():
+    for boardClass in (Board, BitBoard):
+        for seed in range(40):
+            board = _random_position(boardClass, seed)
+            moves = board.empty_hexes()
+            for curPlayer in (1, 2):
+                for ourPlayer in (1, 2):
+                    scores = evaluateChildren(board, moves, curPlayer, ourPlayer)
+                    for move, score in zip(moves, scores):
+                        assert _same(score, _child_score(board, move, curPlayer, ourPlayer)), (seed, move)
+
+def test_cached_scores_match_evaluate():
+    for seed in range(20):
+        board = _random_position(BitBoard, seed)
+        board.evalCache = EvalCache(1)
+        moves = board.empty_hexes()
+        # the second pass is answered from the cache
+        for _ in range(2):
+            scores = evaluateChildren(board, moves, 1, 2)
+            assert len(board.evalCache) > 0 or all(score is None for score in scores)
+            for move, score in zip(moves, scores):
+                assert _same(score, _child_score(board, move, 1, 2)), (seed, move)
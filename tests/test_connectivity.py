@@ -0,0 +1,45 @@
+import random
+from irrationalAgents.basicBoard import Board, _TOKEN_MAP_OUT
+from irrationalAgents.bitBoard import BitBoard
+from irrationalAgents.connectivity import Connectivity
+
+
+def _random_game(boardClass, seed):
+    '''
+    Plays a random game with STEALs and undos on a new board, yielding it
+    after every move and every undo.
+    '''
+    rng = random.Random(seed)
+    board, played = boardClass(rng.randint(2, 7)), []
+    for _ in range(3 * board.n * board.n):
+        if played and rng.random() < 0.35:
+            board.undo_move(played.pop())
+        elif board.empty_hexes():
+            player = _TOKEN_MAP_OUT[1 + board.turns_taken % 2]
+            if board.turns_taken == 1 and rng.random() < 0.5:
+                played.append(board.handle_action(("STEAL",), player))
+            else:
+                played.append(board.handle_action(("PLACE",) + tuple(rng.choice(board.empty_hexes())), player))
+        yield board
+
+def _groups(connectivity):
+    '''
+    Each node (cells, then the four edge nodes) labelled by the lowest node
+    in its group, which doesn't depend on how the unions were made.
+    '''
+    nodes = range(connectivity.size + 4)
+    lowest = {}
+    for node in nodes:
+        root = connectivity.find(node)
+        lowest[root] = min(lowest.get(root, node), node)
+    return [lowest[connectivity.find(node)] for node in nodes]
+
+def test_rollback_matches_a_rebuild():
+    for boardClass in (Board, BitBoard):
+        for seed in range(60):
+            for board in _random_game(boardClass, seed):
+                fresh = Connectivity(board.topology, board.paths.cells)
+                assert board.connectivity.cells == fresh.cells
+                assert _groups(board.connectivity) == _groups(fresh)
+                for token in (1, 2):
+                    assert board.connectivity.connected(token) == fresh.connected(token)
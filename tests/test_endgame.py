@@ -0,0 +1,32 @@
+from irrationalAgents.basicBoard import _TOKEN_MAP_OUT
+from irrationalAgents.bitBoard import BitBoard
+from irrationalAgents.helpers.endgame import ENTRY_BYTES, EndgameSolver
+
+
+def _board():
+    '''
+    A 4x4 position, blue to move, that takes about a thousand nodes to solve.
+    '''
+    board = BitBoard(4)
+    moves = ((3, 2), (3, 1), (2, 0), (3, 3), (1, 3), (2, 1), (2, 3))
+    for turn, move in enumerate(moves):
+        board.handle_action(("PLACE",) + move, _TOKEN_MAP_OUT[1 + turn % 2])
+    return board
+
+def test_capacity_follows_megabytes():
+    assert EndgameSolver(1).capacity == 2 ** 20 // ENTRY_BYTES
+    assert EndgameSolver(0).capacity == 1
+
+def test_cache_drops_oldest_entries_once_full():
+    solver = EndgameSolver(64 * ENTRY_BYTES / 2 ** 20)
+    assert solver.capacity == 64
+    board = _board()
+    solver.solve(board, 2, 30)
+    assert solver.nodes > solver.capacity
+    assert 0 < len(solver.cache) <= solver.capacity
+    assert len(solver.unknown) <= solver.capacity
+
+def test_small_cache_gives_the_same_answer():
+    board = _board()
+    small = EndgameSolver(64 * ENTRY_BYTES / 2 ** 20)
+    assert small.solve(board, 2, 30) == EndgameSolver().solve(board, 2, 30)
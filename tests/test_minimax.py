@@ -0,0 +1,40 @@
+import random
+from irrationalAgents.basicBoard import Board, _TOKEN_MAP_OUT
+from irrationalAgents.bitBoard import BitBoard
+from irrationalAgents.helpers.minimax import prune_moves
+from irrationalAgents.undoStack import unpack
+
+
+def test_prune_moves_keeps_winning_carrier_moves():
+    for cls in (Board, BitBoard):
+        board = cls(3)
+        for action, player in ((("PLACE", 0, 0), "red"), (("PLACE", 2, 2), "blue"),
+                (("PLACE", 1, 1), "red"), (("PLACE", 0, 2), "blue"), (("PLACE", 2, 1), "red")):
+            board.handle_action(action, player)
+        # (0, 1) and (1, 0) carry the bridge from (0, 0) to (1, 1), and either completes it
+        moves = board.empty_hexes()
+        assert set(prune_moves(board, moves, 1)) == set(moves)
+
+def test_prune_moves_keeps_wins_captures_shortening_and_blocking_moves():
+    for seed in range(150):
+        rng = random.Random(seed)
+        n = rng.randint(3, 7)
+        board = BitBoard(n)
+        for turn in range(rng.randint(2, n * n // 2)):
+            board.handle_action(("PLACE",) + rng.choice(board.empty_hexes()), _TOKEN_MAP_OUT[1 + turn % 2])
+            if board.connectivity.connected(1) or board.connectivity.connected(2):
+                break
+        else:
+            player = 1 + board.turns_taken % 2
+            moves = board.empty_hexes()
+            kept = prune_moves(board, moves, player)
+            before, theirs = board.vcs.distance(player), board.paths.distance(3 - player)
+            for move in moves:
+                header = board.handle_action(("PLACE",) + move, _TOKEN_MAP_OUT[player])
+                wins = board.connectivity.connected(player)
+                captures = unpack(header)[1] > 0
+                shortens = board.vcs.distance(player) < before
+                blocks = board.paths.distance(3 - player) > theirs
+                board.undo_move(header)
+                if wins or captures or shortens or blocks:
+                    assert move in kept, (seed, move)
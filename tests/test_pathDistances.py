@@ -0,0 +1,44 @@
+import random
+from math import inf
+from irrationalAgents.basicBoard import Board, _TOKEN_MAP_IN, _TOKEN_MAP_OUT
+from irrationalAgents.bitBoard import BitBoard
+from irrationalAgents.helpers.pathCost import INF, fillDistances
+
+
+def _random_game(boardClass, seed):
+    '''
+    Plays a random game with STEALs and undos on a new board, yielding it
+    with a random generator after every move and every undo.
+    '''
+    rng = random.Random(seed)
+    board, played = boardClass(rng.randint(2, 7)), []
+    for _ in range(3 * board.n * board.n):
+        if played and rng.random() < 0.35:
+            board.undo_move(played.pop())
+        elif board.empty_hexes():
+            player = _TOKEN_MAP_OUT[1 + board.turns_taken % 2]
+            if board.turns_taken == 1 and rng.random() < 0.5:
+                played.append(board.handle_action(("STEAL",), player))
+            else:
+                played.append(board.handle_action(("PLACE",) + tuple(rng.choice(board.empty_hexes())), player))
+        yield board, rng
+
+def _ends(board, colour):
+    topology = board.topology
+    return topology.red_end if colour == 1 else topology.blue_end
+
+def test_maps_match_a_fresh_fill():
+    for boardClass in (Board, BitBoard):
+        for seed in range(60):
+            for board, rng in _random_game(boardClass, seed):
+                # maps are repaired lazily, so let moves pile up between reads
+                if rng.random() < 0.5:
+                    continue
+                n, cells = board.n, board.paths.cells
+                assert cells == [_TOKEN_MAP_IN[board[divmod(i, n)]] for i in range(n * n)]
+                for colour in (1, 2):
+                    fresh = fillDistances(board.topology, cells, colour)
+                    assert board.paths.maps[colour].dist == fresh
+                    expected = min(fresh[i] for i in _ends(board, colour))
+                    assert board.paths.distance(colour) == (expected if expected < INF else inf)
+
@@ -0,0 +1,66 @@
+import random
+import pytest
+from irrationalAgents.basicBoard import Board, _TOKEN_MAP_OUT
+from irrationalAgents.bitBoard import BitBoard
+from irrationalAgents.snapshot import SharedSnapshot, SnapshotView, read_snapshot, snapshot_size, write_snapshot
+
+
+def _played(boardClass, seed):
+    rng = random.Random(seed)
+    n = rng.randint(2, 9)
+    board = boardClass(n)
+    for turn in range(rng.randint(0, n * n)):
+        player = _TOKEN_MAP_OUT[1 + turn % 2]
+        if board.turns_taken == 1 and rng.random() < 0.3:
+            board.handle_action(("STEAL",), player)
+        elif board.empty_hexes():
+            board.handle_action(("PLACE",) + tuple(rng.choice(board.empty_hexes())), player)
+    return board
+
+def _assert_same(restored, board):
+    assert type(restored) is type(board)
+    assert restored.digest() == board.digest()
+    assert restored.turns_taken == board.turns_taken
+    assert restored.hash == board.hash
+    assert list(restored.image_hashes) == list(board.image_hashes)
+    assert restored.paths.cells == board.paths.cells
+
+def test_round_trip():
+    for boardClass in (Board, BitBoard):
+        for seed in range(40):
+            board = _played(boardClass, seed)
+            buffer = write_snapshot(board)
+            assert len(buffer) == snapshot_size(board.n)
+            for source in (buffer, bytes(buffer)):
+                _assert_same(read_snapshot(source), board)
+            view = SnapshotView(buffer)
+            n = board.n
+            assert all(view[(r, q)] == board[(r, q)] for r in range(n) for q in range(n))
+            view.release()
+
+def test_shared_round_trip():
+    for boardClass in (Board, BitBoard):
+        board = _played(boardClass, 7)
+        shared = SharedSnapshot(board.n)
+        try:
+            shared.write(board)
+            attached = SharedSnapshot(name=shared.name)
+            _assert_same(attached.read(), board)
+            attached.close()
+        finally:
+            shared.unlink()
+
+def test_rejects_bad_magic_and_version():
+    buffer = write_snapshot(_played(BitBoard, 3))
+    for offset, value in ((0, ord("X")), (4, 99)):
+        bad = bytearray(buffer)
+        bad[offset] = value
+        with pytest.raises(ValueError):
+            read_snapshot(bad)
+
+def test_rejects_cells_that_do_not_match_the_hash():
+    board = _played(Board, 5)
+    bad = write_snapshot(board)
+    bad[-1] = 1 if bad[-1] != 1 else 2
+    with pytest.raises(ValueError):
+        read_snapshot(bad)
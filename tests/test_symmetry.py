@@ -0,0 +1,61 @@
+import random
+from irrationalAgents.basicBoard import Board, _TOKEN_MAP_OUT
+from irrationalAgents.bitBoard import BitBoard
+from irrationalAgents.symmetry import ALL_IMAGES, COLOUR_IMAGES, SWAP, canonical, image_cells, image_move
+
+
+def _random_game(boardClass, seed):
+    '''
+    Plays a random game with STEALs and undos on a new board, yielding it
+    after every move and every undo.
+    '''
+    rng = random.Random(seed)
+    board, played = boardClass(rng.randint(2, 7)), []
+    for _ in range(2 * board.n * board.n):
+        if played and rng.random() < 0.3:
+            board.undo_move(played.pop())
+        elif board.empty_hexes():
+            player = _TOKEN_MAP_OUT[1 + board.turns_taken % 2]
+            if board.turns_taken == 1 and rng.random() < 0.5:
+                played.append(board.handle_action(("STEAL",), player))
+            else:
+                played.append(board.handle_action(("PLACE",) + tuple(rng.choice(board.empty_hexes())), player))
+        yield board
+
+def _image_board(board, image):
+    '''
+    A new board of the same engine holding the image of board's position.
+    '''
+    n, cells = board.n, [0] * (board.n * board.n)
+    for i, token in enumerate(board.paths.cells):
+        if token:
+            cells[image_cells(n)[image][i]] = 3 - token if image & SWAP else token
+    imaged = type(board)(n)
+    # a SWAP image has the other player to move
+    imaged.load_cells(cells, board.turns_taken + (1 if image & SWAP else 0))
+    return imaged
+
+def test_image_hashes_match_a_fresh_hash_of_the_image():
+    for boardClass in (Board, BitBoard):
+        for seed in range(15):
+            for board in _random_game(boardClass, seed):
+                assert board.hash == board._compute_hash()
+                for image in ALL_IMAGES[1:]:
+                    assert board.image_hashes[image - 1] == _image_board(board, image).hash
+
+def test_canonical_key_is_the_same_for_every_image():
+    for boardClass in (Board, BitBoard):
+        for seed in range(15):
+            for board in _random_game(boardClass, seed):
+                for images in (ALL_IMAGES, COLOUR_IMAGES):
+                    key = canonical(board, images)[0]
+                    for image in images:
+                        assert canonical(_image_board(board, image), images)[0] == key
+
+def test_image_move_is_its_own_inverse():
+    for n in (2, 5, 8):
+        for image in ALL_IMAGES:
+            for i in range(n * n):
+                move = divmod(i, n)
+                assert image_move(move, image, n) == divmod(image_cells(n)[image][i], n)
+                assert image_move(image_move(move, image, n), image, n) == move
@@ -0,0 +1,27 @@
+from irrationalAgents.helpers.transposition import EXACT, LOWER, SharedTranspositionTable, TranspositionTable
+
+
+def test_depth_replacement_keeps_deeper_entry_of_same_search():
+    for table in (TranspositionTable(size=16), SharedTranspositionTable(5, size=16)):
+        table.new_search()
+        table.store(3, 6, 1.5, EXACT, (1, 2))
+        # another key in the same slot, searched less deeply
+        table.store(3 + 16, 2, -4.0, LOWER, (0, 0))
+        assert table.lookup(3 + 16) is None
+        assert table.lookup(3) == (3, 6, 1.5, EXACT, (1, 2))
+
+def test_depth_replacement_ages_out_earlier_searches():
+    for table in (TranspositionTable(size=16), SharedTranspositionTable(5, size=16)):
+        table.new_search()
+        table.store(3, 6, 1.5, EXACT, (1, 2))
+        table.new_search()
+        table.store(3 + 16, 2, -4.0, LOWER, (0, 0))
+        assert table.lookup(3) is None
+        assert table.lookup(3 + 16) == (3 + 16, 2, -4.0, LOWER, (0, 0))
+
+def test_same_key_is_always_replaced():
+    for table in (TranspositionTable(size=16), SharedTranspositionTable(5, size=16)):
+        table.new_search()
+        table.store(3, 6, 1.5, EXACT, (1, 2))
+        table.store(3, 2, 0.5, LOWER, (4, 4))
+        assert table.lookup(3) == (3, 2, 0.5, LOWER, (4, 4))
@@ -0,0 +1,48 @@
+import random
+from irrationalAgents.basicBoard import Board, _TOKEN_MAP_OUT
+from irrationalAgents.bitBoard import BitBoard
+from irrationalAgents.virtualConnections import VirtualConnections
+
+
+def _random_game(boardClass, seed):
+    '''
+    Plays a random game with STEALs and undos on a new board, yielding it
+    after every move and every undo.
+    '''
+    rng = random.Random(seed)
+    board, played = boardClass(rng.randint(2, 7)), []
+    for _ in range(3 * board.n * board.n):
+        if played and rng.random() < 0.35:
+            board.undo_move(played.pop())
+        elif board.empty_hexes():
+            player = _TOKEN_MAP_OUT[1 + board.turns_taken % 2]
+            if board.turns_taken == 1 and rng.random() < 0.5:
+                played.append(board.handle_action(("STEAL",), player))
+            else:
+                played.append(board.handle_action(("PLACE",) + tuple(rng.choice(board.empty_hexes())), player))
+        yield board
+
+def _carriers(vcs):
+    '''
+    Each connection's key, with its token and its two carrier cells as a set.
+    '''
+    return {key: (token, frozenset((first, second)))
+        for key, (token, first, second) in vcs.connections.items()}
+
+def test_make_unmake_matches_a_rebuild():
+    for boardClass in (Board, BitBoard):
+        for seed in range(60):
+            for board in _random_game(boardClass, seed):
+                vcs = board.vcs
+                fresh = VirtualConnections(board.topology, board.paths.cells)
+                assert vcs.cells == fresh.cells
+                # carriers are compared as sets: the order they were found in can differ
+                assert _carriers(vcs) == _carriers(fresh)
+                assert vcs.by_carrier == fresh.by_carrier
+                for token in (1, 2):
+                    assert vcs.partners[token] == fresh.partners[token]
+                    assert vcs.templates[token] == fresh.templates[token]
+                    assert vcs.count(token) == fresh.count(token)
+                    for i in range(board.n * board.n):
+                        if not vcs.cells[i]:
+                            assert vcs.carries(i, token) == fresh.carries(i, token)